@@ -0,0 +1,198 @@
+"""Content-addressed on-disk cache for compression results."""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+
+DEFAULT_CACHE_SIZE = 1024 * 1024 * 1024  # 1 GiB
+CACHE_VERSION = 1
+
+
+def default_cache_dir():
+    """Return the cache directory, honouring PDF_MANAGER_CACHE_DIR and XDG_CACHE_HOME."""
+    if os.environ.get('PDF_MANAGER_CACHE_DIR'):
+        return Path(os.environ['PDF_MANAGER_CACHE_DIR'])
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'pdf-manager'
+
+
+def cache_key(digest, settings):
+    """Build a cache key from an input content hash and the full settings.
+
+    Args:
+        digest: Hex digest of the input content
+        settings: JSON-serialisable settings that affect the result
+    """
+    payload = json.dumps(
+        {'version': CACHE_VERSION, 'input': digest, 'settings': settings},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class CompressionCache:
+    """Least-recently-used file cache keyed by content hash.
+
+    Entries live under ``directory/namespace/<2 hex chars>/<key>``; whole
+    documents and individual images use separate namespaces. A hit refreshes
+    the entry's mtime, and eviction removes the entries with the oldest mtime
+    until the whole cache directory fits in ``max_size`` bytes.
+    """
+
+    def __init__(self, directory=None, max_size=DEFAULT_CACHE_SIZE, namespace='documents'):
+        self.directory = Path(directory) if directory else default_cache_dir()
+        self.max_size = max_size
+        self.namespace = namespace
+        self.root = self.directory / namespace
+        self._size = None
+
+    def namespaced(self, namespace):
+        """Return a cache sharing this directory and size cap under another namespace."""
+        return CompressionCache(self.directory, self.max_size, namespace)
+
+    def _entry_path(self, key):
+        return self.root / key[:2] / key
+
+    def _entries(self):
+        """Yield (path, size, mtime) for every entry in the cache directory."""
+        if not self.directory.is_dir():
+            return
+        with os.scandir(self.directory) as namespaces:
+            for namespace in namespaces:
+                if not namespace.is_dir():
+                    continue
+                with os.scandir(namespace.path) as shards:
+                    for shard in shards:
+                        if not shard.is_dir():
+                            continue
+                        with os.scandir(shard.path) as entries:
+                            for entry in entries:
+                                if entry.is_file() and not entry.name.endswith('.tmp'):
+                                    stat = entry.stat()
+                                    yield Path(entry.path), stat.st_size, stat.st_mtime
+
+    def get(self, key):
+        """Return the path of a cached entry, or None on a miss."""
+        path = self._entry_path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def get_bytes(self, key):
+        """Return the content of a cached entry, or None on a miss."""
+        path = self.get(key)
+        if path is None:
+            return None
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, source_file):
+        """Copy ``source_file`` into the cache under ``key``."""
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(source_file, temp_name)
+            os.replace(temp_name, path)
+        except BaseException:
+            os.unlink(temp_name)
+            raise
+
+        self._added(path.stat().st_size)
+        return path
+
+    def put_bytes(self, key, data):
+        """Store ``data`` in the cache under ``key``."""
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_name, path)
+        except BaseException:
+            os.unlink(temp_name)
+            raise
+
+        self._added(len(data))
+        return path
+
+    def _added(self, size):
+        """Account for a new entry, scanning and evicting only when over the cap.
+
+        The running total is approximate (other processes may share the
+        cache), so crossing the cap triggers a full rescan before evicting.
+        """
+        if self._size is None:
+            self._size = sum(entry_size for _, entry_size, _ in self._entries())
+        else:
+            self._size += size
+
+        if self._size > self.max_size:
+            self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits its size cap.
+
+        Returns:
+            Number of entries removed
+        """
+        entries = list(self._entries())
+        total = sum(size for _, size, _ in entries)
+        self._size = total
+        if total <= self.max_size:
+            return 0
+
+        removed = 0
+        for path, size, _ in sorted(entries, key=lambda e: e[2]):
+            if total <= self.max_size:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        self._size = total
+        return removed
+
+    def stats(self):
+        """Return a dict with the entry count, total size and size cap.
+
+        'namespaces' breaks the entry count down per namespace.
+        """
+        entries = list(self._entries())
+        namespaces = {}
+        for path, _, _ in entries:
+            namespace = path.parent.parent.name
+            namespaces[namespace] = namespaces.get(namespace, 0) + 1
+        return {
+            'directory': str(self.directory),
+            'entries': len(entries),
+            'namespaces': namespaces,
+            'size': sum(size for _, size, _ in entries),
+            'max_size': self.max_size,
+        }
+
+    def clear(self):
+        """Remove every entry in the cache directory and return how many there were."""
+        count = 0
+        for path, _, _ in list(self._entries()):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            count += 1
+        self._size = 0
+        return count
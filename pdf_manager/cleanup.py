@@ -0,0 +1,185 @@
+"""Finding unreferenced objects and stripping data nobody reads from PDFs."""
+
+import re
+from collections import Counter
+
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, StreamObject
+
+
+# What each strip rule removes from the pages being written
+STRIP_RULES = {
+    'thumbnails': 'embedded page thumbnails (/Thumb)',
+    'metadata': 'XMP metadata streams of pages, images, fonts and forms',
+    'piece_info': 'page-piece dictionaries, private data of the editing application',
+    'javascript': 'JavaScript actions of links, form fields and pages',
+    'attachments': 'file attachment annotations and their embedded files',
+}
+
+# Labels of the cleanup statistics, in the order they are reported
+_LABELS = {
+    'unreferenced': 'unreferenced objects',
+    'thumbnails': 'thumbnails',
+    'metadata': 'metadata streams',
+    'piece_info': 'page-piece dictionaries',
+    'javascript': 'JavaScript actions',
+    'attachments': 'attachments',
+}
+
+# Structure the pages of a document hang from, which is not theirs to clean
+_DOCUMENT_TYPES = ('/Page', '/Pages', '/Catalog')
+
+
+def strip_rules(rules):
+    """Validate strip rule names and return them as a tuple."""
+    rules = tuple(rules)
+    for rule in rules:
+        if rule not in STRIP_RULES:
+            raise ValueError(f"Unknown strip rule: {rule}. Choose from: {list(STRIP_RULES)}")
+    return rules
+
+
+def _resolve(value):
+    return value.get_object() if isinstance(value, IndirectObject) else value
+
+
+def _is_javascript(action):
+    action = _resolve(action)
+    return isinstance(action, DictionaryObject) and action.get('/S') == '/JavaScript'
+
+
+def _is_attachment(annotation):
+    annotation = _resolve(annotation)
+    return isinstance(annotation, DictionaryObject) and annotation.get('/Subtype') == '/FileAttachment'
+
+
+def _strip(obj, rules, stats):
+    """Remove what ``rules`` ask for from one dictionary, in place."""
+    for rule, key in (('thumbnails', '/Thumb'), ('metadata', '/Metadata'), ('piece_info', '/PieceInfo')):
+        if rule in rules and key in obj:
+            del obj[key]
+            stats[rule] += 1
+
+    if 'javascript' in rules:
+        if '/A' in obj and _is_javascript(obj.raw_get('/A')):
+            del obj['/A']
+            stats['javascript'] += 1
+        actions = _resolve(obj.raw_get('/AA')) if '/AA' in obj else None
+        if isinstance(actions, DictionaryObject):
+            for trigger in [t for t, action in actions.items() if _is_javascript(action)]:
+                del actions[trigger]
+                stats['javascript'] += 1
+            if not actions:
+                del obj['/AA']
+
+    if 'attachments' in rules and '/Annots' in obj:
+        annotations = _resolve(obj.raw_get('/Annots'))
+        if isinstance(annotations, ArrayObject):
+            kept = [a for a in annotations if not _is_attachment(a)]
+            if len(kept) < len(annotations):
+                stats['attachments'] += len(annotations) - len(kept)
+                obj[NameObject('/Annots')] = ArrayObject(kept)
+
+
+def unreferenced_objects(reader):
+    """Count the objects of ``reader`` that cannot be reached from its trailer.
+
+    These are left behind by editors and earlier merges. A writer copying
+    pages never reaches them, so they are dropped; this only tells how
+    many there were. Object and cross-reference streams and the hints of
+    a linearized file are structure, not content, and are not counted.
+    """
+    reachable = set()
+    pending = [reader.trailer.raw_get(key) for key in ('/Root', '/Info') if key in reader.trailer]
+    while pending:
+        obj = pending.pop()
+        if isinstance(obj, IndirectObject):
+            key = (obj.idnum, obj.generation)
+            if key in reachable:
+                continue
+            reachable.add(key)
+            obj = obj.get_object()
+        if isinstance(obj, DictionaryObject):
+            pending.extend(obj.values())
+        elif isinstance(obj, ArrayObject):
+            pending.extend(obj)
+
+    # The table also lists free entries; only count numbers whose offset
+    # really holds that object
+    candidates = {(idnum, 0): None for idnum in reader.xref_objStm if (idnum, 0) not in reachable}
+    stream = reader.stream
+    for generation, entries in reader.xref.items():
+        for idnum, offset in entries.items():
+            if (idnum, generation) in reachable:
+                continue
+            stream.seek(offset)
+            if re.match(rb'\s*%d\s+%d\s+obj' % (idnum, generation), stream.read(32)):
+                candidates[idnum, generation] = offset
+
+    objects = {}
+    for key, offset in candidates.items():
+        try:
+            objects[key] = reader.get_object(IndirectObject(*key, reader))
+        except Exception:
+            continue
+
+    # A linearized file's parameters and hint streams are found by offset
+    structure = set()
+    for obj in objects.values():
+        if isinstance(obj, DictionaryObject) and '/Linearized' in obj:
+            structure.update(obj.get('/H', [])[::2])
+
+    count = 0
+    for key, obj in objects.items():
+        if obj is None or candidates[key] in structure:
+            continue
+        if isinstance(obj, DictionaryObject) and '/Linearized' in obj:
+            continue
+        if isinstance(obj, StreamObject) and obj.get('/Type') in ('/ObjStm', '/XRef'):
+            continue
+        count += 1
+    return count
+
+
+def clean_document(reader, rules):
+    """Strip what ``rules`` ask for from the pages of ``reader``, in place.
+
+    Everything a page reaches (resources, images, fonts, annotations,
+    form XObjects) is visited once, even when several pages share it.
+    Other pages and the page tree are not followed.
+
+    Args:
+        reader: PyPDF2 PdfReader whose pages are about to be written
+        rules: Names from STRIP_RULES
+
+    Returns:
+        Counter of 'unreferenced' objects and of the items each rule
+        removed, without zero counts
+    """
+    stats = Counter(unreferenced=unreferenced_objects(reader))
+
+    visited = set()
+    for page in reader.pages:
+        pending = [page]
+        while pending:
+            obj = pending.pop()
+            if isinstance(obj, IndirectObject):
+                key = (obj.idnum, obj.generation)
+                if key in visited:
+                    continue
+                visited.add(key)
+                obj = obj.get_object()
+            if isinstance(obj, DictionaryObject):
+                if obj is not page and obj.get('/Type') in _DOCUMENT_TYPES:
+                    continue
+                _strip(obj, rules, stats)
+                pending.extend(value for key, value in obj.items() if key != '/Parent')
+            elif isinstance(obj, ArrayObject):
+                pending.extend(obj)
+    # Only what was actually removed
+    return +stats
+
+
+def cleanup_summary(stats):
+    """Format cleanup statistics for the console."""
+    parts = [f"{stats[key]} {label}" for key, label in _LABELS.items() if stats.get(key)]
+    return f"  Removed: {', '.join(parts)}"
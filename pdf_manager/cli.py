@@ -1,9 +1,65 @@
 """CLI interface for pdf-manager."""
 
+import contextlib
+import re
 import click
-from .merge import merge_pdfs
-from .walk import walk_pdfs
-from .compress import compress_pdf, get_compression_info
+from .cache import DEFAULT_CACHE_SIZE, CompressionCache
+from .cleanup import STRIP_RULES
+from .merge import DEFAULT_MAX_OPEN_FILES, merge_pdfs
+from .plan import parse_volume_ranges
+from .walk import execute_plan, walk_pdfs
+from .watch import DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL, watch_walk
+from .workqueue import DEFAULT_LEASE_TIMEOUT
+from .compress import compress_directory, compress_pdf, get_compression_info
+from .index import PdfIndex, inspect_pdfs
+
+
+class ByteSize(click.ParamType):
+    """Click parameter for sizes such as '500K', '20MB' or '1.5GiB'."""
+
+    name = 'size'
+    _units = {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3, 't': 1024 ** 4}
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, int):
+            return value
+        match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([kmgt]?)(?:i?b)?\s*', str(value), re.IGNORECASE)
+        if not match:
+            self.fail(f"{value!r} is not a valid size (e.g. 500K, 20MB, 1.5GB)", param, ctx)
+        number, unit = match.groups()
+        return int(float(number) * self._units[unit.lower()])
+
+
+BYTE_SIZE = ByteSize()
+
+
+def cache_options(f):
+    """Add the shared --cache-dir and --cache-size options to a command."""
+    f = click.option('--cache-size', type=BYTE_SIZE, default=DEFAULT_CACHE_SIZE,
+                     envvar='PDF_MANAGER_CACHE_SIZE', show_default='1GB',
+                     help='Maximum cache size; least recently used entries are evicted beyond it')(f)
+    f = click.option('--cache-dir', type=click.Path(file_okay=False), envvar='PDF_MANAGER_CACHE_DIR',
+                     help='Cache directory - default: ~/.cache/pdf-manager')(f)
+    return f
+
+
+def index_path_option(f):
+    """Add the shared --index-path option to a command."""
+    return click.option('--index-path', type=click.Path(dir_okay=False), envvar='PDF_MANAGER_INDEX',
+                        help='Metadata index file - default: ~/.cache/pdf-manager/index.sqlite3')(f)
+
+
+def strip_option(f):
+    """Add the shared --strip option to a command."""
+    return click.option('--strip', multiple=True, type=click.Choice([*STRIP_RULES, 'none']),
+                        help="Data to strip, repeatable; 'none' strips nothing - default: the level's rules")(f)
+
+
+def strip_rules_from(values):
+    """Turn --strip values into a strip override: None keeps the level's rules."""
+    if not values:
+        return None
+    return () if 'none' in values else values
 
 
 @click.group()
@@ -18,17 +74,40 @@ def main():
 @click.option('-o', '--output', required=True, help='Output PDF file path')
 @click.option('-c', '--compress', type=click.Choice(['basic', 'medium', 'aggressive']),
               help='Compression level (basic: high quality/less compression, medium: good quality/more compression, aggressive: may lose quality/maximum compression)')
-def merge(input_files, output, compress):
+@click.option('-j', '--jobs', type=click.IntRange(min=1),
+              help='Number of processes recompressing images or merging chunks - default: number of CPUs')
+@click.option('--max-open-files', type=click.IntRange(min=1), default=DEFAULT_MAX_OPEN_FILES,
+              help=f'Maximum number of input files held open at once - default: {DEFAULT_MAX_OPEN_FILES}')
+@click.option('--fan-in', type=click.IntRange(min=2),
+              help='Tree merge: combine this many files per step, merging chunks in parallel')
+@click.option('--index', 'use_index', is_flag=True,
+              help='Check inputs against the metadata index and report the page count')
+@index_path_option
+@click.option('-a', '--append', is_flag=True,
+              help='Add the pages to OUTPUT if it exists, writing only the new content at its end')
+@click.option('--object-streams/--no-object-streams', default=None,
+              help='Pack dictionaries into compressed object streams - default: on for medium and aggressive')
+@click.option('--linearize', is_flag=True,
+              help='Write a linearized PDF (fast web view) whose first page shows before the rest is downloaded')
+@strip_option
+def merge(input_files, output, compress, jobs, max_open_files, fan_in, use_index, index_path, append,
+          object_streams, linearize, strip):
     """Merge multiple PDF files into a single PDF.
 
-    INPUT_FILES: Two or more PDF files to merge
+    INPUT_FILES: Two or more PDF files to merge (one is enough with --append)
     """
-    if len(input_files) < 2:
+    if len(input_files) < (1 if append else 2):
         click.echo("Error: At least two input files are required for merging.")
         return
 
     try:
-        merge_pdfs(input_files, output, compress)
+        if use_index:
+            with PdfIndex(index_path) as index:
+                merge_pdfs(input_files, output, compress, jobs, max_open_files, fan_in, index, append,
+                           object_streams, linearize, strip_rules_from(strip))
+        else:
+            merge_pdfs(input_files, output, compress, jobs, max_open_files, fan_in, append=append,
+                       object_streams=object_streams, linearize=linearize, strip=strip_rules_from(strip))
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
 
@@ -48,14 +127,61 @@ def merge(input_files, output, compress):
               help='Compression level (basic: high quality/less compression, medium: good quality/more compression, aggressive: may lose quality/maximum compression)')
 @click.option('-i', '--interactive', is_flag=True,
               help='Interactive mode: prompt for arguments and allow editing each volume before merging')
-def walk(input_dir, output_dir, order, batch_size, prefix, suffix, compress, interactive):
+@click.option('-j', '--jobs', type=click.IntRange(min=1),
+              help='Number of volumes built in parallel - default: number of CPUs')
+@click.option('-f', '--force', is_flag=True,
+              help='Rebuild all volumes, even those whose inputs and options are unchanged since the last run')
+@click.option('--max-open-files', type=click.IntRange(min=1), default=DEFAULT_MAX_OPEN_FILES,
+              help=f'Maximum number of input files each volume holds open at once - default: {DEFAULT_MAX_OPEN_FILES}')
+@click.option('-r', '--recursive', is_flag=True,
+              help='Also collect PDFs from subdirectories, ordered by relative path')
+@click.option('--include', multiple=True,
+              help='Only use files matching this glob (name or relative path); can be repeated')
+@click.option('--exclude', multiple=True,
+              help='Skip files and subdirectories matching this glob; can be repeated')
+@click.option('--index', 'use_index', is_flag=True,
+              help='Show page counts and reuse hashes from the metadata index')
+@index_path_option
+@click.option('--pages-per-volume', type=click.IntRange(min=1),
+              help='Fill volumes up to this many pages instead of --batch-size files')
+@click.option('--max-volume-bytes', type=BYTE_SIZE,
+              help='Fill volumes up to this much input (e.g. 200MB) instead of --batch-size files')
+@click.option('--balanced', is_flag=True,
+              help='Keep the number of volumes but even out their sizes, without reordering files')
+@click.option('--plan-only', 'plan_file', type=click.Path(dir_okay=False),
+              help='Write the volume plan to this JSON file instead of building volumes (see execute)')
+@click.option('--worker', is_flag=True,
+              help='Share the volumes with other walk --worker runs using the same OUTPUT_DIR, e.g. on other hosts')
+@click.option('--lease-timeout', type=click.IntRange(min=1), default=DEFAULT_LEASE_TIMEOUT,
+              help=f'Seconds before a silent worker\'s volume is taken over - default: {DEFAULT_LEASE_TIMEOUT}')
+@click.option('--reset-queue', is_flag=True,
+              help='With --worker, discard the shared plan and leases left by earlier worker runs first')
+@click.option('--resume', is_flag=True,
+              help='Continue an interrupted walk into OUTPUT_DIR with its original plan')
+@click.option('-a', '--append', is_flag=True,
+              help='Extend volumes that only gained files at the end in place instead of rebuilding them')
+@click.option('--linearize', is_flag=True,
+              help='Write linearized volumes (fast web view) whose first page shows before the rest is downloaded')
+@click.option('--watch', is_flag=True,
+              help='Keep running and update the volumes whenever PDFs are added to or changed in INPUT_DIR')
+@click.option('--debounce', type=click.FloatRange(min=0), default=DEFAULT_DEBOUNCE,
+              help=f'With --watch, seconds without new changes before updating - default: {DEFAULT_DEBOUNCE:g}')
+@click.option('--poll-interval', type=click.FloatRange(min=0.1), default=None,
+              help=f'With --watch, scan INPUT_DIR this often instead of using inotify - default: inotify where available, else {DEFAULT_POLL_INTERVAL:g}')
+def walk(input_dir, output_dir, order, batch_size, prefix, suffix, compress, interactive, jobs, force,
+         max_open_files, recursive, include, exclude, use_index, index_path, pages_per_volume,
+         max_volume_bytes, balanced, plan_file, worker, lease_timeout, reset_queue, resume, append,
+         linearize, watch, debounce, poll_interval):
     """Walk through PDF files and create batched volumes.
 
     INPUT_DIR: Directory containing PDF files to process
     OUTPUT_DIR: Directory where volume files will be created
 
     This command processes PDF files in batches, creating volume files that merge
-    multiple PDFs together. Files are sorted by name in the specified order.
+    multiple PDFs together. Files are sorted by name (by relative path with
+    --recursive) in the specified order.
+    A manifest in OUTPUT_DIR records what each volume was built from, so reruns
+    only rebuild volumes whose inputs or options changed.
     """
     # Interactive mode: prompt for missing arguments
     if interactive:
@@ -90,8 +216,23 @@ def walk(input_dir, output_dir, order, batch_size, prefix, suffix, compress, int
             click.echo("Error: INPUT_DIR and OUTPUT_DIR are required in non-interactive mode.", err=True)
             return
 
+    options = dict(order=order, batch_size=batch_size, prefix=prefix, suffix=suffix,
+                   compression_level=compress, interactive=interactive, jobs=jobs, force=force,
+                   max_open_files=max_open_files, recursive=recursive, include=include,
+                   exclude=exclude, pages_per_volume=pages_per_volume,
+                   max_volume_bytes=max_volume_bytes, balanced=balanced, plan_file=plan_file,
+                   worker=worker, lease_timeout=lease_timeout, reset_queue=reset_queue, resume=resume,
+                   append=append, linearize=linearize)
+
     try:
-        walk_pdfs(input_dir, output_dir, order, batch_size, prefix, suffix, compress, interactive)
+        with contextlib.ExitStack() as stack:
+            if use_index:
+                options['index'] = stack.enter_context(PdfIndex(index_path))
+            if watch:
+                watch_walk(input_dir, output_dir, debounce, poll_interval or DEFAULT_POLL_INTERVAL,
+                           polling=poll_interval is not None, **options)
+            else:
+                walk_pdfs(input_dir, output_dir, **options)
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
 
@@ -102,7 +243,26 @@ def walk(input_dir, output_dir, order, batch_size, prefix, suffix, compress, int
 @click.option('-c', '--compress', type=click.Choice(['basic', 'medium', 'aggressive']), default='medium',
               help='Compression level (default: medium)')
 @click.option('--info', is_flag=True, help='Show compression level information')
-def compress(input_file, output_file, compress, info):
+@click.option('-j', '--jobs', type=click.IntRange(min=1),
+              help='Number of processes recompressing images - default: number of CPUs')
+@click.option('--cache', 'use_cache', is_flag=True,
+              help='Reuse and store results in the compression cache')
+@click.option('--adaptive', is_flag=True,
+              help='Sample images first and skip work that does not pay off')
+@click.option('--min-saving', type=click.FloatRange(min=0, max=100, max_open=True),
+              help="Percent saving below which --adaptive keeps the original - default: the level's")
+@click.option('--target-size', type=BYTE_SIZE,
+              help='Search for the highest image quality that fits this size (e.g. 20MB)')
+@click.option('--max-cpu-time', type=click.FloatRange(min=0, min_open=True),
+              help='CPU seconds after which the --target-size search stops - default: no limit')
+@click.option('--object-streams/--no-object-streams', default=None,
+              help='Pack dictionaries into compressed object streams - default: on for medium and aggressive')
+@click.option('--linearize', is_flag=True,
+              help='Write a linearized PDF (fast web view) whose first page shows before the rest is downloaded')
+@strip_option
+@cache_options
+def compress(input_file, output_file, compress, info, jobs, use_cache, adaptive, min_saving,
+             target_size, max_cpu_time, object_streams, linearize, strip, cache_dir, cache_size):
     """Compress a PDF file with specified compression level.
 
     INPUT_FILE: PDF file to compress
@@ -112,11 +272,133 @@ def compress(input_file, output_file, compress, info):
         click.echo(get_compression_info())
         return
 
+    result_cache = CompressionCache(cache_dir, cache_size) if use_cache else None
+
     try:
-        compress_pdf(input_file, output_file, compress)
+        compress_pdf(input_file, output_file, compress, jobs, result_cache, adaptive,
+                     min_saving / 100 if min_saving is not None else None, target_size, max_cpu_time,
+                     object_streams, linearize, strip_rules_from(strip))
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
 
 
+@main.command('compress-dir')
+@click.argument('input_dir', type=click.Path(exists=True, file_okay=False))
+@click.argument('output_dir', type=click.Path(file_okay=False))
+@click.option('-c', '--compress', type=click.Choice(['basic', 'medium', 'aggressive']), default='medium',
+              help='Compression level (default: medium)')
+@click.option('-j', '--jobs', type=click.IntRange(min=1),
+              help='Number of files compressed in parallel - default: number of CPUs')
+@click.option('-f', '--force', is_flag=True,
+              help='Compress files even if their output is newer than the input')
+@click.option('--cache', 'use_cache', is_flag=True,
+              help='Reuse and store results in the compression cache')
+@click.option('--adaptive', is_flag=True,
+              help='Sample images first and skip work that does not pay off')
+@click.option('--min-saving', type=click.FloatRange(min=0, max=100, max_open=True),
+              help="Percent saving below which --adaptive keeps the original - default: the level's")
+@click.option('--target-size', type=BYTE_SIZE,
+              help='Search for the highest image quality that fits this size, per file (e.g. 20MB)')
+@click.option('--max-cpu-time', type=click.FloatRange(min=0, min_open=True),
+              help='CPU seconds after which each --target-size search stops - default: no limit')
+@click.option('--object-streams/--no-object-streams', default=None,
+              help='Pack dictionaries into compressed object streams - default: on for medium and aggressive')
+@click.option('--linearize', is_flag=True,
+              help='Write linearized PDFs (fast web view) whose first page shows before the rest is downloaded')
+@strip_option
+@cache_options
+def compress_dir(input_dir, output_dir, compress, jobs, force, use_cache, adaptive, min_saving,
+                 target_size, max_cpu_time, object_streams, linearize, strip, cache_dir, cache_size):
+    """Compress every PDF in a directory tree.
+
+    INPUT_DIR: Directory to scan recursively for PDFs
+    OUTPUT_DIR: Directory receiving the compressed files, in the same tree
+
+    Files whose output is newer than the input are skipped, so an
+    interrupted run can simply be started again.
+    """
+    result_cache = CompressionCache(cache_dir, cache_size) if use_cache else None
+
+    try:
+        compress_directory(input_dir, output_dir, compress, jobs, force, result_cache,
+                           adaptive=adaptive,
+                           min_saving=min_saving / 100 if min_saving is not None else None,
+                           target_size=target_size, max_cpu_time=max_cpu_time,
+                           object_streams=object_streams, linearize=linearize,
+                           strip=strip_rules_from(strip))
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+
+
+@main.command()
+@click.argument('plan_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--volumes', help='Volumes to build, e.g. 3-17 or 1,4,10-12 - default: all')
+@click.option('-j', '--jobs', type=click.IntRange(min=1),
+              help='Number of volumes built in parallel - default: number of CPUs')
+@click.option('-f', '--force', is_flag=True,
+              help='Rebuild volumes even if they are up to date')
+@click.option('--input-dir', type=click.Path(exists=True, file_okay=False),
+              help="Use this directory instead of the plan's input directory")
+@click.option('--output-dir', type=click.Path(file_okay=False),
+              help="Use this directory instead of the plan's output directory")
+def execute(plan_file, volumes, jobs, force, input_dir, output_dir):
+    """Build volumes from a plan written by walk --plan-only.
+
+    PLAN_FILE: Plan JSON file
+
+    The input directory is not scanned again, so a plan can be split across
+    machines with --volumes, or used to rerun only the volumes that failed.
+    """
+    try:
+        selected = parse_volume_ranges(volumes) if volumes else None
+        execute_plan(plan_file, selected, jobs, force, input_dir, output_dir)
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+
+
+@main.command()
+@click.argument('inputs', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option('-r', '--recursive', is_flag=True, help='Scan directories recursively')
+@index_path_option
+def inspect(inputs, recursive, index_path):
+    """Show page count, size and validity of PDF files.
+
+    INPUTS: PDF files and/or directories containing PDFs
+
+    Results are kept in a metadata index, so files that have not changed
+    since they were last inspected are not parsed again.
+    """
+    try:
+        inspect_pdfs(inputs, recursive, index_path)
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+
+
+@main.group()
+def cache():
+    """Inspect or clear the compression cache."""
+    pass
+
+
+@cache.command()
+@cache_options
+def stats(cache_dir, cache_size):
+    """Show the number of cached results and their total size."""
+    info = CompressionCache(cache_dir, cache_size).stats()
+    click.echo(f"Cache directory: {info['directory']}")
+    click.echo(f"  Entries: {info['entries']}")
+    for namespace, count in sorted(info['namespaces'].items()):
+        click.echo(f"    {namespace}: {count}")
+    click.echo(f"  Size: {info['size']:,} bytes of {info['max_size']:,} bytes")
+
+
+@cache.command()
+@cache_options
+def clear(cache_dir, cache_size):
+    """Remove every cached result."""
+    removed = CompressionCache(cache_dir, cache_size).clear()
+    click.echo(f"Removed {removed} cached result(s)")
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
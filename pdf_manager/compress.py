@@ -1,7 +1,21 @@
 """PDF compression functionality with configurable quality levels."""
 
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
 import PyPDF2
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from .cache import cache_key
+from .cleanup import clean_document, cleanup_summary, strip_rules
+from .images import image_bytes, recompress_images, sample_saving
+from .linearize import linearize_pdf
+from .manifest import file_digest
+from .scan import scan_pdfs
+from .writer import MergeWriter
 
 
 COMPRESSION_LEVELS = {
@@ -9,33 +23,143 @@ COMPRESSION_LEVELS = {
         'quality': 85,
         'compress_streams': True,
         'compress_images': False,
+        'max_dpi': None,
+        'object_streams': False,
+        'min_image_saving': 0.05,
+        'min_saving': 0.02,
+        'adaptive': False,
+        'strip': ('thumbnails', 'piece_info'),
         'description': 'Basic compression - keeps high quality, less compression'
     },
     'medium': {
         'quality': 65,
         'compress_streams': True,
         'compress_images': True,
+        'max_dpi': 300,
+        'object_streams': True,
+        'min_image_saving': 0.05,
+        'min_saving': 0.02,
+        'adaptive': False,
+        'strip': ('thumbnails', 'piece_info', 'metadata'),
         'description': 'Medium compression - good quality with more compression'
     },
     'aggressive': {
         'quality': 35,
         'compress_streams': True,
         'compress_images': True,
+        'max_dpi': 150,
+        'object_streams': True,
+        'min_image_saving': 0.02,
+        'min_saving': 0.02,
+        'adaptive': False,
+        'strip': ('thumbnails', 'piece_info', 'metadata', 'javascript', 'attachments'),
         'description': 'Aggressive compression - may lose quality for maximum compression'
     }
 }
 
+# Image quality and resolution limit tried by a target-size search, from
+# the best looking output to the smallest one
+TARGET_SIZE_STEPS = (
+    (95, None), (85, None), (75, None), (65, 300), (55, 300), (45, 200),
+    (35, 150), (25, 150), (20, 100), (15, 72), (10, 72),
+)
 
-def compress_pdf(input_file, output_file, compression_level='medium'):
+
+def get_compression_settings(compression_level):
+    """Return the settings for a compression level, validating its name."""
+    if compression_level not in COMPRESSION_LEVELS:
+        raise ValueError(f"Invalid compression level. Choose from: {list(COMPRESSION_LEVELS.keys())}")
+    return COMPRESSION_LEVELS[compression_level]
+
+
+def compress_images(pages, settings, jobs=None, cache=None, known=None):
+    """Recompress embedded images at the level's JPEG quality.
+
+    Images drawn at more than the level's 'max_dpi' are downsampled first.
+    Images that would not shrink by the level's 'min_image_saving' are kept.
+
+    Args:
+        pages: PyPDF2 page objects whose images are recompressed in place
+        settings: One of the COMPRESSION_LEVELS entries
+        jobs: Number of worker processes (default: CPU count)
+        cache: Optional CompressionCache for individual image results
+        known: Optional image results computed beforehand (see ``sample_saving``)
+
+    Returns:
+        Tuple of (images recompressed, bytes before, bytes after)
+    """
+    if not settings['compress_images']:
+        return 0, 0, 0
+    return recompress_images(pages, settings, jobs, cache, known)
+
+
+def image_summary(image_stats):
+    """Format image recompression statistics for the console."""
+    count, before, after = image_stats
+    return f"  Images recompressed: {count} ({before:,} -> {after:,} bytes)"
+
+
+def compress_pdf(input_file, output_file, compression_level='medium', jobs=None, cache=None,
+                 adaptive=False, min_saving=None, target_size=None, max_cpu_time=None,
+                 object_streams=None, linearize=False, strip=None):
     """Compress a PDF file with specified compression level.
 
+    In adaptive mode, a sample of the images is recompressed first. When
+    the projected saving is below ``min_saving``, the remaining images are
+    left alone; and when the whole result is not at least ``min_saving``
+    smaller than the input, the input is copied unchanged.
+
+    With ``target_size``, the image quality and resolution are not taken
+    from the level but searched for: the output is written at the highest
+    quality step that fits the budget (see ``_compress_to_target``).
+
+    With ``linearize``, the result is rewritten as a linearized ("fast web
+    view") PDF (see ``linearize_pdf``), which uses no object streams.
+
+    Only objects reachable from the pages are written, so objects nothing
+    refers to are dropped. Thumbnails, metadata and the other data named
+    by the level's 'strip' rules (see ``STRIP_RULES``) are removed too.
+
     Args:
         input_file: Input PDF file path
         output_file: Output PDF file path
         compression_level: Compression level ('basic', 'medium', 'aggressive')
+        jobs: Number of processes recompressing images (default: CPU count)
+        cache: Optional CompressionCache; on a hit the stored result is
+               copied to ``output_file`` without parsing the input. On a
+               miss, its 'images' namespace caches individual images.
+        adaptive: Skip work that is not projected to pay off (default: False)
+        min_saving: Saving below which adaptive mode keeps the original, as a
+                    fraction (default: the level's 'min_saving')
+        target_size: Optional maximum output size in bytes
+        max_cpu_time: Optional CPU seconds after which a target-size search
+                      stops and settles for the smallest step known to fit
+        object_streams: Optional override of the level's 'object_streams'
+        linearize: Write a linearized PDF (default: False)
+        strip: Optional override of the level's 'strip' rules
     """
-    if compression_level not in COMPRESSION_LEVELS:
-        raise ValueError(f"Invalid compression level. Choose from: {list(COMPRESSION_LEVELS.keys())}")
+    settings = dict(get_compression_settings(compression_level))
+    if adaptive:
+        settings['adaptive'] = True
+    if min_saving is not None:
+        if not 0 <= min_saving < 1:
+            raise ValueError("Minimum saving must be between 0 and 1")
+        settings['min_saving'] = min_saving
+    if target_size is not None:
+        if target_size < 1:
+            raise ValueError("Target size must be at least 1 byte")
+        if adaptive:
+            raise ValueError("Target size cannot be combined with adaptive mode")
+    if max_cpu_time is not None and max_cpu_time <= 0:
+        raise ValueError("Max CPU time must be positive")
+    if object_streams is not None:
+        settings['object_streams'] = object_streams
+    if linearize:
+        if object_streams:
+            raise ValueError("Linearize cannot be combined with object streams")
+        settings['object_streams'] = False
+    if strip is not None:
+        settings['strip'] = strip_rules(strip)
 
     input_path = Path(input_file)
     if not input_path.exists():
@@ -43,41 +167,44 @@ def compress_pdf(input_file, output_file, compression_level='medium'):
     if not input_path.suffix.lower() == '.pdf':
         raise ValueError(f"File is not a PDF: {input_file}")
 
-    settings = COMPRESSION_LEVELS[compression_level]
+    output_path = Path(output_file)
 
     try:
-        with open(input_path, 'rb') as input_pdf:
-            reader = PyPDF2.PdfReader(input_pdf)
-            writer = PyPDF2.PdfWriter()
-
-            # Copy pages and apply compression
-            for page_num in range(len(reader.pages)):
-                page = reader.pages[page_num]
-
-                # Apply compression settings
-                if settings['compress_streams']:
-                    page.compress_content_streams()
-
-                if settings['compress_images']:
-                    # PyPDF2 has limited image compression capabilities
-                    # For more advanced image compression, consider using pikepdf
-                    pass
-
-                writer.add_page(page)
+        key = cached = None
+        if cache is not None:
+            key = cache_key(file_digest(input_path), {'level': compression_level, 'settings': settings,
+                                                      'target_size': target_size,
+                                                      'linearize': linearize})
+            cached = cache.get(key)
 
-            # Apply writer-level compression
-            if settings['compress_streams']:
-                writer.compress_identical_objects()
-                writer.remove_duplication()
-
-            output_path = Path(output_file)
+        image_stats = (0, 0, 0)
+        cleanup = None
+        projected = search = first_page_end = None
+        kept_original = False
+        original_size = input_path.stat().st_size
+        if cached is not None:
             output_path.parent.mkdir(parents=True, exist_ok=True)
-
-            with open(output_path, 'wb') as output_pdf:
-                writer.write(output_pdf)
+            shutil.copyfile(cached, output_path)
+        else:
+            image_cache = cache.namespaced('images') if cache is not None else None
+            if target_size is not None:
+                image_stats, cleanup, search = _compress_to_target(
+                    input_path, output_path, settings, target_size, jobs, image_cache, max_cpu_time
+                )
+            else:
+                image_stats, cleanup, projected = _compress_to(input_path, output_path, settings, jobs,
+                                                               image_cache)
+            if (settings['adaptive']
+                    and output_path.stat().st_size > original_size * (1 - settings['min_saving'])):
+                shutil.copyfile(input_path, output_path)
+                kept_original = True
+            if linearize:
+                first_page_end = linearize_pdf(output_path, output_path)
+            # A search cut short by the CPU limit may have settled for less
+            if cache is not None and not (search and search['out_of_time']):
+                cache.put(key, output_path)
 
         # Get file sizes for comparison
-        original_size = input_path.stat().st_size
         compressed_size = output_path.stat().st_size
         compression_ratio = (1 - compressed_size / original_size) * 100
 
@@ -86,12 +213,282 @@ def compress_pdf(input_file, output_file, compression_level='medium'):
         print(f"  Compressed size: {compressed_size:,} bytes")
         print(f"  Compression ratio: {compression_ratio:.1f}%")
         print(f"  Level: {compression_level} - {settings['description']}")
+        if projected is not None:
+            print(f"  Projected image saving from a sample: {projected * 100:.1f}%"
+                  + ("" if projected >= settings['min_saving'] else ", images left as they are"))
+        if search is not None:
+            quality, max_dpi = search['step']
+            resolution = f", max {max_dpi} DPI" if max_dpi else ""
+            print(f"  Target size: {target_size:,} bytes "
+                  f"{'reached' if compressed_size <= target_size else 'not reached'} "
+                  f"with image quality {quality}{resolution} after {search['iterations']} iteration(s)")
+            if search['out_of_time']:
+                print(f"  CPU time limit of {max_cpu_time:g}s reached, search stopped early")
+        if image_stats[0]:
+            print(image_summary(image_stats))
+        if cleanup and not kept_original:
+            print(cleanup_summary(cleanup))
+        if first_page_end is not None:
+            print(f"  Linearized for fast web view: first page in {first_page_end:,} bytes")
+        if kept_original:
+            print(f"  Saving below {settings['min_saving'] * 100:g}%, original file kept")
+        if cached is not None:
+            print("  Result served from cache")
 
     except Exception as e:
         print(f"Error compressing PDF: {e}")
         raise
 
 
+def _compress_to(input_path, output_path, settings, jobs, image_cache=None, known=None):
+    """Compress ``input_path`` into ``output_path``.
+
+    ``known`` image results (see ``sample_saving``) are reused.
+
+    Returns:
+        Tuple of (image statistics, cleanup statistics, projected image
+        saving in adaptive mode or None)
+    """
+    with open(input_path, 'rb') as input_pdf:
+        reader = PyPDF2.PdfReader(input_pdf)
+        cleanup = clean_document(reader, settings['strip'])
+
+        projected = None
+        if settings['adaptive'] and settings['compress_images']:
+            projected, known = sample_saving(reader.pages, settings, jobs, image_cache)
+
+        if projected is not None and projected < settings['min_saving']:
+            image_stats = (0, 0, 0)
+        else:
+            image_stats = compress_images(reader.pages, settings, jobs, image_cache, known)
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(output_path, 'wb') as output_pdf:
+            # Identical streams within the document are stored once, and
+            # only streams without real compression are re-encoded
+            writer = MergeWriter(output_pdf, dedupe=settings['compress_streams'],
+                                 recompress=settings['compress_streams'],
+                                 object_streams=settings['object_streams'])
+            writer.append(reader)
+            writer.close()
+
+    return image_stats, cleanup, projected
+
+
+def _cpu_time():
+    """Return the CPU seconds used by this process and its finished workers."""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def _compress_to_target(input_path, output_path, settings, target_size, jobs, image_cache=None,
+                        max_cpu_time=None):
+    """Compress ``input_path`` at the highest TARGET_SIZE_STEPS step that fits.
+
+    The output size of a step is projected from a sample of recompressed
+    images: the bytes outside images, plus the image bytes scaled by the
+    sample's saving. The steps are binary searched on that projection, and
+    the chosen one is written in full. When the real output is still too
+    large, the projection is corrected by the difference and the search
+    goes on among the smaller steps. Each projection and each full pass is
+    one iteration.
+
+    Returns:
+        Tuple of (image statistics, cleanup statistics, dict with the
+        'step' written, the number of 'iterations' and whether the search
+        ran 'out_of_time')
+    """
+    started = _cpu_time()
+    iterations = 0
+    out_of_time = False
+    last = len(TARGET_SIZE_STEPS) - 1
+
+    def step_settings(step):
+        quality, max_dpi = TARGET_SIZE_STEPS[step]
+        return dict(settings, quality=quality, max_dpi=max_dpi, compress_images=True, adaptive=False)
+
+    with open(input_path, 'rb') as input_pdf:
+        pages = PyPDF2.PdfReader(input_pdf).pages
+        images = image_bytes(pages)
+        # Everything but the images; corrected after every full pass
+        other = input_path.stat().st_size - images
+        known = {}
+        projected_images = {}
+
+        def projected_size(step):
+            if step not in projected_images:
+                saving, results = sample_saving(pages, step_settings(step), jobs, image_cache)
+                known.update(results)
+                projected_images[step] = images * (1 - (saving or 0.0))
+            return other + projected_images[step]
+
+        low = 0 if images else last
+        while True:
+            # Smallest step index (highest quality) projected to fit, or the last one
+            high = last
+            while low < high:
+                if max_cpu_time is not None and _cpu_time() - started > max_cpu_time:
+                    out_of_time = True
+                    low = high
+                    break
+                middle = (low + high) // 2
+                iterations += 1
+                if projected_size(middle) <= target_size:
+                    high = middle
+                else:
+                    low = middle + 1
+            step = low
+
+            iterations += 1
+            image_stats, cleanup, _ = _compress_to(input_path, output_path, step_settings(step), jobs,
+                                                   image_cache, known)
+            size = output_path.stat().st_size
+            if size <= target_size or step == last or out_of_time:
+                break
+            if max_cpu_time is not None and _cpu_time() - started > max_cpu_time:
+                out_of_time = True
+                break
+            other += size - projected_size(step)
+            low = step + 1
+
+    return image_stats, cleanup, {'step': TARGET_SIZE_STEPS[step], 'iterations': iterations,
+                                  'out_of_time': out_of_time}
+
+
+def _compress_file(args):
+    """Compress one file of a directory run (used with executor.map).
+
+    The output is written to a temporary file next to it and renamed into
+    place, so an interrupted run never leaves a partial output that looks
+    up to date. Everything ``compress_pdf`` prints is discarded.
+
+    Returns:
+        The error message, or None on success
+    """
+    input_file, output_file, compression_level, cache, options = args
+    output_path = Path(output_file)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{output_path.name}.", suffix='.tmp',
+                                     dir=output_path.parent)
+    os.close(fd)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            compress_pdf(input_file, temp_path, compression_level, jobs=1, cache=cache, **options)
+        os.replace(temp_path, output_path)
+    except Exception as e:
+        return str(e)
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+    return None
+
+
+def compress_directory(input_dir, output_dir, compression_level='medium', jobs=None, force=False,
+                       cache=None, **options):
+    """Compress every PDF under ``input_dir`` into the same tree under ``output_dir``.
+
+    Files are compressed in parallel worker processes, one file per task,
+    with ``compress_pdf``. An output that is newer than its input is up to
+    date and skipped, unless ``force`` is set.
+
+    Args:
+        input_dir: Directory to scan recursively for PDFs
+        output_dir: Directory receiving the compressed tree
+        compression_level: Compression level ('basic', 'medium', 'aggressive')
+        jobs: Number of files compressed in parallel (default: CPU count)
+        force: Compress files even if their output is up to date (default: False)
+        cache: Optional CompressionCache shared by the workers
+        **options: Other ``compress_pdf`` keyword arguments (e.g. adaptive,
+                   target_size)
+
+    Returns:
+        Dict with the number of files 'compressed', 'skipped' and 'failed',
+        and the total 'bytes_in' and 'bytes_out' of the compressed files
+    """
+    get_compression_settings(compression_level)
+    input_path = Path(input_dir)
+    if not input_path.exists():
+        raise FileNotFoundError(f"Input directory not found: {input_dir}")
+    if not input_path.is_dir():
+        raise ValueError(f"Path is not a directory: {input_dir}")
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+
+    output_path = Path(output_dir)
+    # Every file would be its own, always up to date, output
+    if output_path.resolve() == input_path.resolve():
+        raise ValueError(f"Output directory must differ from the input directory: {output_dir}")
+    # An output tree inside the input tree must not be compressed again
+    output_root = os.path.abspath(output_path)
+    files = sorted(
+        (f for f in scan_pdfs(input_path, recursive=True)
+         if not os.path.abspath(f.path).startswith(output_root + os.sep)),
+        key=lambda f: f.relpath,
+    )
+
+    summary = {'compressed': 0, 'skipped': 0, 'failed': 0, 'bytes_in': 0, 'bytes_out': 0}
+    if not files:
+        print(f"No PDF files found in {input_dir}")
+        return summary
+
+    pending = []
+    for pdf_file in files:
+        target = output_path / pdf_file.relpath
+        try:
+            current = not force and target.stat().st_mtime_ns >= pdf_file.mtime_ns
+        except FileNotFoundError:
+            current = False
+        if current:
+            summary['skipped'] += 1
+        else:
+            pending.append((pdf_file, target))
+
+    print(f"Compressing {len(pending)} of {len(files)} PDF file(s) from {input_dir} into {output_dir}")
+    print(f"  Level: {compression_level}, jobs: {min(jobs, len(pending)) or 1}")
+
+    args = [(f.path, str(target), compression_level, cache, options) for f, target in pending]
+    started = time.monotonic()
+    executor = None
+    if jobs > 1 and len(args) > 1:
+        executor = ProcessPoolExecutor(max_workers=min(jobs, len(args)))
+        results = executor.map(_compress_file, args)
+    else:
+        results = map(_compress_file, args)
+
+    try:
+        for position, ((pdf_file, target), error) in enumerate(zip(pending, results), start=1):
+            label = f"  [{position:{len(str(len(pending)))}d}/{len(pending)}] {pdf_file.relpath}"
+            if error is not None:
+                summary['failed'] += 1
+                print(f"{label}: failed: {error}")
+                continue
+            size = target.stat().st_size
+            summary['compressed'] += 1
+            summary['bytes_in'] += pdf_file.size
+            summary['bytes_out'] += size
+            saved = (1 - size / pdf_file.size) * 100 if pdf_file.size else 0.0
+            print(f"{label}: {pdf_file.size:,} -> {size:,} bytes ({saved:.1f}%)")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    elapsed = time.monotonic() - started
+
+    print("-" * 60)
+    print(f"Files compressed: {summary['compressed']}")
+    print(f"  Up to date (skipped): {summary['skipped']}")
+    if summary['failed']:
+        print(f"  Failed: {summary['failed']}")
+    if summary['compressed']:
+        saved = (1 - summary['bytes_out'] / summary['bytes_in']) * 100 if summary['bytes_in'] else 0.0
+        print(f"  Total size: {summary['bytes_in']:,} -> {summary['bytes_out']:,} bytes ({saved:.1f}% saved)")
+        seconds = max(elapsed, 0.001)
+        print(f"  Time: {elapsed:.1f}s ({summary['compressed'] / seconds:.1f} files/s, "
+              f"{summary['bytes_in'] / seconds / 1024 / 1024:.1f} MB/s)")
+
+    return summary
+
+
 def get_compression_info():
     """Get information about available compression levels."""
     info = "Available compression levels:\n"
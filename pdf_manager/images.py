@@ -0,0 +1,452 @@
+"""Recompression of raster images embedded in PDF pages."""
+
+import hashlib
+import io
+import json
+import math
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+from PyPDF2 import filters
+from PyPDF2.errors import PdfReadError
+from PyPDF2.generic import ContentStream, NameObject, NumberObject
+
+from .cache import cache_key
+
+
+# Filters that can be undone before handing pixels (or JPEG data) to Pillow
+_DECODERS = {
+    '/FlateDecode': filters.FlateDecode.decode,
+    '/ASCII85Decode': filters.ASCII85Decode.decode,
+    '/ASCIIHexDecode': filters.ASCIIHexDecode.decode,
+    '/LZWDecode': filters.LZWDecode.decode,
+}
+
+# Image modes for the colour spaces we can re-encode without changing them
+_MODES = {1: 'L', 3: 'RGB'}
+
+# Images with at most this many distinct colours are treated as line art
+LINE_ART_MAX_COLORS = 256
+
+# Distinct images recompressed to estimate the saving in adaptive mode
+ADAPTIVE_SAMPLE_IMAGES = 8
+
+
+def iter_page_images(page):
+    """Yield the image XObjects drawn directly by a page.
+
+    Args:
+        page: PyPDF2 page object
+    """
+    resources = page.get('/Resources')
+    if resources is None:
+        return
+    xobjects = resources.get_object().get('/XObject')
+    if xobjects is None:
+        return
+
+    for name, reference in xobjects.get_object().items():
+        xobject = reference.get_object()
+        if xobject.get('/Subtype') == '/Image':
+            yield name, xobject
+
+
+def _multiply(m, n):
+    """Multiply two PDF transformation matrices given as [a b c d e f]."""
+    return [
+        m[0] * n[0] + m[1] * n[2],
+        m[0] * n[1] + m[1] * n[3],
+        m[2] * n[0] + m[3] * n[2],
+        m[2] * n[1] + m[3] * n[3],
+        m[4] * n[0] + m[5] * n[2] + n[4],
+        m[4] * n[1] + m[5] * n[3] + n[5],
+    ]
+
+
+def image_placements(page):
+    """Return the largest size, in points, each image is drawn at on a page.
+
+    The page's content stream is interpreted just enough to follow the
+    transformation matrix (q, Q and cm) up to each image's Do operator.
+    Images drawn from inside form XObjects are not reported, nor any image
+    of a page whose content stream cannot be parsed.
+
+    Returns:
+        Dict mapping image XObject names to (width, height) in points
+    """
+    contents = page.get_contents()
+    if contents is None:
+        return {}
+    try:
+        operations = ContentStream(contents, page.pdf).operations
+    except (PdfReadError, ValueError, KeyError):
+        # Where its images are drawn is unknown; they are left at full size
+        return {}
+
+    placements = {}
+    ctm = [1, 0, 0, 1, 0, 0]
+    stack = []
+    for operands, operator in operations:
+        if operator == b'q':
+            stack.append(ctm)
+        elif operator == b'Q':
+            ctm = stack.pop() if stack else [1, 0, 0, 1, 0, 0]
+        elif operator == b'cm' and len(operands) == 6:
+            ctm = _multiply([float(x) for x in operands], ctm)
+        elif operator == b'Do' and operands:
+            # The unit square is mapped onto the page by the current matrix
+            width = math.hypot(ctm[0], ctm[1])
+            height = math.hypot(ctm[2], ctm[3])
+            name = str(operands[0])
+            known = placements.get(name, (0, 0))
+            placements[name] = (max(width, known[0]), max(height, known[1]))
+    return placements
+
+
+def target_size(width, height, placement, max_dpi):
+    """Pixel size that brings an image down to ``max_dpi`` where it is drawn.
+
+    Returns None when the image is already at or below the limit. Scaling
+    keeps the aspect ratio and never takes either axis below ``max_dpi``.
+    """
+    display_width, display_height = placement
+    if not max_dpi or display_width <= 0 or display_height <= 0:
+        return None
+
+    dpi_x = width / (display_width / 72)
+    dpi_y = height / (display_height / 72)
+    scale = max(max_dpi / dpi_x, max_dpi / dpi_y)
+    if scale >= 1:
+        return None
+
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _color_components(image):
+    """Return the number of colour components, or None if unsupported."""
+    colorspace = image.get('/ColorSpace')
+    if colorspace is None:
+        return None
+    colorspace = colorspace.get_object()
+
+    if colorspace == '/DeviceGray':
+        return 1
+    if colorspace == '/DeviceRGB':
+        return 3
+    if isinstance(colorspace, list) and len(colorspace) == 2 and colorspace[0] == '/ICCBased':
+        components = colorspace[1].get_object().get('/N')
+        return components if components in _MODES else None
+    return None
+
+
+def _plain(value):
+    """Convert PyPDF2 objects into plain Python values for worker processes."""
+    value = value.get_object() if hasattr(value, 'get_object') else value
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float):
+        return float(value)
+    return str(value)
+
+
+def image_job(image):
+    """Describe an image stream as a picklable job, or None if unsupported.
+
+    Masks, colour-key masked images, custom decode arrays and colour spaces
+    other than gray/RGB are left alone, since re-encoding them could change
+    how the page renders.
+    """
+    if image.get('/ImageMask') or '/Mask' in image or '/Decode' in image:
+        return None
+    if image.get('/BitsPerComponent') != 8:
+        return None
+
+    components = _color_components(image)
+    if components is None:
+        return None
+
+    image_filters = image.get('/Filter', [])
+    if not isinstance(image_filters, list):
+        image_filters = [image_filters]
+    image_filters = [str(f) for f in image_filters]
+
+    parms = image.get('/DecodeParms', [])
+    if not isinstance(parms, list):
+        parms = [parms]
+    parms = [_plain(p) if p is not None else None for p in parms]
+    parms += [None] * (len(image_filters) - len(parms))
+
+    if any(f not in _DECODERS for f in image_filters[:-1]):
+        return None
+    if image_filters and image_filters[-1] not in _DECODERS and image_filters[-1] != '/DCTDecode':
+        return None
+
+    return {
+        'data': image._data,
+        'filters': image_filters,
+        'decode_parms': parms,
+        'width': int(image['/Width']),
+        'height': int(image['/Height']),
+        'components': components,
+    }
+
+
+def _decode(job):
+    """Decode a job's stream into a Pillow image."""
+    data = job['data']
+    for image_filter, parms in zip(job['filters'], job['decode_parms']):
+        if image_filter == '/DCTDecode':
+            return Image.open(io.BytesIO(data)), True
+        data = _DECODERS[image_filter](data, parms)
+        if isinstance(data, str):
+            data = data.encode('latin-1')
+
+    mode = _MODES[job['components']]
+    return Image.frombytes(mode, (job['width'], job['height']), data), False
+
+
+def recompress_image(job, quality, min_saving=0.0):
+    """Re-encode one image job at the given JPEG quality.
+
+    Scans and photos (anything already JPEG, or with many colours) become
+    JPEG; line art with few colours is stored losslessly with Flate. When
+    the job carries a 'target_size', the image is resampled down to it first.
+
+    Args:
+        job: Image job from ``image_job``
+        quality: JPEG quality
+        min_saving: Fraction of its size an image must shrink by to be
+                    replaced (default: 0, i.e. any reduction)
+
+    Returns:
+        A dict with the new 'data', 'filter', 'width' and 'height', or None
+        when the image is unsupported or re-encoding does not save enough.
+    """
+    try:
+        image, is_jpeg = _decode(job)
+        if image.mode not in _MODES.values():
+            return None
+
+        line_art = not is_jpeg and image.getcolors(LINE_ART_MAX_COLORS) is not None
+
+        if job.get('target_size'):
+            image = image.resize(job['target_size'], Image.LANCZOS)
+
+        if line_art:
+            data = zlib.compress(image.tobytes(), 9)
+            image_filter = '/FlateDecode'
+        else:
+            buffer = io.BytesIO()
+            image.save(buffer, 'JPEG', quality=quality, optimize=True)
+            data = buffer.getvalue()
+            image_filter = '/DCTDecode'
+    except Exception:
+        # Undecodable images are kept exactly as they were
+        return None
+
+    if len(data) >= len(job['data']) * (1 - min_saving):
+        return None
+
+    return {'data': data, 'filter': image_filter, 'width': image.width, 'height': image.height}
+
+
+def image_cache_key(job, quality, min_saving=0.0):
+    """Cache key for an image job: raw stream bytes, image parameters and settings."""
+    digest = hashlib.sha256(job['data']).hexdigest()
+    return cache_key(digest, {
+        'filters': job['filters'],
+        'decode_parms': job['decode_parms'],
+        'width': job['width'],
+        'height': job['height'],
+        'components': job['components'],
+        'target_size': list(job['target_size']) if job.get('target_size') else None,
+        'quality': quality,
+        'min_saving': min_saving,
+    })
+
+
+def _pack_result(result):
+    """Serialise a recompression result (or None, meaning 'keep') for the cache."""
+    if result is None:
+        return b'{"keep": true}\n'
+    header = {k: v for k, v in result.items() if k != 'data'}
+    return json.dumps(header).encode('utf-8') + b'\n' + result['data']
+
+
+def _unpack_result(blob):
+    """Inverse of ``_pack_result``."""
+    header, _, data = blob.partition(b'\n')
+    result = json.loads(header)
+    if result.get('keep'):
+        return None
+    result['data'] = data
+    return result
+
+
+def _recompress_job(args):
+    """Unpack arguments for ``recompress_image`` (used with executor.map)."""
+    return recompress_image(*args)
+
+
+def apply_recompressed(image, result):
+    """Replace an image stream's data with a recompressed result in place."""
+    image._data = result['data']
+    image.decoded_self = None
+    image[NameObject('/Filter')] = NameObject(result['filter'])
+    image[NameObject('/BitsPerComponent')] = NumberObject(8)
+    image[NameObject('/Width')] = NumberObject(result['width'])
+    image[NameObject('/Height')] = NumberObject(result['height'])
+    if '/DecodeParms' in image:
+        del image['/DecodeParms']
+
+
+def _image_work(pages, settings):
+    """Collect the distinct supported images of ``pages`` as (image, job) pairs."""
+    max_dpi = settings.get('max_dpi')
+    images = {}
+    sizes = {}
+    for page in pages:
+        page_images = list(iter_page_images(page))
+        placements = image_placements(page) if max_dpi and page_images else {}
+        for name, image in page_images:
+            images.setdefault(id(image), image)
+            if name not in placements:
+                # Drawn somewhere we cannot measure; never downsample it
+                sizes[id(image)] = None
+            elif sizes.get(id(image), (0, 0)) is not None:
+                known = sizes.get(id(image), (0, 0))
+                sizes[id(image)] = (max(known[0], placements[name][0]),
+                                    max(known[1], placements[name][1]))
+
+    work = []
+    for key, image in images.items():
+        job = image_job(image)
+        if job is None:
+            continue
+        if sizes.get(key):
+            job['target_size'] = target_size(job['width'], job['height'], sizes[key], max_dpi)
+        work.append((image, job))
+    return work
+
+
+def _recompress_all(work, settings, jobs, cache, known=None):
+    """Recompress every distinct job in ``work``.
+
+    Results already in ``known`` or the cache are reused; new results are
+    stored in the cache.
+
+    Returns:
+        Tuple of (cache key of each job in ``work``, dict of results by key)
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+
+    quality = settings['quality']
+    min_saving = settings.get('min_image_saving', 0.0)
+    results = dict(known or {})
+    pending = {}
+    keys = []
+    for _, job in work:
+        key = image_cache_key(job, quality, min_saving)
+        keys.append(key)
+        if key in results or key in pending:
+            continue
+        blob = cache.get_bytes(key) if cache is not None else None
+        if blob is not None:
+            results[key] = _unpack_result(blob)
+        else:
+            pending[key] = (job, quality, min_saving)
+
+    args = list(pending.values())
+    if jobs > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(args))) as executor:
+            computed = list(executor.map(_recompress_job, args))
+    else:
+        computed = [_recompress_job(a) for a in args]
+
+    for key, result in zip(pending, computed):
+        results[key] = result
+        if cache is not None:
+            cache.put_bytes(key, _pack_result(result))
+
+    return keys, results
+
+
+def image_bytes(pages):
+    """Return the total encoded size of the distinct supported images of ``pages``."""
+    return sum(len(job['data']) for _, job in _image_work(pages, {}))
+
+
+def sample_saving(pages, settings, jobs=None, cache=None, sample_size=ADAPTIVE_SAMPLE_IMAGES):
+    """Estimate what recompressing the images of ``pages`` would save.
+
+    Up to ``sample_size`` distinct images, spread evenly over the document,
+    are recompressed. Pass the returned results to ``recompress_images`` as
+    ``known`` so that they are not computed twice.
+
+    Returns:
+        Tuple of (projected saving as a fraction of the image bytes, or None
+        when there are no supported images; dict of sample results)
+    """
+    work = _image_work(pages, settings)
+    if not work:
+        return None, {}
+
+    step = max(1, len(work) / sample_size)
+    sample = [work[int(i * step)] for i in range(min(sample_size, len(work)))]
+    keys, results = _recompress_all(sample, settings, jobs, cache)
+
+    before = sum(len(job['data']) for _, job in sample)
+    after = sum(len(results[key]['data']) if results[key] else len(job['data'])
+                for (_, job), key in zip(sample, keys))
+    return (before - after) / before if before else 0.0, results
+
+
+def recompress_images(pages, settings, jobs=None, cache=None, known=None):
+    """Recompress the images of a set of pages across a process pool.
+
+    Each image is decoded and re-encoded once, even when several pages share
+    it. Images that do not shrink by at least the settings' 'min_image_saving'
+    keep their original encoding. When the settings have a 'max_dpi', images
+    drawn above that resolution are resampled down; the largest placement of
+    a shared image decides.
+
+    Identical image streams (same bytes and parameters) are only processed
+    once per call. With a ``cache``, results, including the decision to keep
+    an image unchanged, are looked up by the hash of the raw stream bytes
+    and the settings, so images repeated across documents skip decoding and
+    encoding entirely.
+
+    Args:
+        pages: Iterable of PyPDF2 page objects to process
+        settings: One of the COMPRESSION_LEVELS entries
+        jobs: Number of worker processes (default: CPU count)
+        cache: Optional CompressionCache for individual image results
+        known: Optional results already computed, e.g. by ``sample_saving``
+
+    Returns:
+        Tuple of (images recompressed, bytes before, bytes after)
+    """
+    work = _image_work(pages, settings)
+    if not work:
+        return 0, 0, 0
+
+    keys, results = _recompress_all(work, settings, jobs, cache, known)
+
+    count = before = after = 0
+    for (image, job), key in zip(work, keys):
+        result = results[key]
+        if result is None:
+            continue
+        count += 1
+        before += len(job['data'])
+        after += len(result['data'])
+        apply_recompressed(image, result)
+
+    return count, before, after
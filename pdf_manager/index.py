@@ -0,0 +1,159 @@
+"""Persistent index of PDF metadata (page count, size, hash)."""
+
+import os
+import sqlite3
+from collections import namedtuple
+from pathlib import Path
+
+import PyPDF2
+
+from .cache import default_cache_dir
+from .manifest import file_digest
+from .scan import PdfFile, scan_pdfs
+
+
+INDEX_FILENAME = "index.sqlite3"
+INDEX_VERSION = 1
+
+# What the index knows about one file. ``pages`` is None and ``valid`` is
+# False when the file could not be parsed as a PDF.
+IndexEntry = namedtuple('IndexEntry', ['path', 'size', 'mtime_ns', 'sha256', 'pages', 'valid'])
+
+
+def default_index_path():
+    """Return the index location, inside the cache directory."""
+    return default_cache_dir() / INDEX_FILENAME
+
+
+def describe_pdf(path):
+    """Hash and parse a file; return (sha256, pages, valid)."""
+    digest = file_digest(path)
+    try:
+        pages = len(PyPDF2.PdfReader(path).pages)
+    except Exception:
+        return digest, None, False
+    return digest, pages, True
+
+
+class PdfIndex:
+    """SQLite table of PDF metadata keyed by absolute path.
+
+    An entry is trusted while the file's size and mtime match what was
+    recorded; otherwise the file is hashed and parsed again. Use it as a
+    context manager, or call ``close`` when done.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else default_index_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.refreshed = 0
+
+        # Several walk workers may share one index
+        self._db = sqlite3.connect(str(self.path), timeout=30)
+        version = self._db.execute('PRAGMA user_version').fetchone()[0]
+        if version != INDEX_VERSION:
+            self._db.execute('DROP TABLE IF EXISTS files')
+            self._db.execute(f'PRAGMA user_version = {INDEX_VERSION}')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            ' path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER,'
+            ' sha256 TEXT, pages INTEGER, valid INTEGER)'
+        )
+        self._db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._db.close()
+
+    def get(self, path):
+        """Return the recorded entry for ``path`` without checking the file."""
+        row = self._db.execute(
+            'SELECT path, size, mtime_ns, sha256, pages, valid FROM files WHERE path = ?',
+            (os.path.abspath(path),),
+        ).fetchone()
+        return _entry(row) if row else None
+
+    def entries(self, files):
+        """Return up-to-date entries for ``files``, in the same order.
+
+        Args:
+            files: Paths, or PdfFile records from a scan, whose size and
+                   mtime are used instead of a fresh stat
+        """
+        result = []
+        with self._db:
+            for item in files:
+                if isinstance(item, PdfFile):
+                    path, size, mtime_ns = os.path.abspath(item.path), item.size, item.mtime_ns
+                else:
+                    path = os.path.abspath(item)
+                    stat = os.stat(path)
+                    size, mtime_ns = stat.st_size, stat.st_mtime_ns
+
+                entry = self.get(path)
+                if entry is None or entry.size != size or entry.mtime_ns != mtime_ns:
+                    sha256, pages, valid = describe_pdf(path)
+                    entry = IndexEntry(path, size, mtime_ns, sha256, pages, valid)
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)',
+                        (path, size, mtime_ns, sha256, pages, int(valid)),
+                    )
+                    self.refreshed += 1
+                result.append(entry)
+        return result
+
+
+def _entry(row):
+    path, size, mtime_ns, sha256, pages, valid = row
+    return IndexEntry(path, size, mtime_ns, sha256, pages, bool(valid))
+
+
+def inspect_pdfs(inputs, recursive=False, index_path=None):
+    """Print page count, size and validity of PDFs, using the index.
+
+    Only files that changed since they were last indexed are parsed.
+
+    Args:
+        inputs: PDF files and/or directories to scan for PDFs
+        recursive: Scan directories recursively (default: False)
+        index_path: Optional index location (default: in the cache directory)
+
+    Returns:
+        List of IndexEntry objects, in the order listed
+    """
+    files = []
+    labels = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            records = sorted(scan_pdfs(path, recursive), key=lambda r: r.relpath)
+            files.extend(records)
+            labels.extend(str(path / r.relpath) for r in records)
+        elif path.exists():
+            files.append(path)
+            labels.append(str(path))
+        else:
+            raise FileNotFoundError(f"Input not found: {item}")
+
+    with PdfIndex(index_path) as index:
+        entries = index.entries(files)
+        refreshed = index.refreshed
+
+    for label, entry in zip(labels, entries):
+        pages = f"{entry.pages:5d} pages" if entry.valid else "  invalid  "
+        print(f"  {pages}  {entry.size:>14,} bytes  {label}")
+
+    invalid = sum(1 for e in entries if not e.valid)
+    print("-" * 60)
+    print(f"Files: {len(entries)} ({refreshed} indexed now, {len(entries) - refreshed} from index)")
+    print(f"  Pages: {sum(e.pages for e in entries if e.valid):,}")
+    print(f"  Size: {sum(e.size for e in entries):,} bytes")
+    if invalid:
+        print(f"  Invalid: {invalid}")
+
+    return entries
@@ -0,0 +1,484 @@
+"""Linearized ("fast web view") PDF output."""
+
+import io
+import os
+import tempfile
+import zlib
+
+import PyPDF2
+from PyPDF2.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    EncodedStreamObject,
+    IndirectObject,
+    NameObject,
+    NullObject,
+    NumberObject,
+    StreamObject,
+)
+
+from .writer import _page_reference
+
+
+# Catalog entries a viewer needs before it can show anything; they are
+# written at the front, right after the catalog
+_OPEN_DOCUMENT_KEYS = ('/ViewerPreferences', '/PageMode', '/Threads', '/OpenAction', '/AcroForm')
+
+# The linearization dictionary and the first-page trailer are written
+# before the offsets they hold are known, so their numbers get a fixed
+# width (leading zeros are valid in PDF integers)
+_LINEARIZATION_DICT = (b'%d 0 obj\n<< /Linearized 1 /L %010d /H [ %010d %010d ] /O %d /E %010d'
+                       b' /N %d /T %010d >>\nendobj\n')
+
+
+class _BitWriter:
+    """Pack unsigned integers into bytes, most significant bit first."""
+
+    def __init__(self):
+        self.data = bytearray()
+        self._bits = 0
+        self._count = 0
+
+    def write(self, value, bits):
+        self._bits = (self._bits << bits) | value
+        self._count += bits
+        while self._count >= 8:
+            self._count -= 8
+            self.data.append((self._bits >> self._count) & 0xFF)
+        self._bits &= (1 << self._count) - 1
+
+    def write_all(self, values, bits):
+        """Write ``values`` and pad to the next byte, as each hint table item is."""
+        for value in values:
+            self.write(value, bits)
+        if self._count:
+            self.write(0, 8 - self._count)
+
+
+def _is_page(obj):
+    return isinstance(obj, DictionaryObject) and obj.get('/Type') == '/Page'
+
+
+def _record_users(user, obj, users, objects):
+    """Record ``user`` for every object reachable from ``obj``.
+
+    Other pages are not followed (nor /Parent), so a page's objects are
+    those only it draws with; a page's /Thumb counts as its thumbnail's.
+    Stream /Length entries are skipped, since lengths are written direct.
+    """
+    visited = set()
+    pending = [(user, obj, True)]
+    while pending:
+        user, obj, top = pending.pop()
+        if isinstance(obj, IndirectObject):
+            target = obj.get_object()
+            if target is None or isinstance(target, NullObject) or (not top and _is_page(target)):
+                continue
+            key = (obj.idnum, obj.generation)
+            if key in visited:
+                continue
+            visited.add(key)
+            users.setdefault(key, set()).add(user)
+            objects.setdefault(user, []).append(key)
+            obj = target
+        elif not top and _is_page(obj):
+            continue
+
+        if isinstance(obj, DictionaryObject):
+            page = _is_page(obj)
+            children = []
+            for name, value in obj.items():
+                if (page and name == '/Parent') or (isinstance(obj, StreamObject) and name == '/Length'):
+                    continue
+                if page and name == '/Thumb' and user[0] == 'page':
+                    children.append((('thumb', user[1]), value, False))
+                else:
+                    children.append((user, value, False))
+            pending.extend(reversed(children))
+        elif isinstance(obj, ArrayObject):
+            pending.extend((user, value, False) for value in reversed(obj))
+
+
+def _classify(owners):
+    """Name the part of a linearized file an object with ``owners`` belongs in."""
+    if ('root',) in owners:
+        return 'root'
+    if ('key', '/Outlines') in owners:
+        return 'outlines'
+    if any(user[0] == 'key' and user[1] in _OPEN_DOCUMENT_KEYS for user in owners):
+        return 'open_document'
+
+    first_page = ('page', 0) in owners
+    other_pages = sum(1 for user in owners if user[0] == 'page' and user[1] > 0)
+    thumbs = sum(1 for user in owners if user[0] == 'thumb')
+    others = len(owners) - first_page - other_pages - thumbs
+    if first_page:
+        return 'first_page_private' if len(owners) == 1 else 'first_page_shared'
+    if other_pages == 1 and not others and not thumbs:
+        return 'other_page_private'
+    if other_pages > 1:
+        return 'other_page_shared'
+    if thumbs == 1 and not others:
+        return 'thumbnail_private'
+    if thumbs > 1:
+        return 'thumbnail_shared'
+    return 'other'
+
+
+def _take(keys, category, categories, part):
+    """Move the ``keys`` still in ``category`` to ``part``, in order."""
+    for key in keys:
+        if categories.get(key) == category:
+            del categories[key]
+            part.append(key)
+
+
+def _plan_parts(reader, page_refs):
+    """Sort the document's objects into the parts of a linearized file.
+
+    The parts follow the PDF specification (Annex F): the catalog and what
+    opening the document needs (part 4), the first page and everything it
+    uses (part 6), the other pages each with their private objects (part
+    7), objects shared by several of them (part 8) and the rest (part 9).
+
+    Returns:
+        Tuple of (parts 4, 6, 8 and 9 as lists of object keys, part 7 as
+        one list per page, object owners by key, objects by owner, outline
+        keys in the order written)
+    """
+    trailer = reader.trailer
+    root_ref = trailer.raw_get('/Root')
+    catalog = root_ref.get_object()
+
+    users = {}
+    objects = {}
+    for number, reference in enumerate(page_refs):
+        _record_users(('page', number), reference, users, objects)
+    if '/Info' in trailer:
+        _record_users(('trailer', '/Info'), trailer.raw_get('/Info'), users, objects)
+    for name, value in catalog.items():
+        _record_users(('key', name), value, users, objects)
+    root_key = (root_ref.idnum, root_ref.generation)
+    users.setdefault(root_key, set()).add(('root',))
+
+    categories = {key: _classify(owners) for key, owners in sorted(users.items())}
+
+    part4 = [root_key]
+    del categories[root_key]
+    _take(sorted(categories), 'open_document', categories, part4)
+
+    page_keys = [(ref.idnum, ref.generation) for ref in page_refs]
+    for number, key in enumerate(page_keys):
+        expected = 'first_page_private' if number == 0 else 'other_page_private'
+        if categories.get(key) != expected:
+            raise ValueError("Cannot linearize a PDF that uses a page object more than once")
+
+    part6 = []
+    first_page = objects[('page', 0)]
+    _take(first_page, 'first_page_private', categories, part6)
+    _take(first_page, 'first_page_shared', categories, part6)
+
+    # The outline root goes first, so the outline is one contiguous run
+    outlines = []
+    outlines_ref = catalog.raw_get('/Outlines') if '/Outlines' in catalog else None
+    if isinstance(outlines_ref, IndirectObject):
+        outline_keys = [(outlines_ref.idnum, outlines_ref.generation)] + sorted(categories)
+        _take(outline_keys, 'outlines', categories, outlines)
+    if catalog.get('/PageMode') == '/UseOutlines':
+        part6.extend(outlines)
+
+    part7 = []
+    for number in range(1, len(page_refs)):
+        part7.append([])
+        _take(objects[('page', number)], 'other_page_private', categories, part7[-1])
+
+    part8 = []
+    _take(sorted(categories), 'other_page_shared', categories, part8)
+
+    # The page tree first, then thumbnails in page order and the outline;
+    # whatever is left follows in object order
+    part9 = []
+    _take(objects.get(('key', '/Pages'), []), 'other', categories, part9)
+    for number in range(len(page_refs)):
+        _take(objects.get(('thumb', number), []), 'thumbnail_private', categories, part9)
+    _take(sorted(categories), 'thumbnail_shared', categories, part9)
+    if catalog.get('/PageMode') != '/UseOutlines':
+        part9.extend(outlines)
+    part9.extend(sorted(categories))
+
+    return part4, part6, part7, part8, part9, users, objects, outlines
+
+
+def _renumber(obj, numbers):
+    """Return a copy of ``obj`` with its references to the new object numbers.
+
+    References to objects that are not written become null.
+    """
+    if isinstance(obj, IndirectObject):
+        number = numbers.get((obj.idnum, obj.generation))
+        return NullObject() if number is None else IndirectObject(number, 0, None)
+
+    if isinstance(obj, StreamObject):
+        copied = EncodedStreamObject() if isinstance(obj, EncodedStreamObject) else DecodedStreamObject()
+        copied._data = obj._data
+        for name, value in obj.items():
+            if name != '/Length':
+                copied[NameObject(name)] = _renumber(value, numbers)
+        return copied
+
+    if isinstance(obj, DictionaryObject):
+        copied = DictionaryObject()
+        for name, value in obj.items():
+            copied[NameObject(name)] = _renumber(value, numbers)
+        return copied
+
+    if isinstance(obj, ArrayObject):
+        return ArrayObject(_renumber(value, numbers) for value in obj)
+
+    return obj
+
+
+def _object_bytes(number, obj):
+    buffer = io.BytesIO()
+    buffer.write(b'%d 0 obj\n' % number)
+    obj.write_to_stream(buffer, None)
+    buffer.write(b'\nendobj\n')
+    return buffer.getvalue()
+
+
+def _serialize(obj):
+    buffer = io.BytesIO()
+    obj.write_to_stream(buffer, None)
+    return buffer.getvalue()
+
+
+def _hint_tables(page_objects, page_shared, shared, outlines, lengths, offsets):
+    """Encode the page offset, shared object and outline hint tables.
+
+    Offsets are those the objects would have without the hint stream, as
+    the specification requires. Content streams are not placed apart from
+    their page, so the content offsets are 0 and the content lengths those
+    of the whole page (as Acrobat writes them).
+
+    Args:
+        page_objects: Object numbers of each page, in file order; the
+                      first page's are all of part 6
+        page_shared: Shared table indices each page uses
+        shared: Object numbers of the shared table: part 6, then part 8
+        outlines: Object numbers of the outline, in file order
+        lengths: Length of each object, by number
+        offsets: Offset of each object without the hint stream, by number
+
+    Returns:
+        Tuple of (hint stream data, shared table offset, outline table
+        offset or None)
+    """
+    bits = _BitWriter()
+    counts = [len(numbers) for numbers in page_objects]
+    page_lengths = [sum(lengths[n] for n in numbers) for numbers in page_objects]
+    nshared = [len(indices) for indices in page_shared]
+    min_count, min_length = min(counts), min(page_lengths)
+    count_bits = (max(counts) - min_count).bit_length()
+    length_bits = (max(page_lengths) - min_length).bit_length()
+    nshared_bits = max(nshared).bit_length()
+    shared_bits = len(shared).bit_length()
+
+    for value, width in ((min_count, 32), (offsets[page_objects[0][0]], 32), (count_bits, 16),
+                         (min_length, 32), (length_bits, 16), (0, 32), (0, 16), (min_length, 32),
+                         (length_bits, 16), (nshared_bits, 16), (shared_bits, 16), (0, 16), (4, 16)):
+        bits.write(value, width)
+    deltas = [length - min_length for length in page_lengths]
+    bits.write_all([count - min_count for count in counts], count_bits)
+    bits.write_all(deltas, length_bits)
+    bits.write_all(nshared, nshared_bits)
+    bits.write_all([index for indices in page_shared for index in indices], shared_bits)
+    # Numerators and content offsets take no bits
+    bits.write_all(deltas, length_bits)
+
+    shared_offset = len(bits.data)
+    first_page_count = len(page_objects[0])
+    group_lengths = [lengths[n] for n in shared]
+    min_group = min(group_lengths)
+    group_bits = (max(group_lengths) - min_group).bit_length()
+    if len(shared) > first_page_count:
+        first_shared = shared[first_page_count]
+        first_shared_offset = offsets[first_shared]
+    else:
+        first_shared = first_shared_offset = 0
+    for value, width in ((first_shared, 32), (first_shared_offset, 32), (first_page_count, 32),
+                         (len(shared), 32), (0, 16), (min_group, 32), (group_bits, 16)):
+        bits.write(value, width)
+    bits.write_all([length - min_group for length in group_lengths], group_bits)
+    bits.write_all([0] * len(shared), 1)
+
+    outline_offset = None
+    if outlines:
+        outline_offset = len(bits.data)
+        for value in (outlines[0], offsets[outlines[0]], len(outlines),
+                      sum(lengths[n] for n in outlines)):
+            bits.write(value, 32)
+
+    return bytes(bits.data), shared_offset, outline_offset
+
+
+def linearize_pdf(input_file, output_file):
+    """Rewrite a PDF as a linearized ("fast web view") file.
+
+    The catalog, the first page and everything it needs come first,
+    followed by the other pages in order, each with the objects only it
+    uses, then the objects shared between pages and the rest. Hint tables
+    at the front tell a viewer where every page starts and which shared
+    objects it needs, so with HTTP range requests the first page shows
+    once the first part of the file has arrived, and any other page can
+    be fetched without the whole file.
+
+    Objects are renumbered, written without object streams and with
+    cross-reference tables, and objects no page or catalog entry reaches
+    are left out. The output is written next to ``output_file`` and
+    renamed into place, so ``output_file`` may be ``input_file``.
+
+    Args:
+        input_file: Input PDF file path
+        output_file: Output PDF file path
+
+    Returns:
+        Number of bytes a viewer needs to show the first page
+    """
+    reader = PyPDF2.PdfReader(input_file)
+    if reader.is_encrypted:
+        raise ValueError("Cannot linearize an encrypted PDF")
+    page_refs = [_page_reference(page) for page in reader.pages]
+    if not page_refs:
+        raise ValueError("Cannot linearize a PDF without pages")
+
+    part4, part6, pages, part8, part9, users, objects, outlines = _plan_parts(reader, page_refs)
+    part7 = [key for page in pages for key in page]
+
+    # Parts 7 to 9 are numbered from 1 in file order; the linearization
+    # dictionary, part 4, the hint stream and part 6 follow them, so the
+    # first page's cross-reference section lists consecutive numbers
+    numbers = {}
+    for key in part7 + part8 + part9:
+        numbers[key] = len(numbers) + 1
+    linearization_number = len(numbers) + 1
+    for key in part4:
+        numbers[key] = len(numbers) + 2
+    hint_number = len(numbers) + 2
+    for key in part6:
+        numbers[key] = len(numbers) + 3
+    size = len(numbers) + 3
+
+    def object_bytes(key):
+        obj = reader.get_object(IndirectObject(key[0], key[1], reader))
+        return _object_bytes(numbers[key], _renumber(obj, numbers))
+
+    # Lengths are measured now and the objects serialised again when
+    # written, so the serialised objects are never all held at once
+    lengths = {numbers[key]: len(object_bytes(key)) for key in numbers}
+
+    trailer = reader.trailer
+    root_number = numbers[part4[0]]
+    info_ref = trailer.raw_get('/Info') if '/Info' in trailer else None
+    info_number = None
+    if isinstance(info_ref, IndirectObject):
+        info_number = numbers.get((info_ref.idnum, info_ref.generation))
+    file_id = _serialize(trailer['/ID']) if '/ID' in trailer else None
+    version = (getattr(reader, 'pdf_header', '') or '%PDF-1.4')[5:8].encode('ascii')
+    header = b'%PDF-' + version + b'\n%\xe2\xe3\xcf\xd3\n'
+
+    def first_page_section(offsets, main_xref):
+        section = io.BytesIO()
+        section.write(b'xref\n%d %d\n' % (linearization_number, size - linearization_number))
+        for number in range(linearization_number, size):
+            section.write(b'%010d 00000 n \n' % offsets[number])
+        section.write(b'trailer\n<< /Size %d /Root %d 0 R' % (size, root_number))
+        if info_number is not None:
+            section.write(b' /Info %d 0 R' % info_number)
+        if file_id is not None:
+            section.write(b' /ID ' + file_id)
+        section.write(b' /Prev %010d >>\nstartxref\n0\n%%%%EOF\n' % main_xref)
+        return section.getvalue()
+
+    first_page_number = numbers[part6[0]]
+    linearization_length = len(_LINEARIZATION_DICT % (linearization_number, 0, 0, 0, first_page_number,
+                                                      0, len(page_refs), 0))
+    offsets = {number: 0 for number in range(linearization_number, size)}
+    position = len(header) + linearization_length + len(first_page_section(offsets, 0))
+
+    # Offsets as if there were no hint stream, which the hint tables use
+    order = ([numbers[key] for key in part4] + [hint_number]
+             + [numbers[key] for key in part6 + part7 + part8 + part9])
+    offsets[linearization_number] = len(header)
+    lengths[hint_number] = 0
+    for number in order:
+        offsets[number] = position
+        position += lengths[number]
+    main_xref = position
+
+    shared = [numbers[key] for key in part6 + part8]
+    shared_index = {number: index for index, number in enumerate(shared)}
+    page_objects = [[numbers[key] for key in part6]] + [[numbers[key] for key in page] for page in pages]
+    page_shared = [[]] + [
+        [shared_index[numbers[key]] for key in sorted(objects[('page', number)])
+         if len(users[key]) > 1 and numbers.get(key) in shared_index]
+        for number in range(1, len(page_refs))
+    ]
+    hints, shared_offset, outline_offset = _hint_tables(
+        page_objects, page_shared, shared, [numbers[key] for key in outlines], lengths, offsets
+    )
+
+    hint_stream = DecodedStreamObject()
+    hint_stream[NameObject('/Filter')] = NameObject('/FlateDecode')
+    hint_stream[NameObject('/S')] = NumberObject(shared_offset)
+    if outline_offset is not None:
+        hint_stream[NameObject('/O')] = NumberObject(outline_offset)
+    hint_stream._data = zlib.compress(hints)
+    hint_bytes = _object_bytes(hint_number, hint_stream)
+    hint_offset = offsets[hint_number]
+    lengths[hint_number] = len(hint_bytes)
+    for number in order[order.index(hint_number) + 1:]:
+        offsets[number] += len(hint_bytes)
+    main_xref += len(hint_bytes)
+
+    main_section = io.BytesIO()
+    main_section.write(b'xref\n0 %d' % linearization_number)
+    space_before_zero = main_xref + main_section.tell()
+    main_section.write(b'\n0000000000 65535 f \n')
+    for number in range(1, linearization_number):
+        main_section.write(b'%010d 00000 n \n' % offsets[number])
+    main_section.write(b'trailer\n<< /Size %d' % linearization_number)
+    if file_id is not None:
+        main_section.write(b' /ID ' + file_id)
+    first_xref = len(header) + linearization_length
+    main_section.write(b' >>\nstartxref\n%d\n%%%%EOF\n' % first_xref)
+    main_section = main_section.getvalue()
+
+    last_first_page = numbers[part6[-1]]
+    first_page_end = offsets[last_first_page] + lengths[last_first_page]
+    linearization_dict = _LINEARIZATION_DICT % (
+        linearization_number, main_xref + len(main_section), hint_offset, len(hint_bytes),
+        first_page_number, first_page_end, len(page_refs), space_before_zero,
+    )
+
+    output_path = os.path.abspath(output_file)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(output_path)}.", suffix='.tmp',
+                                     dir=os.path.dirname(output_path))
+    try:
+        with os.fdopen(fd, 'wb') as output:
+            output.write(header)
+            output.write(linearization_dict)
+            output.write(first_page_section(offsets, main_xref))
+            key_by_number = {number: key for key, number in numbers.items()}
+            for number in order:
+                output.write(hint_bytes if number == hint_number else object_bytes(key_by_number[number]))
+            output.write(main_section)
+            output.flush()
+            os.fsync(output.fileno())
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+    return first_page_end
@@ -0,0 +1,230 @@
+"""Build manifest used by walk to skip volumes whose inputs have not changed."""
+
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+from .scan import PdfFile
+
+
+MANIFEST_FILENAME = ".pdf-manager-manifest.json"
+MANIFEST_VERSION = 1
+JOURNAL_FILENAME = ".pdf-manager-journal.jsonl"
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint_file(path, previous=None, size=None, mtime_ns=None, digest=None):
+    """Describe an input file by path, size, mtime and content hash.
+
+    The file is only hashed again when its size or mtime differ from the
+    ``previous`` fingerprint of the same path, which keeps reruns cheap.
+
+    Args:
+        path: Input file path
+        previous: Optional fingerprint recorded by an earlier run
+        size: File size, if already known from a scan
+        mtime_ns: Modification time in nanoseconds, if already known
+        digest: Content hash already known for this size and mtime
+                (e.g. from the metadata index)
+    """
+    if size is None or mtime_ns is None:
+        stat = os.stat(path)
+        size, mtime_ns = stat.st_size, stat.st_mtime_ns
+    fingerprint = {
+        'path': str(path),
+        'size': size,
+        'mtime_ns': mtime_ns,
+    }
+
+    if (previous
+            and previous.get('path') == fingerprint['path']
+            and previous.get('size') == fingerprint['size']
+            and previous.get('mtime_ns') == fingerprint['mtime_ns']
+            and previous.get('sha256')):
+        fingerprint['sha256'] = previous['sha256']
+    elif digest:
+        fingerprint['sha256'] = digest
+    else:
+        fingerprint['sha256'] = file_digest(path)
+
+    return fingerprint
+
+
+def load_manifest(output_dir):
+    """Load the manifest stored in ``output_dir``.
+
+    A missing, unreadable or outdated manifest is treated as empty, which
+    simply makes every volume stale.
+    """
+    manifest_path = Path(output_dir) / MANIFEST_FILENAME
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'version': MANIFEST_VERSION, 'volumes': {}}
+
+    if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+        return {'version': MANIFEST_VERSION, 'volumes': {}}
+
+    manifest.setdefault('volumes', {})
+    return manifest
+
+
+def save_manifest(output_dir, manifest):
+    """Atomically write the manifest into ``output_dir``."""
+    manifest_path = Path(output_dir) / MANIFEST_FILENAME
+    # Unique, since several walk workers may save at the same time
+    temp_path = manifest_path.with_name(f"{manifest_path.name}.{uuid.uuid4().hex}.tmp")
+
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    os.replace(temp_path, manifest_path)
+
+
+def _append_journal(output_dir, record):
+    """Append one JSON line to the journal and force it to disk."""
+    with open(Path(output_dir) / JOURNAL_FILENAME, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, sort_keys=True) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def start_journal(output_dir, plan, volumes=None):
+    """Record that a run of ``plan`` started in ``output_dir``.
+
+    The journal is append-only: entries of an earlier interrupted run stay
+    valid until a run finishes and saves the manifest.
+
+    Args:
+        output_dir: Output directory
+        plan: Plan dict being built (see ``plan.make_plan``)
+        volumes: Optional list of the volume numbers being built
+    """
+    _append_journal(output_dir, {'plan': plan, 'volumes': volumes})
+
+
+def record_volume(output_dir, name, entry):
+    """Journal a finished volume with its manifest entry."""
+    _append_journal(output_dir, {'volume': name, 'entry': entry})
+
+
+def load_journal(output_dir):
+    """Read the journal left behind by an interrupted run.
+
+    A line cut short by the crash is ignored.
+
+    Returns:
+        Tuple of (last started run as {'plan', 'volumes'} or None,
+        dict of manifest entries of finished volumes by name)
+    """
+    run = None
+    entries = {}
+    try:
+        with open(Path(output_dir) / JOURNAL_FILENAME, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if 'plan' in record:
+                    run = record
+                elif 'volume' in record:
+                    entries[record['volume']] = record['entry']
+    except OSError:
+        pass
+    return run, entries
+
+
+def remove_journal(output_dir):
+    """Delete the journal once the manifest holds everything it recorded."""
+    try:
+        os.unlink(Path(output_dir) / JOURNAL_FILENAME)
+    except FileNotFoundError:
+        pass
+
+
+def fingerprint_inputs(input_files, previous_entry=None, digests=None):
+    """Fingerprint an ordered list of input files, reusing known hashes.
+
+    Args:
+        input_files: Input paths, or PdfFile records from a scan, whose
+                     size and mtime are used instead of a fresh stat
+        previous_entry: Optional manifest entry recorded by an earlier run
+        digests: Optional dict of content hashes by path, valid for the
+                 files' current size and mtime
+    """
+    digests = digests or {}
+    previous_inputs = {}
+    if previous_entry:
+        previous_inputs = {item.get('path'): item for item in previous_entry.get('inputs', [])}
+
+    fingerprints = []
+    for item in input_files:
+        if isinstance(item, PdfFile):
+            fingerprints.append(fingerprint_file(item.path, previous_inputs.get(item.path),
+                                                 item.size, item.mtime_ns, digests.get(item.path)))
+        else:
+            fingerprints.append(fingerprint_file(item, previous_inputs.get(str(item)),
+                                                 digest=digests.get(str(item))))
+    return fingerprints
+
+
+def is_volume_current(entry, volume_path, inputs, options):
+    """Check whether a built volume still matches its inputs and options.
+
+    Args:
+        entry: Manifest entry recorded for the volume (or None)
+        volume_path: Path to the volume file
+        inputs: Current input fingerprints, in merge order
+        options: Options the volume would be built with
+    """
+    if not entry:
+        return False
+
+    volume_path = Path(volume_path)
+    if not volume_path.exists():
+        return False
+
+    if entry.get('options') != options or entry.get('inputs') != inputs:
+        return False
+
+    return entry.get('output_size') == volume_path.stat().st_size
+
+
+def appended_inputs(entry, volume_path, inputs, options):
+    """Return how many leading ``inputs`` a built volume already holds.
+
+    A volume can be extended in place when it was built with the same
+    options from a strict prefix of the current inputs and has not been
+    modified since. Returns 0 when it cannot.
+    """
+    if not entry or entry.get('options') != options:
+        return 0
+
+    built = entry.get('inputs') or []
+    if not built or len(built) >= len(inputs) or inputs[:len(built)] != built:
+        return 0
+
+    volume_path = Path(volume_path)
+    if not volume_path.exists() or volume_path.stat().st_size != entry.get('output_size'):
+        return 0
+    return len(built)
+
+
+def volume_entry(volume_path, inputs, options):
+    """Build the manifest entry for a freshly built volume."""
+    return {
+        'inputs': inputs,
+        'options': options,
+        'output_size': Path(volume_path).stat().st_size,
+    }
@@ -1,48 +1,312 @@
 """PDF merging functionality."""
 
+import gc
+import os
+import shutil
+import tempfile
 import PyPDF2
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from .compress import compress_pdf
+from .cleanup import clean_document, cleanup_summary, strip_rules
+from .compress import (
+    compress_images,
+    get_compression_settings,
+    image_summary,
+)
+from .linearize import linearize_pdf
+from .writer import MergeWriter
 
 
-def merge_pdfs(input_files, output_file, compression_level=None):
+# Inputs parsed and held in memory at once by default
+DEFAULT_MAX_OPEN_FILES = 8
+
+
+def _write_inputs(writer, paths, settings, jobs, max_open_files):
+    """Append ``paths`` to ``writer`` in groups; return image and cleanup statistics."""
+    image_stats = (0, 0, 0)
+    cleanup = Counter()
+
+    for start in range(0, len(paths), max_open_files):
+        readers = [PyPDF2.PdfReader(path) for path in paths[start:start + max_open_files]]
+
+        if settings:
+            for reader in readers:
+                cleanup += clean_document(reader, settings['strip'])
+            # One pass over the group's images keeps the whole pool busy
+            group_stats = compress_images(
+                [page for reader in readers for page in reader.pages], settings, jobs
+            )
+            image_stats = tuple(a + b for a, b in zip(image_stats, group_stats))
+
+        for reader in readers:
+            writer.append(reader)
+
+        # Parsed documents are full of reference cycles; collect
+        # them now instead of whenever the collector next runs
+        del readers
+        gc.collect()
+
+    return image_stats, cleanup
+
+
+def _append_to(paths, output_path, settings=None, jobs=None, max_open_files=DEFAULT_MAX_OPEN_FILES,
+               object_streams=False):
+    """Add ``paths`` to the existing PDF ``output_path`` as an incremental update.
+
+    Only the new content is written. If anything fails, the file is cut
+    back to its previous length, which restores the original document.
+    Object streams are only used if the output has a cross-reference stream.
+
+    Returns:
+        Tuple of (streams deduplicated, bytes deduplicated, image statistics,
+        cleanup statistics)
+    """
+    with open(output_path, 'r+b') as output, open(output_path, 'rb') as source:
+        original_size = output.seek(0, 2)
+        try:
+            writer = MergeWriter(output, base=PyPDF2.PdfReader(source),
+                                 recompress=bool(settings and settings['compress_streams']),
+                                 object_streams=object_streams)
+            image_stats, cleanup = _write_inputs(writer, paths, settings, jobs, max_open_files)
+            writer.close()
+            output.flush()
+            os.fsync(output.fileno())
+        except BaseException:
+            output.truncate(original_size)
+            raise
+
+    return writer.streams_deduplicated, writer.bytes_deduplicated, image_stats, cleanup
+
+
+def _merge_to(paths, output_path, settings=None, jobs=None, max_open_files=DEFAULT_MAX_OPEN_FILES,
+              append=False, object_streams=False):
+    """Merge ``paths`` into ``output_path`` and return merge statistics.
+
+    With ``append`` and an existing output, the pages are added to it
+    instead (see ``_append_to``). With ``object_streams``, the output uses
+    object streams and a cross-reference stream.
+
+    Returns:
+        Tuple of (streams deduplicated, bytes deduplicated, image statistics,
+        cleanup statistics)
+    """
+    output_path = Path(output_path)
+    if append and output_path.exists():
+        return _append_to(paths, output_path, settings, jobs, max_open_files, object_streams)
+
+    # Write next to the output and rename into place once complete, so a
+    # killed process never leaves a truncated PDF under the real name
+    fd, temp_path = tempfile.mkstemp(prefix=f".{output_path.name}.", suffix='.tmp',
+                                     dir=output_path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as output:
+            writer = MergeWriter(output, recompress=bool(settings and settings['compress_streams']),
+                                 object_streams=object_streams)
+            image_stats, cleanup = _write_inputs(writer, paths, settings, jobs, max_open_files)
+            writer.close()
+            output.flush()
+            os.fsync(output.fileno())
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+    return writer.streams_deduplicated, writer.bytes_deduplicated, image_stats, cleanup
+
+
+def _merge_chunk(args):
+    """Merge one chunk of a tree merge (used with executor.map)."""
+    paths, output_path, settings, max_open_files = args
+    # Chunks already run in parallel, so images are recompressed in-process
+    return _merge_to(paths, output_path, settings, 1, max_open_files)
+
+
+def _tree_merge(paths, output_path, settings, jobs, fan_in, max_open_files, append=False,
+                object_streams=False):
+    """Merge ``paths`` by combining chunks of ``fan_in`` files level by level.
+
+    Every level merges its chunks in parallel into intermediate files, which
+    become the inputs of the next level, until a single chunk is left; that
+    one is written to ``output_path`` (or appended to it). Compression only
+    happens on the first level, where the original pages are read, and only
+    the final output uses object streams.
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+
+    deduplicated = deduplicated_bytes = 0
+    image_stats = (0, 0, 0)
+    cleanup = Counter()
+    temp_dir = tempfile.mkdtemp(prefix='.merge-', dir=output_path.parent)
+
+    try:
+        level = 0
+        while len(paths) > fan_in:
+            chunks = [paths[start:start + fan_in] for start in range(0, len(paths), fan_in)]
+            outputs = [os.path.join(temp_dir, f"level{level}-{index:05d}.pdf")
+                       for index in range(len(chunks))]
+            args = [(chunk, chunk_output, settings if level == 0 else None, max_open_files)
+                    for chunk, chunk_output in zip(chunks, outputs)]
+
+            if jobs > 1:
+                with ProcessPoolExecutor(max_workers=min(jobs, len(args))) as executor:
+                    results = list(executor.map(_merge_chunk, args))
+            else:
+                results = [_merge_chunk(a) for a in args]
+
+            for chunk_deduplicated, chunk_bytes, chunk_images, chunk_cleanup in results:
+                deduplicated += chunk_deduplicated
+                deduplicated_bytes += chunk_bytes
+                image_stats = tuple(a + b for a, b in zip(image_stats, chunk_images))
+                cleanup += chunk_cleanup
+
+            # Intermediates of the level before are no longer needed
+            if level > 0:
+                for path in paths:
+                    os.unlink(path)
+
+            paths = outputs
+            level += 1
+
+        final_deduplicated, final_bytes, final_images, final_cleanup = _merge_to(
+            paths, output_path, settings if level == 0 else None, jobs, max_open_files, append,
+            object_streams
+        )
+        deduplicated += final_deduplicated
+        deduplicated_bytes += final_bytes
+        image_stats = tuple(a + b for a, b in zip(image_stats, final_images))
+        cleanup += final_cleanup
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return deduplicated, deduplicated_bytes, image_stats, cleanup
+
+
+def merge_pdfs(input_files, output_file, compression_level=None, jobs=None,
+               max_open_files=DEFAULT_MAX_OPEN_FILES, fan_in=None, index=None, append=False,
+               object_streams=None, linearize=False, strip=None):
     """Merge multiple PDF files into a single PDF.
 
+    When a compression level is given, its settings are applied to each page
+    while it is being merged, so the output is written exactly once. Stream
+    data is copied without being decoded; a compression level only re-encodes
+    streams stored uncompressed or with weak filters. Stream resources that
+    are identical across inputs (fonts, images, ICC profiles) are stored
+    only once. Objects of the inputs that no page refers to are dropped,
+    and with a compression level, so is the data named by its 'strip'
+    rules (see ``STRIP_RULES``).
+
+    Inputs are read in groups of at most ``max_open_files``. Each group's
+    pages are written to the output and released before the next group is
+    opened, so memory use stays flat however many files are merged.
+
+    With ``fan_in``, more inputs than that are merged as a tree: chunks of
+    ``fan_in`` files are merged in parallel worker processes into
+    intermediate documents, which are combined the same way until one
+    output remains. Page order and outlines are preserved.
+
+    With ``append``, an existing output keeps its pages and the inputs are
+    added after them as a PDF incremental update: only the new content and
+    a new cross-reference section are written at the end of the file, so
+    the cost does not depend on the size of the output.
+
+    With ``object_streams``, dictionaries are packed into compressed object
+    streams and a cross-reference stream is written; by default, this
+    follows the compression level's 'object_streams' setting.
+
+    With ``linearize``, the output is rewritten as a linearized ("fast web
+    view") PDF once merged (see ``linearize_pdf``), so that viewers
+    fetching it with range requests can show the first page early. Such
+    files use cross-reference tables, not object streams, and cannot be
+    appended to.
+
     Args:
         input_files: List of input PDF file paths
         output_file: Output PDF file path
         compression_level: Optional compression level ('basic', 'medium', 'aggressive')
+        jobs: Number of processes recompressing images, or merging chunks
+              in a tree merge (default: CPU count)
+        max_open_files: Maximum number of inputs held open at once (default: 8)
+        fan_in: Optional number of documents combined per tree merge step
+        index: Optional PdfIndex; inputs it knows to be unreadable are
+               rejected before anything is written
+        append: Add the pages to ``output_file`` if it exists (default: False)
+        object_streams: Optional override of the level's 'object_streams'
+        linearize: Write a linearized PDF (default: False)
+        strip: Optional override of the level's 'strip' rules
     """
-    merger = PyPDF2.PdfMerger()
+    settings = None
+    if compression_level:
+        settings = get_compression_settings(compression_level)
+    if strip is not None:
+        if settings is None:
+            raise ValueError("Strip rules need a compression level")
+        settings = dict(settings, strip=strip_rules(strip))
+    if linearize and (append or object_streams):
+        raise ValueError("Linearize cannot be combined with append or object streams")
+    if object_streams is None:
+        object_streams = bool(settings and settings['object_streams']) and not linearize
+    if max_open_files < 1:
+        raise ValueError("Max open files must be at least 1")
+    if fan_in is not None and fan_in < 2:
+        raise ValueError("Fan-in must be at least 2")
+
+    output_path = Path(output_file)
 
     try:
+        paths = []
         for file_path in input_files:
             path = Path(file_path)
             if not path.exists():
                 raise FileNotFoundError(f"Input file not found: {file_path}")
             if not path.suffix.lower() == '.pdf':
                 raise ValueError(f"File is not a PDF: {file_path}")
+            paths.append(path)
 
-            with open(path, 'rb') as pdf_file:
-                merger.append(pdf_file)
+        entries = index.entries(paths) if index is not None else []
+        for path, entry in zip(paths, entries):
+            if not entry.valid:
+                raise ValueError(f"File is not a valid PDF: {path}")
 
-        output_path = Path(output_file)
         output_path.parent.mkdir(parents=True, exist_ok=True)
+        appending = append and output_path.exists()
+
+        if fan_in and len(paths) > fan_in:
+            deduplicated, deduplicated_bytes, image_stats, cleanup = _tree_merge(
+                paths, output_path, settings, jobs, fan_in, max_open_files, append, object_streams
+            )
+        else:
+            deduplicated, deduplicated_bytes, image_stats, cleanup = _merge_to(
+                paths, output_path, settings, jobs, max_open_files, append, object_streams
+            )
 
-        with open(output_path, 'wb') as output:
-            merger.write(output)
+        first_page_end = None
+        if linearize:
+            first_page_end = linearize_pdf(output_path, output_path)
 
-        print(f"Successfully merged {len(input_files)} files into {output_file}")
+        if appending:
+            print(f"Successfully appended {len(input_files)} files to {output_file}")
+        else:
+            print(f"Successfully merged {len(input_files)} files into {output_file}")
+        if entries:
+            print(f"  Total pages: {sum(e.pages for e in entries):,}")
 
-        # Apply compression if requested
-        if compression_level:
-            temp_output = str(output_path) + '.tmp'
-            output_path.rename(temp_output)
-            compress_pdf(temp_output, output_file, compression_level)
-            Path(temp_output).unlink()
+        if first_page_end is not None:
+            print(f"  Linearized for fast web view: first page in {first_page_end:,} bytes")
+
+        if deduplicated:
+            print(f"  Shared resources stored once: {deduplicated} "
+                  f"({deduplicated_bytes:,} bytes saved)")
+
+        if settings:
+            print(f"  Compression level: {compression_level} - {settings['description']}")
+            if image_stats[0]:
+                print(image_summary(image_stats))
+            if cleanup:
+                print(cleanup_summary(cleanup))
 
     except Exception as e:
         print(f"Error merging PDFs: {e}")
         raise
-    finally:
-        merger.close()
\ No newline at end of file
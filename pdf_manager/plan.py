@@ -0,0 +1,213 @@
+"""Planning how walk splits its ordered input files into volumes."""
+
+import json
+import os
+from collections import namedtuple
+from pathlib import Path
+
+import PyPDF2
+
+
+PLAN_VERSION = 1
+
+# One planned volume: its number, file name, the 1-based position of its
+# first file in the whole run, and its input files in order.
+Volume = namedtuple('Volume', ['number', 'name', 'first', 'files'])
+
+
+def count_pages(files, index=None):
+    """Return the page count of each file, in order.
+
+    Uses the metadata index when given, so unchanged files are not parsed.
+    Unreadable files count as zero pages.
+
+    Args:
+        files: PdfFile records or paths
+        index: Optional PdfIndex
+    """
+    if index is not None:
+        return [entry.pages if entry.valid else 0 for entry in index.entries(files)]
+
+    counts = []
+    for item in files:
+        try:
+            counts.append(len(PyPDF2.PdfReader(getattr(item, 'path', item)).pages))
+        except Exception:
+            counts.append(0)
+    return counts
+
+
+def split_by_limits(files, limits):
+    """Cut ``files`` greedily, closing a volume before any limit would be exceeded.
+
+    Args:
+        files: Files in volume order
+        limits: List of (weights, limit) pairs, one weight per file. A file
+                that exceeds a limit on its own gets a volume of its own.
+    """
+    batches = []
+    current = []
+    totals = [0] * len(limits)
+    for position, item in enumerate(files):
+        over = any(totals[i] + weights[position] > limit for i, (weights, limit) in enumerate(limits))
+        if current and over:
+            batches.append(current)
+            current = []
+            totals = [0] * len(limits)
+        current.append(item)
+        for i, (weights, _) in enumerate(limits):
+            totals[i] += weights[position]
+    if current:
+        batches.append(current)
+    return batches
+
+
+def balance(files, weights, volumes):
+    """Split ``files`` into at most ``volumes`` contiguous groups of even weight.
+
+    The largest group weight is minimised (a binary search over the
+    possible maximum, with a greedy feasibility check), which is what
+    decides the wall time when volumes are built in parallel.
+    """
+    if not files:
+        return []
+    volumes = max(1, min(volumes, len(files)))
+
+    def groups_needed(maximum):
+        count, total = 1, 0
+        for weight in weights:
+            if total + weight > maximum:
+                count += 1
+                total = 0
+            total += weight
+        return count
+
+    low, high = max(weights), sum(weights)
+    while low < high:
+        middle = (low + high) // 2
+        if groups_needed(middle) <= volumes:
+            high = middle
+        else:
+            low = middle + 1
+
+    return split_by_limits(files, [(weights, low)])
+
+
+def plan_batches(files, batch_size=10, pages=None, pages_per_volume=None,
+                 max_volume_bytes=None, balanced=False):
+    """Split ordered input files into volumes.
+
+    By default every ``batch_size`` files make a volume. With
+    ``pages_per_volume`` and/or ``max_volume_bytes``, volumes are filled
+    in order until the next file would exceed a limit. ``balanced`` keeps
+    the same number of volumes but moves the cut points so the volumes are
+    as even as possible: by page count when ``pages_per_volume`` is set,
+    otherwise by input bytes. File order is never changed.
+
+    Args:
+        files: PdfFile records, already sorted
+        batch_size: Files per volume in the default mode (default: 10)
+        pages: Page count of each file, required with ``pages_per_volume``
+        pages_per_volume: Optional maximum number of pages per volume
+        max_volume_bytes: Optional maximum total input size per volume
+        balanced: Even out volume sizes (default: False)
+
+    Returns:
+        List of volumes, each a list of files
+    """
+    if pages_per_volume is not None and pages_per_volume < 1:
+        raise ValueError("Pages per volume must be at least 1")
+    if max_volume_bytes is not None and max_volume_bytes < 1:
+        raise ValueError("Max volume bytes must be at least 1")
+    if pages_per_volume is not None and pages is None:
+        raise ValueError("Page counts are required to plan by pages")
+
+    sizes = [f.size for f in files]
+    limits = []
+    if pages_per_volume is not None:
+        limits.append((pages, pages_per_volume))
+    if max_volume_bytes is not None:
+        limits.append((sizes, max_volume_bytes))
+
+    if limits:
+        batches = split_by_limits(files, limits)
+    else:
+        batches = [files[i:i + batch_size] for i in range(0, len(files), batch_size)]
+
+    if balanced:
+        weights = pages if pages_per_volume is not None else sizes
+        batches = balance(files, weights, len(batches))
+
+    return batches
+
+
+def make_plan(input_path, output_path, volumes, options, max_open_files):
+    """Describe planned volumes as a JSON-serialisable dict.
+
+    Inputs are stored relative to the input directory, with '/' separators,
+    so a plan can be executed where the same tree is mounted elsewhere.
+    """
+    return {
+        'version': PLAN_VERSION,
+        'input_dir': os.path.abspath(input_path),
+        'output_dir': os.path.abspath(output_path),
+        'options': options,
+        'max_open_files': max_open_files,
+        'volumes': [
+            {'number': v.number, 'name': v.name, 'inputs': [f.relpath for f in v.files]}
+            for v in volumes
+        ],
+    }
+
+
+def same_work(plan, other):
+    """Check whether two plans build volumes from the same inputs and options.
+
+    How the inputs are grouped into volumes is not compared, nor where
+    the input directory is mounted.
+    """
+    def inputs(p):
+        return sorted(path for volume in p['volumes'] for path in volume['inputs'])
+    return plan['options'] == other['options'] and inputs(plan) == inputs(other)
+
+
+def save_plan(plan_file, plan):
+    """Write a plan as JSON, creating the parent directory if needed."""
+    plan_path = Path(plan_file)
+    plan_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(plan_path, 'w', encoding='utf-8') as f:
+        json.dump(plan, f, indent=2)
+        f.write('\n')
+
+
+def load_plan(plan_file):
+    """Read a plan written by ``save_plan``."""
+    try:
+        with open(plan_file, 'r', encoding='utf-8') as f:
+            plan = json.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Plan file not found: {plan_file}")
+    except ValueError as e:
+        raise ValueError(f"Invalid plan file {plan_file}: {e}")
+
+    if not isinstance(plan, dict) or plan.get('version') != PLAN_VERSION:
+        raise ValueError(f"Unsupported plan file: {plan_file}")
+    return plan
+
+
+def parse_volume_ranges(text):
+    """Parse volume selections such as '3-17' or '1,4,10-12' into a set of numbers."""
+    numbers = set()
+    for part in text.split(','):
+        part = part.strip()
+        try:
+            if '-' in part:
+                start, end = (int(x) for x in part.split('-', 1))
+            else:
+                start = end = int(part)
+        except ValueError:
+            raise ValueError(f"Invalid volume range: {part!r}")
+        if start < 1 or end < start:
+            raise ValueError(f"Invalid volume range: {part!r}")
+        numbers.update(range(start, end + 1))
+    return numbers
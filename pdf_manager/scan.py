@@ -0,0 +1,72 @@
+"""Directory scanning for PDF inputs."""
+
+import fnmatch
+import os
+from collections import namedtuple
+
+
+# One PDF found by a scan. ``path`` is the full path, ``relpath`` the path
+# relative to the scanned directory (always with '/' separators), and
+# ``size`` and ``mtime_ns`` come from the single stat made while scanning.
+PdfFile = namedtuple('PdfFile', ['path', 'relpath', 'size', 'mtime_ns'])
+
+
+def _matches(relpath, patterns):
+    """Check a relative path, or its final component, against glob patterns."""
+    name = relpath.rsplit('/', 1)[-1]
+    return any(fnmatch.fnmatch(relpath, p) or fnmatch.fnmatch(name, p) for p in patterns)
+
+
+def scan_pdfs(input_dir, recursive=False, include=None, exclude=None):
+    """Yield a PdfFile record for every PDF in a directory.
+
+    Entries are read with ``os.scandir``, so each file is stat'ed once and
+    directories are not listed again. Symlinked directories are not followed
+    when scanning recursively. Records are yielded in directory order; sort
+    them as needed.
+
+    Glob patterns are matched against the path relative to ``input_dir``
+    and against the bare file name, so both 'ch*.pdf' and 'vol1/*.pdf' work.
+    Directories matching an exclude pattern are not descended into.
+
+    Args:
+        input_dir: Directory to scan
+        recursive: Descend into subdirectories (default: False)
+        include: Optional glob patterns a file must match
+        exclude: Optional glob patterns of files and directories to skip
+    """
+    include = list(include or [])
+    exclude = list(exclude or [])
+
+    pending = [(os.fspath(input_dir), '')]
+    while pending:
+        directory, prefix = pending.pop()
+        try:
+            entries = os.scandir(directory)
+        except (PermissionError, FileNotFoundError):
+            continue
+
+        subdirectories = []
+        with entries:
+            for entry in entries:
+                relpath = prefix + entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive and not _matches(relpath, exclude):
+                            subdirectories.append((entry.path, relpath + '/'))
+                        continue
+                    if not entry.is_file() or not entry.name.lower().endswith('.pdf'):
+                        continue
+                    if include and not _matches(relpath, include):
+                        continue
+                    if _matches(relpath, exclude):
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    # Vanished or unreadable while scanning
+                    continue
+
+                yield PdfFile(entry.path, relpath, stat.st_size, stat.st_mtime_ns)
+
+        # Depth first, in the order the directory listed them
+        pending.extend(reversed(subdirectories))
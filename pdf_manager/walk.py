@@ -1,9 +1,18 @@
 """PDF walking functionality for batch processing files into volumes."""
 
+import contextlib
+import glob
+import io
 import os
 import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
-from .merge import merge_pdfs
+from .merge import DEFAULT_MAX_OPEN_FILES, merge_pdfs
+from . import manifest as build_manifest
+from .plan import Volume, count_pages, load_plan, make_plan, plan_batches, same_work, save_plan
+from .scan import PdfFile, scan_pdfs
+from .workqueue import DEFAULT_LEASE_TIMEOUT, WorkQueue
 
 
 def natural_sort_key(text):
@@ -34,6 +43,70 @@ def natural_sort_key(text):
     return [atof(part) for part in parts if part]
 
 
+def volume_filename(prefix, volume_num, suffix):
+    """Return the filename used for a volume, e.g. 'manga_volume_007_hq.pdf'."""
+    return f"{prefix}volume_{volume_num:03d}{suffix}.pdf"
+
+
+def _build_volume(batch_file_paths, volume_path, compression_level, max_open_files, append=False,
+                  linearize=False):
+    """Merge one batch into a volume and return everything it printed.
+
+    Runs inside worker processes, so the output is captured and handed back
+    to the parent, which prints it in volume order. Volumes are already built
+    in parallel, so images within a volume are recompressed in-process.
+    With ``append``, the files are added to the existing volume instead;
+    with ``linearize``, the volume is written as a linearized PDF.
+    """
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        merge_pdfs(batch_file_paths, volume_path, compression_level, jobs=1,
+                   max_open_files=max_open_files, append=append, linearize=linearize)
+    return buffer.getvalue()
+
+
+def _remove_partial_outputs(output_path, name):
+    """Delete temporary files of volume ``name`` left by a killed build.
+
+    Volumes are written to ``.<name>.<random>.tmp`` and renamed into place
+    (see ``merge_pdfs`` and ``linearize_pdf``). A build killed by a signal
+    that cannot be caught (SIGKILL, the OOM killer) leaves its file behind.
+
+    Returns:
+        Number of files deleted
+    """
+    removed = 0
+    for path in output_path.glob(glob.escape(f".{name}.") + '*.tmp'):
+        with contextlib.suppress(FileNotFoundError):
+            path.unlink()
+            removed += 1
+    return removed
+
+
+def _file_details(pdf_file, index_entries):
+    """Describe a file for listings, with its page count when indexed."""
+    entry = index_entries.get(pdf_file.path)
+    if entry is None:
+        return f"{pdf_file.size:,} bytes"
+    if not entry.valid:
+        return f"invalid PDF, {pdf_file.size:,} bytes"
+    return f"{entry.pages} pages, {pdf_file.size:,} bytes"
+
+
+def _batching_description(batch_size, pages_per_volume, max_volume_bytes, balanced):
+    """Describe how files are split into volumes, for the run header."""
+    parts = []
+    if pages_per_volume is not None:
+        parts.append(f"Pages per volume: {pages_per_volume}")
+    if max_volume_bytes is not None:
+        parts.append(f"Max volume size: {max_volume_bytes:,} bytes")
+    if not parts:
+        parts.append(f"Batch size: {batch_size}")
+    if balanced:
+        parts.append("balanced")
+    return ", ".join(parts)
+
+
 def walk_pdfs(
     input_dir,
     output_dir,
@@ -43,6 +116,23 @@ def walk_pdfs(
     suffix="",
     compression_level=None,
     interactive=False,
+    jobs=None,
+    force=False,
+    max_open_files=DEFAULT_MAX_OPEN_FILES,
+    recursive=False,
+    include=None,
+    exclude=None,
+    index=None,
+    pages_per_volume=None,
+    max_volume_bytes=None,
+    balanced=False,
+    plan_file=None,
+    worker=False,
+    lease_timeout=DEFAULT_LEASE_TIMEOUT,
+    reset_queue=False,
+    resume=False,
+    append=False,
+    linearize=False,
 ):
     """Walk through PDF files in a directory and create batched volumes.
 
@@ -55,6 +145,46 @@ def walk_pdfs(
         suffix: Suffix for volume filenames (default: '')
         compression_level: Optional compression level ('basic', 'medium', 'aggressive')
         interactive: Enable interactive mode for volume editing (default: False)
+        jobs: Number of worker processes building volumes in parallel
+              (default: CPU count). Interactive mode always builds in-process.
+        force: Rebuild every volume even if the manifest in ``output_dir``
+               says its inputs and options are unchanged (default: False)
+        max_open_files: Maximum number of inputs each volume build holds
+                        open at once (default: 8)
+        recursive: Also collect PDFs from subdirectories; files are then
+                   ordered by their path relative to ``input_dir`` (default: False)
+        include: Optional glob patterns (e.g. 'chapter*.pdf') a file must match
+        exclude: Optional glob patterns of files or subdirectories to skip
+        index: Optional PdfIndex; listings then show page counts, and
+               content hashes come from the index instead of rehashing
+        pages_per_volume: Optional maximum number of pages per volume,
+                          replacing ``batch_size``
+        max_volume_bytes: Optional maximum total input bytes per volume,
+                          replacing ``batch_size``
+        balanced: Keep the number of volumes but even out their sizes,
+                  preserving file order (default: False)
+        plan_file: Only write the plan (volume names, ordered inputs and
+                   options) to this JSON file, for ``execute_plan``
+        worker: Cooperate with other workers (on any host) sharing
+                ``output_dir``: volumes are claimed through lease files and
+                each is built by exactly one worker (default: False)
+        lease_timeout: Seconds after which a worker's lease counts as
+                       abandoned and may be taken over (default: 300)
+        reset_queue: In worker mode, discard the shared plan, leases and
+                     done files of earlier runs first (default: False)
+        resume: Continue the interrupted run recorded in the journal in
+                ``output_dir`` with its original plan, without scanning
+                ``input_dir`` again (default: False)
+        append: Extend a volume whose inputs only gained files at the end
+                in place, writing just the new pages as an incremental
+                update, instead of rebuilding it (default: False)
+        linearize: Write linearized ("fast web view") volumes, whose first
+                   page a viewer can show before the rest is downloaded
+                   (default: False)
+
+    Returns:
+        List of volume paths built or already up to date, or the plan
+        dict when ``plan_file`` is given
     """
     input_path = Path(input_dir)
 
@@ -71,121 +201,348 @@ def walk_pdfs(
     if batch_size < 1:
         raise ValueError("Batch size must be at least 1")
 
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+
+    if jobs < 1:
+        raise ValueError("Jobs must be at least 1")
+
+    if max_open_files < 1:
+        raise ValueError("Max open files must be at least 1")
+
+    if plan_file and interactive:
+        raise ValueError("Interactive mode cannot be used to write a plan")
+
+    if worker and (interactive or plan_file):
+        raise ValueError("Worker mode cannot be combined with interactive mode or a plan file")
+
+    if reset_queue and not worker:
+        raise ValueError("Reset queue only applies to worker mode")
+
+    if resume and (worker or plan_file):
+        raise ValueError("Resume cannot be combined with worker mode or a plan file")
+
+    if linearize and append:
+        raise ValueError("Linearize cannot be combined with append")
+
     # Create output directory
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
 
+    if resume:
+        run, finished = build_manifest.load_journal(output_path)
+        if run is None:
+            print(f"No interrupted walk to resume in {output_dir}, starting a new one")
+        else:
+            plan = run['plan']
+            wanted = set(run['volumes']) if run['volumes'] is not None else None
+            volumes = _plan_volumes(plan, input_path, wanted)
+            done = sum(1 for v in volumes if v.name in finished)
+            print(f"Resuming interrupted walk: {done} of {len(volumes)} volume(s) already finished")
+            print("-" * 60)
+            return _build_volumes(volumes, output_path, plan['options'], jobs, force,
+                                  plan['max_open_files'], interactive=interactive,
+                                  partial=len(volumes) < len(plan['volumes']), plan=plan,
+                                  append=append)
+
     # Get PDF files and sort them
-    pdf_files = [
-        f for f in input_path.iterdir() if f.is_file() and f.suffix.lower() == ".pdf"
-    ]
+    exclude = list(exclude or [])
+    if recursive:
+        # Never pick up volumes from an earlier run as inputs
+        try:
+            relative_output = output_path.resolve().relative_to(input_path.resolve())
+        except ValueError:
+            relative_output = None
+        if relative_output is not None and relative_output.parts:
+            exclude.append(glob.escape(relative_output.as_posix()))
+
+    pdf_files = list(scan_pdfs(input_path, recursive, include, exclude))
 
     if not pdf_files:
         print(f"No PDF files found in {input_dir}")
         return
 
     # Sort files based on order using natural sorting
-    pdf_files = sorted(pdf_files, key=lambda f: natural_sort_key(f.name), reverse=order == "desc")
+    pdf_files = sorted(pdf_files, key=lambda f: natural_sort_key(f.relpath), reverse=order == "desc")
+
+    # Page counts and hashes from the index; only changed files are parsed
+    index_entries = {}
+    if index is not None:
+        index_entries = {f.path: e for f, e in zip(pdf_files, index.entries(pdf_files))}
+    digests = {path: entry.sha256 for path, entry in index_entries.items()}
+
+    pages = None
+    if pages_per_volume is not None:
+        pages = count_pages(pdf_files, index)
+    batches = plan_batches(pdf_files, batch_size, pages, pages_per_volume, max_volume_bytes, balanced)
+    batch_starts = [0]
+    for batch in batches:
+        batch_starts.append(batch_starts[-1] + len(batch))
 
     total_files = len(pdf_files)
-    total_batches = (total_files + batch_size - 1) // batch_size  # Ceiling division
+    total_batches = len(batches)
 
     print(f"Processing {total_files} PDF files from {input_dir}")
-    print(f"Order: {order.upper()}, Batch size: {batch_size}")
+    print(f"Order: {order.upper()}, {_batching_description(batch_size, pages_per_volume, max_volume_bytes, balanced)}")
     print(f"Will create {total_batches} volume(s)")
     print("-" * 60)
 
-    volumes_created = []
-
-    # Process files in batches
-    for batch_num in range(total_batches):
-        start_idx = batch_num * batch_size
-        end_idx = min(start_idx + batch_size, total_files)
-        batch_files = pdf_files[start_idx:end_idx]
-
-        # Generate volume filename
-        volume_num = batch_num + 1
-        volume_filename = f"{prefix}volume_{volume_num:03d}{suffix}.pdf"
-        volume_path = output_path / volume_filename
-
-        print(f"Creating Volume {volume_num:3d}: {volume_filename}")
-        print(f"  Files {start_idx + 1:3d}-{end_idx:3d} ({len(batch_files)} files)")
-
-        # List files in this batch
-        for i, pdf_file in enumerate(batch_files, start=start_idx + 1):
-            file_size = pdf_file.stat().st_size
-            print(f"    {i:3d}. {pdf_file.name} ({file_size:,} bytes)")
-
-        # Interactive mode: allow editing volume before merging
-        if interactive:
-            print()
-            while True:
-                choice = input("  Action: [p]roceed, [e]dit (exclude files), [s]kip volume, or [q]uit? ").lower().strip()
-
-                if choice == 'p':
-                    break
-                elif choice == 'e':
-                    print("\n  Enter file numbers to EXCLUDE (comma-separated, e.g., 1,3,5):")
-                    print("  Or press Enter to cancel editing")
-                    exclude_input = input("  Files to exclude: ").strip()
+    volumes = [
+        Volume(number, volume_filename(prefix, number, suffix), batch_starts[number - 1] + 1, batch)
+        for number, batch in enumerate(batches, start=1)
+    ]
+    options = {'prefix': prefix, 'suffix': suffix, 'compression_level': compression_level}
+    if linearize:
+        # Only recorded when set, so manifests of earlier runs stay valid
+        options['linearize'] = True
+
+    if plan_file:
+        plan = make_plan(input_path, output_path, volumes, options, max_open_files)
+        save_plan(plan_file, plan)
+        print(f"Plan written to {plan_file}")
+        return plan
+
+    if worker:
+        queue = WorkQueue(output_path, lease_timeout)
+        if reset_queue:
+            queue.remove()
+        fresh_plan = make_plan(input_path, output_path, volumes, options, max_open_files)
+        plan, published = queue.publish_plan(fresh_plan)
+        if not published and not same_work(plan, fresh_plan) and not queue.live_leases():
+            # Left by a run that failed or was stopped; nobody is building it
+            print(f"Discarding the shared plan in {queue.directory}: its inputs or options have changed")
+            queue.remove()
+            plan, published = queue.publish_plan(fresh_plan)
+        if not published:
+            # Running workers' plan wins; changed inputs wait for the next run
+            print(f"Joining the shared plan in {queue.directory}")
+        # Relative input paths resolve under this host's view of input_dir
+        return _work_volumes(_plan_volumes(plan, input_path), output_path, plan['options'], jobs,
+                             force, plan['max_open_files'], queue, digests)
+
+    total_pages = None
+    if index_entries:
+        total_pages = sum(e.pages for e in index_entries.values() if e.valid)
+
+    plan = make_plan(input_path, output_path, volumes, options, max_open_files)
+    return _build_volumes(volumes, output_path, options, jobs, force, max_open_files,
+                          interactive=interactive, index_entries=index_entries, digests=digests,
+                          total_pages=total_pages, plan=plan, append=append)
+
+
+def _build_volumes(volumes, output_path, options, jobs, force, max_open_files,
+                   interactive=False, index_entries=None, digests=None, partial=False,
+                   total_pages=None, plan=None, append=False):
+    """Build planned volumes, skipping those the manifest says are current.
 
-                    if exclude_input:
-                        try:
-                            # Parse excluded file numbers
-                            exclude_nums = [int(x.strip()) for x in exclude_input.split(',')]
-                            exclude_indices = [n - 1 - start_idx for n in exclude_nums if start_idx < n <= end_idx]
-
-                            if exclude_indices:
-                                # Remove excluded files
-                                batch_files = [f for idx, f in enumerate(batch_files) if idx not in exclude_indices]
-                                print(f"\n  Updated volume will contain {len(batch_files)} files:")
-                                for i, pdf_file in enumerate(batch_files, start=1):
-                                    file_size = pdf_file.stat().st_size
-                                    print(f"    {i}. {pdf_file.name} ({file_size:,} bytes)")
-                            else:
-                                print("  No valid files to exclude.")
-                        except ValueError:
-                            print("  Invalid input. Please enter comma-separated numbers.")
-                    print()
-                elif choice == 's':
-                    print("  Skipping this volume.\n")
-                    batch_files = []
-                    break
-                elif choice == 'q':
-                    print("\n  Quitting volume creation.")
-                    print("-" * 60)
-                    print(f"Summary:")
-                    print(f"  Volumes created so far: {len(volumes_created)}")
-                    return volumes_created
+    Args:
+        volumes: Volume tuples, in order
+        output_path: Output directory (a Path)
+        options: Manifest options: prefix, suffix, compression_level and
+                 optionally linearize
+        jobs: Number of worker processes building volumes in parallel
+        force: Rebuild volumes even if they are up to date
+        max_open_files: Maximum number of inputs each volume build holds open
+        interactive: Let the user review or edit each volume first
+        index_entries: Optional IndexEntry objects by input path, for listings
+        digests: Optional known content hashes by input path
+        partial: Only some volumes of the plan are being built; keep the
+                 manifest entries of the others
+        total_pages: Optional page total for the summary
+        plan: Optional plan dict being built, journaled so that an
+              interrupted run can be resumed
+        append: Extend volumes that only gained inputs at the end in place;
+                linearized volumes are always rebuilt instead
+
+    Returns:
+        List of paths of volumes built or already up to date
+    """
+    index_entries = index_entries or {}
+    compression_level = options['compression_level']
+    linearize = options.get('linearize', False)
+    append = append and not linearize
+    volumes_created = []
+    volumes_skipped = 0
+
+    # Volumes whose inputs and options match the manifest are left untouched
+    previous_manifest = build_manifest.load_manifest(output_path)
+    # Volumes finished by an interrupted run are as good as the manifest's;
+    # they are checked against their inputs the same way
+    _, journaled = build_manifest.load_journal(output_path)
+    previous_manifest['volumes'].update(journaled)
+    manifest = {'version': build_manifest.MANIFEST_VERSION, 'volumes': {}}
+    if partial:
+        manifest['volumes'].update(previous_manifest['volumes'])
+    if plan is not None:
+        build_manifest.start_journal(output_path, plan, [v.number for v in volumes])
+
+    removed = sum(_remove_partial_outputs(output_path, v.name) for v in volumes)
+    if removed:
+        print(f"Removed {removed} partial volume file(s) left by an interrupted run")
+
+    # Non-interactive batches are fixed up front, so they can be checked
+    # against the manifest and the stale ones queued on the pool right away;
+    # results are still consumed in volume order below.
+    up_to_date = {}
+    batch_inputs = {}
+    # Number of leading files a volume to be extended in place already holds
+    appended = {}
+    if not interactive and not force:
+        for batch_num, volume in enumerate(volumes):
+            previous_entry = previous_manifest['volumes'].get(volume.name)
+            inputs = build_manifest.fingerprint_inputs(volume.files, previous_entry, digests)
+            batch_inputs[batch_num] = inputs
+            if build_manifest.is_volume_current(previous_entry, output_path / volume.name,
+                                                inputs, options):
+                up_to_date[batch_num] = previous_entry
+            elif append:
+                kept = build_manifest.appended_inputs(previous_entry, output_path / volume.name,
+                                                      inputs, options)
+                if kept:
+                    appended[batch_num] = kept
+
+    stale_batches = [n for n in range(len(volumes)) if n not in up_to_date]
+
+    executor = None
+    futures = {}
+    if not interactive and jobs > 1 and len(stale_batches) > 1:
+        executor = ProcessPoolExecutor(max_workers=min(jobs, len(stale_batches)))
+        for batch_num in stale_batches:
+            kept = appended.get(batch_num, 0)
+            batch_file_paths = [f.path for f in volumes[batch_num].files[kept:]]
+            volume_path = output_path / volumes[batch_num].name
+            futures[batch_num] = executor.submit(
+                _build_volume, batch_file_paths, str(volume_path), compression_level,
+                max_open_files, kept > 0, linearize
+            )
+
+    try:
+        # Process files in batches
+        for batch_num, volume in enumerate(volumes):
+            start_idx = volume.first - 1
+            end_idx = start_idx + len(volume.files)
+            batch_files = volume.files
+
+            volume_num = volume.number
+            volume_name = volume.name
+            volume_path = output_path / volume_name
+
+            print(f"Creating Volume {volume_num:3d}: {volume_name}")
+            print(f"  Files {start_idx + 1:3d}-{end_idx:3d} ({len(batch_files)} files)")
+
+            # List files in this batch
+            for i, pdf_file in enumerate(batch_files, start=start_idx + 1):
+                print(f"    {i:3d}. {pdf_file.relpath} ({_file_details(pdf_file, index_entries)})")
+
+            # Interactive mode: allow editing volume before merging
+            if interactive:
+                print()
+                while True:
+                    choice = input("  Action: [p]roceed, [e]dit (exclude files), [s]kip volume, or [q]uit? ").lower().strip()
+
+                    if choice == 'p':
+                        break
+                    elif choice == 'e':
+                        print("\n  Enter file numbers to EXCLUDE (comma-separated, e.g., 1,3,5):")
+                        print("  Or press Enter to cancel editing")
+                        exclude_input = input("  Files to exclude: ").strip()
+
+                        if exclude_input:
+                            try:
+                                # Parse excluded file numbers
+                                exclude_nums = [int(x.strip()) for x in exclude_input.split(',')]
+                                exclude_indices = [n - 1 - start_idx for n in exclude_nums if start_idx < n <= end_idx]
+
+                                if exclude_indices:
+                                    # Remove excluded files
+                                    batch_files = [f for idx, f in enumerate(batch_files) if idx not in exclude_indices]
+                                    print(f"\n  Updated volume will contain {len(batch_files)} files:")
+                                    for i, pdf_file in enumerate(batch_files, start=1):
+                                        print(f"    {i}. {pdf_file.relpath} ({_file_details(pdf_file, index_entries)})")
+                                else:
+                                    print("  No valid files to exclude.")
+                            except ValueError:
+                                print("  Invalid input. Please enter comma-separated numbers.")
+                        print()
+                    elif choice == 's':
+                        print("  Skipping this volume.\n")
+                        batch_files = []
+                        break
+                    elif choice == 'q':
+                        build_manifest.save_manifest(output_path, manifest)
+                        build_manifest.remove_journal(output_path)
+                        print("\n  Quitting volume creation.")
+                        print("-" * 60)
+                        print(f"Summary:")
+                        print(f"  Volumes created so far: {len(volumes_created)}")
+                        return volumes_created
+                    else:
+                        print("  Invalid choice. Please enter 'p', 'e', 's', or 'q'.")
+
+            # Skip if no files in batch (user skipped or excluded all)
+            if not batch_files:
+                print()
+                continue
+
+            previous_entry = previous_manifest['volumes'].get(volume_name)
+            inputs = batch_inputs.get(batch_num)
+            if inputs is None:
+                inputs = build_manifest.fingerprint_inputs(batch_files, previous_entry, digests)
+
+            if batch_num in up_to_date or (
+                    interactive and not force
+                    and build_manifest.is_volume_current(previous_entry, volume_path, inputs, options)):
+                manifest['volumes'][volume_name] = previous_entry
+                build_manifest.record_volume(output_path, volume_name, previous_entry)
+                volumes_created.append(volume_path)
+                volumes_skipped += 1
+                print("  ✓ Volume up to date, skipped")
+                print()
+                continue
+
+            kept = appended.get(batch_num, 0)
+            if kept:
+                print(f"  Appending {len(batch_files) - kept} new file(s) to the existing volume")
+
+            try:
+                if executor is not None:
+                    print(futures[batch_num].result(), end="")
                 else:
-                    print("  Invalid choice. Please enter 'p', 'e', 's', or 'q'.")
-
-        # Skip if no files in batch (user skipped or excluded all)
-        if not batch_files:
-            print()
-            continue
+                    # Merge files in this batch
+                    batch_file_paths = [f.path for f in batch_files[kept:]]
+                    merge_pdfs(batch_file_paths, str(volume_path), compression_level,
+                               max_open_files=max_open_files, append=kept > 0, linearize=linearize)
 
-        try:
-            # Merge files in this batch
-            batch_file_paths = [str(f) for f in batch_files]
-            merge_pdfs(batch_file_paths, str(volume_path), compression_level)
+                volumes_created.append(volume_path)
+                manifest['volumes'][volume_name] = build_manifest.volume_entry(
+                    volume_path, inputs, options
+                )
+                build_manifest.record_volume(output_path, volume_name, manifest['volumes'][volume_name])
 
-            volumes_created.append(volume_path)
+                # Show volume info
+                volume_size = volume_path.stat().st_size
+                print(f"  ✓ Volume created: {volume_size:,} bytes")
 
-            # Show volume info
-            volume_size = volume_path.stat().st_size
-            print(f"  ✓ Volume created: {volume_size:,} bytes")
+            except Exception as e:
+                print(f"  ✗ Error creating volume: {e}")
 
-        except Exception as e:
-            print(f"  ✗ Error creating volume: {e}")
+            print()
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
-        print()
+    build_manifest.save_manifest(output_path, manifest)
+    build_manifest.remove_journal(output_path)
 
     print("-" * 60)
     print(f"Summary:")
-    print(f"  Total files processed: {total_files}")
-    print(f"  Volumes created: {len(volumes_created)}")
-    print(f"  Output directory: {output_dir}")
+    print(f"  Total files processed: {sum(len(v.files) for v in volumes)}")
+    if total_pages is not None:
+        print(f"  Total pages: {total_pages:,}")
+    print(f"  Volumes created: {len(volumes_created) - volumes_skipped}")
+    if volumes_skipped:
+        print(f"  Volumes up to date (skipped): {volumes_skipped}")
+    print(f"  Output directory: {output_path}")
 
     if compression_level:
         print(f"  Compression level: {compression_level}")
@@ -197,3 +554,195 @@ def walk_pdfs(
             print(f"    {volume.name} ({volume_size:,} bytes)")
 
     return volumes_created
+
+
+def _work_volumes(volumes, output_path, options, jobs, force, max_open_files, queue, digests=None):
+    """Claim and build volumes from a shared work queue until none remain.
+
+    Volumes leased by live workers are waited for, so that a lease
+    abandoned by a crashed worker is picked up once it goes stale. A volume
+    that fails here is left for other workers (or a rerun) to retry.
+
+    Returns:
+        List of paths of volumes this worker built or found up to date
+    """
+    compression_level = options['compression_level']
+    previous_manifest = build_manifest.load_manifest(output_path)
+
+    built = []
+    skipped = []
+    failed = []
+    remaining = list(volumes)
+    running = {}
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+
+    def finish(volume, inputs, output, error):
+        volume_path = output_path / volume.name
+        print(f"Volume {volume.number:3d}: {volume.name} ({len(volume.files)} files)")
+        if error is None:
+            print(output, end="")
+            queue.mark_done(volume.name, build_manifest.volume_entry(volume_path, inputs, options))
+            built.append(volume_path)
+            print(f"  ✓ Volume created: {volume_path.stat().st_size:,} bytes")
+        else:
+            failed.append(volume)
+            print(f"  ✗ Error creating volume: {error}")
+        queue.release(volume.name)
+        print()
+
+    try:
+        with queue:
+            while True:
+                for volume in list(remaining):
+                    if len(running) >= jobs:
+                        break
+                    if queue.is_done(volume.name):
+                        remaining.remove(volume)
+                        continue
+                    if not queue.claim(volume.name):
+                        continue
+                    remaining.remove(volume)
+                    # Whoever held the lease before is gone
+                    _remove_partial_outputs(output_path, volume.name)
+
+                    volume_path = output_path / volume.name
+                    previous_entry = previous_manifest['volumes'].get(volume.name)
+                    inputs = build_manifest.fingerprint_inputs(volume.files, previous_entry, digests)
+                    if not force and build_manifest.is_volume_current(previous_entry, volume_path,
+                                                                      inputs, options):
+                        queue.mark_done(volume.name, previous_entry)
+                        queue.release(volume.name)
+                        skipped.append(volume_path)
+                        print(f"Volume {volume.number:3d}: {volume.name} up to date, skipped")
+                        continue
+
+                    args = ([f.path for f in volume.files], str(volume_path), compression_level,
+                            max_open_files, False, options.get('linearize', False))
+                    if executor is not None:
+                        running[executor.submit(_build_volume, *args)] = (volume, inputs)
+                        continue
+                    try:
+                        finish(volume, inputs, _build_volume(*args), None)
+                    except Exception as e:
+                        finish(volume, inputs, "", e)
+
+                if running:
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        volume, inputs = running.pop(future)
+                        try:
+                            finish(volume, inputs, future.result(), None)
+                        except Exception as e:
+                            finish(volume, inputs, "", e)
+                    continue
+
+                remaining = [v for v in remaining if not queue.is_done(v.name)]
+                if not remaining:
+                    break
+                # The rest is leased by other workers; wait for them to
+                # finish or for their leases to go stale
+                time.sleep(queue.heartbeat)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    # Every worker records what is finished so far; the last one sees it all.
+    # Once the queue is gone, the worker that removed it has done so.
+    entries = queue.done_entries()
+    if not queue.finished():
+        manifest = build_manifest.load_manifest(output_path)
+        manifest['volumes'].update(entries)
+        build_manifest.save_manifest(output_path, manifest)
+    all_done = queue.all_done(v.name for v in volumes)
+    if all_done:
+        queue.remove()
+
+    print("-" * 60)
+    print(f"Summary:")
+    print(f"  Volumes built by this worker: {len(built)}")
+    if skipped:
+        print(f"  Volumes up to date (skipped): {len(skipped)}")
+    if failed:
+        print(f"  Volumes failed: {len(failed)}")
+    if all_done:
+        print(f"  All {len(volumes)} volume(s) finished")
+    print(f"  Output directory: {output_path}")
+
+    return built + skipped
+
+
+def _plan_volumes(plan, input_path, wanted=None):
+    """Turn a plan's volumes into Volume tuples, stat'ing every input.
+
+    Args:
+        plan: Plan dict
+        input_path: Directory the plan's relative input paths are under
+        wanted: Optional set of volume numbers to keep
+    """
+    volumes = []
+    first = 1
+    for volume in plan['volumes']:
+        start, first = first, first + len(volume['inputs'])
+        if wanted is not None and volume['number'] not in wanted:
+            continue
+
+        files = []
+        for relpath in volume['inputs']:
+            path = os.path.join(input_path, *relpath.split('/'))
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Input file not found: {path}")
+            files.append(PdfFile(path, relpath, stat.st_size, stat.st_mtime_ns))
+        volumes.append(Volume(volume['number'], volume['name'], start, files))
+    return volumes
+
+
+def execute_plan(plan_file, volumes=None, jobs=None, force=False, input_dir=None, output_dir=None):
+    """Build volumes from a plan written by ``walk_pdfs(..., plan_file=...)``.
+
+    The input directory is not scanned again; each planned input is only
+    stat'ed. The build manifest is shared with ``walk_pdfs``, so volumes
+    that are already up to date are skipped, and building a subset keeps
+    the manifest entries of the other volumes.
+
+    Args:
+        plan_file: Plan JSON file
+        volumes: Optional volume numbers to build (default: all)
+        jobs: Number of worker processes building volumes in parallel
+              (default: CPU count)
+        force: Rebuild volumes even if they are up to date (default: False)
+        input_dir: Optional replacement for the plan's input directory,
+                   e.g. where the inputs are mounted on another machine
+        output_dir: Optional replacement for the plan's output directory
+
+    Returns:
+        List of volume paths built or already up to date
+    """
+    plan = load_plan(plan_file)
+
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+
+    if jobs < 1:
+        raise ValueError("Jobs must be at least 1")
+
+    input_path = Path(input_dir or plan['input_dir'])
+    output_path = Path(output_dir or plan['output_dir'])
+
+    wanted = set(volumes) if volumes is not None else None
+    selected = [v for v in plan['volumes'] if wanted is None or v['number'] in wanted]
+    if not selected:
+        print(f"No volumes of {plan_file} selected")
+        return []
+
+    planned = _plan_volumes(plan, input_path, wanted)
+
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    print(f"Executing {len(planned)} of {len(plan['volumes'])} volume(s) from {plan_file}")
+    print("-" * 60)
+
+    return _build_volumes(planned, output_path, plan['options'], jobs, force,
+                          plan['max_open_files'], partial=len(planned) < len(plan['volumes']),
+                          plan=plan)
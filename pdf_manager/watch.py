@@ -0,0 +1,249 @@
+"""Watch an input directory and keep walk volumes up to date."""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from .scan import scan_pdfs
+from .walk import walk_pdfs
+
+
+# Seconds without further changes before a burst of arrivals is processed
+DEFAULT_DEBOUNCE = 5.0
+
+# Seconds between directory scans when inotify is not available
+DEFAULT_POLL_INTERVAL = 10.0
+
+# inotify(7) event masks
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def _is_under(path, directory):
+    """Check whether ``path`` is ``directory`` or inside it."""
+    if directory is None:
+        return False
+    path = os.path.abspath(path)
+    return path == directory or path.startswith(directory + os.sep)
+
+
+class PollingWatcher:
+    """Detect changed PDFs by rescanning the directory periodically."""
+
+    def __init__(self, input_dir, recursive=False, ignore=None, interval=DEFAULT_POLL_INTERVAL):
+        self.input_dir = Path(input_dir)
+        self.recursive = recursive
+        self.ignore = os.path.abspath(ignore) if ignore else None
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        return {
+            (f.relpath, f.size, f.mtime_ns)
+            for f in scan_pdfs(self.input_dir, self.recursive)
+            if not _is_under(f.path, self.ignore)
+        }
+
+    def wait(self, timeout=None):
+        """Block until PDFs change or ``timeout`` seconds pass.
+
+        Returns:
+            True if something changed
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval
+            if deadline is not None:
+                delay = min(delay, deadline - time.monotonic())
+                if delay <= 0:
+                    return False
+            time.sleep(delay)
+
+            snapshot = self._scan()
+            if snapshot != self._snapshot:
+                self._snapshot = snapshot
+                return True
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Detect changed PDFs through Linux inotify, without rescanning.
+
+    Raises OSError when inotify is not available.
+    """
+
+    def __init__(self, input_dir, recursive=False, ignore=None):
+        self.input_dir = os.path.abspath(input_dir)
+        self.recursive = recursive
+        self.ignore = os.path.abspath(ignore) if ignore else None
+        self._directories = {}
+
+        library = ctypes.util.find_library('c')
+        self._libc = ctypes.CDLL(library, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError("inotify is not available")
+
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._add_watches()
+
+    def _add_watches(self):
+        """Watch the input directory (and its subdirectories when recursive)."""
+        directories = [self.input_dir]
+        if self.recursive:
+            for root, names, _ in os.walk(self.input_dir):
+                names[:] = [n for n in names if not _is_under(os.path.join(root, n), self.ignore)]
+                directories.extend(os.path.join(root, n) for n in names)
+
+        for directory in directories:
+            # Adding a watch that already exists just returns its descriptor
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+            if wd >= 0:
+                self._directories[wd] = directory
+
+    def _relevant(self, data):
+        """Parse a buffer of events; return True if any concerns PDF inputs."""
+        relevant = False
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length]
+            name = os.fsdecode(name.rstrip(b'\0'))
+            offset += _EVENT_HEADER.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                relevant = True
+                continue
+            if mask & IN_IGNORED:
+                self._directories.pop(wd, None)
+                continue
+
+            directory = self._directories.get(wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, name)
+            if _is_under(path, self.ignore):
+                continue
+            if mask & IN_ISDIR:
+                if self.recursive:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self._add_watches()
+                    relevant = True
+            elif name.lower().endswith('.pdf'):
+                relevant = True
+        return relevant
+
+    def wait(self, timeout=None):
+        """Block until PDFs change or ``timeout`` seconds pass.
+
+        Returns:
+            True if something changed
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None
+            if deadline is not None:
+                remaining = max(0, deadline - time.monotonic())
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if not ready:
+                return False
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            if self._relevant(data):
+                return True
+
+    def close(self):
+        os.close(self._fd)
+
+
+def make_watcher(input_dir, recursive=False, ignore=None, poll_interval=DEFAULT_POLL_INTERVAL,
+                 polling=False):
+    """Return an inotify watcher where available, otherwise a polling one."""
+    if not polling and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(input_dir, recursive, ignore)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(input_dir, recursive, ignore, poll_interval)
+
+
+def watch_walk(input_dir, output_dir, debounce=DEFAULT_DEBOUNCE, poll_interval=DEFAULT_POLL_INTERVAL,
+               polling=False, max_updates=None, **options):
+    """Run ``walk_pdfs`` now and again whenever PDFs in ``input_dir`` change.
+
+    Each run is incremental: the build manifest makes it rebuild only the
+    volumes whose inputs changed, which for a chapter added at the end of a
+    series is the last volume, or a new one. A burst of arrivals is handled
+    by one run once no change was seen for ``debounce`` seconds. Runs until
+    interrupted (Ctrl+C).
+
+    Args:
+        input_dir: Input directory path to watch
+        output_dir: Output directory for generated volumes
+        debounce: Seconds of quiet to wait for before updating (default: 5)
+        poll_interval: Seconds between scans when polling (default: 10)
+        polling: Poll even if inotify is available (default: False)
+        max_updates: Optional number of updates after which to stop
+        **options: Other ``walk_pdfs`` keyword arguments
+    """
+    if debounce < 0:
+        raise ValueError("Debounce must not be negative")
+    if options.get('interactive') or options.get('plan_file') or options.get('worker'):
+        raise ValueError("Watch mode cannot be combined with interactive, plan or worker mode")
+
+    def update():
+        try:
+            walk_pdfs(input_dir, output_dir, **options)
+        except Exception as e:
+            # Keep watching: the next change may fix it (e.g. a half-copied file)
+            print(f"Error updating volumes: {e}")
+
+    # Volumes written inside the input directory must not trigger updates
+    ignore = output_dir
+    if os.path.abspath(output_dir) == os.path.abspath(input_dir):
+        ignore = None
+
+    # Watch before the first run, so nothing arriving during it is missed
+    watcher = make_watcher(input_dir, options.get('recursive', False), ignore,
+                           poll_interval, polling)
+    update()
+    print(f"Watching {input_dir} for new PDFs "
+          f"({'polling' if isinstance(watcher, PollingWatcher) else 'inotify'}); press Ctrl+C to stop")
+
+    updates = 0
+    try:
+        while max_updates is None or updates < max_updates:
+            if not watcher.wait():
+                continue
+            # Let a burst of arrivals settle into one update
+            while watcher.wait(debounce):
+                pass
+
+            print()
+            print(f"Changes detected in {input_dir}, updating volumes")
+            update()
+            updates += 1
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    finally:
+        watcher.close()
@@ -0,0 +1,252 @@
+"""Lease-file work queue that lets several walk workers share one output directory."""
+
+import contextlib
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+
+
+WORK_DIRNAME = ".pdf-manager-work"
+PLAN_FILENAME = "plan.json"
+
+# A lease whose file has not been touched for this long belongs to a
+# worker that died, and may be taken over
+DEFAULT_LEASE_TIMEOUT = 300
+
+
+def _write_exclusive(path, data):
+    """Create ``path`` with ``data`` only if it does not exist yet.
+
+    The content is written to a unique temporary file first and then
+    hard-linked into place, which is atomic (also over NFS), so nobody
+    ever sees a partial file.
+
+    Returns:
+        True if this call created the file
+    """
+    temp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    try:
+        os.link(temp_path, path)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        os.unlink(temp_path)
+
+
+class WorkQueue:
+    """Volumes as jobs, claimed through lease files in the output directory.
+
+    Each job has a ``<name>.lease`` file while a worker builds it and a
+    ``<name>.done`` file, holding its manifest entry, once it is built.
+    Leases are created with O_CREAT | O_EXCL, so exactly one worker wins
+    each claim. The owner touches its leases every ``heartbeat`` seconds;
+    a lease older than ``lease_timeout`` is taken over by the next worker.
+    Hosts sharing a queue need roughly synchronised clocks.
+
+    The first worker to see every job done removes the work directory.
+    Other workers may still be waiting on it, so a missing directory means
+    that every job is finished.
+    """
+
+    def __init__(self, output_dir, lease_timeout=DEFAULT_LEASE_TIMEOUT, heartbeat=None):
+        self.directory = Path(output_dir) / WORK_DIRNAME
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.lease_timeout = lease_timeout
+        self.heartbeat = heartbeat if heartbeat is not None else lease_timeout / 10
+        self.owner = {'host': socket.gethostname(), 'pid': os.getpid()}
+        self._held = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _lease_path(self, name):
+        return self.directory / f"{name}.lease"
+
+    def _done_path(self, name):
+        return self.directory / f"{name}.done"
+
+    # Plan ---------------------------------------------------------------
+
+    def publish_plan(self, plan):
+        """Share ``plan`` with other workers, or adopt the one already shared.
+
+        The first worker's plan wins, so every worker builds the same
+        volumes from the same inputs even if the directory changes while
+        they run.
+
+        Returns:
+            Tuple of (shared plan, True if this worker published it)
+        """
+        plan_path = self.directory / PLAN_FILENAME
+        # Recreated if a finishing worker removed it since __init__
+        self.directory.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(plan, indent=2).encode('utf-8')
+        if _write_exclusive(plan_path, data):
+            return plan, True
+        with open(plan_path, 'r', encoding='utf-8') as f:
+            return json.load(f), False
+
+    def live_leases(self):
+        """Count the leases renewed within ``lease_timeout``, i.e. held by running workers."""
+        now = time.time()
+        count = 0
+        for path in self.directory.glob('*.lease'):
+            try:
+                if now - path.stat().st_mtime < self.lease_timeout:
+                    count += 1
+            except FileNotFoundError:
+                continue
+        return count
+
+    # Jobs -----------------------------------------------------------------
+
+    def finished(self):
+        """Check whether another worker finished the queue and removed it."""
+        return not self.directory.exists()
+
+    def is_done(self, name):
+        return self._done_path(name).exists() or self.finished()
+
+    def mark_done(self, name, entry):
+        """Record a built volume and its manifest entry."""
+        try:
+            _write_exclusive(self._done_path(name), json.dumps(entry).encode('utf-8'))
+        except FileNotFoundError:
+            # The queue was finished by a worker that took over this job
+            pass
+
+    def done_entries(self):
+        """Return the manifest entries of every finished volume, by name."""
+        entries = {}
+        for path in self.directory.glob('*.done'):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entries[path.name[:-len('.done')]] = json.load(f)
+            except (OSError, ValueError):
+                continue
+        return entries
+
+    def claim(self, name):
+        """Try to take the job for volume ``name``.
+
+        Returns:
+            True if this worker now holds the lease
+        """
+        if self.is_done(name):
+            return False
+
+        lease_path = self._lease_path(name)
+        for _ in range(2):
+            try:
+                fd = os.open(lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                if not self._reclaim(lease_path):
+                    return False
+                continue
+            except FileNotFoundError:
+                # The queue was finished and removed meanwhile
+                return False
+
+            with os.fdopen(fd, 'w') as f:
+                json.dump(dict(self.owner, claimed=time.time()), f)
+            if self.is_done(name):
+                # Finished by someone else between the check and the claim
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(lease_path)
+                return False
+            with self._lock:
+                self._held.add(name)
+            return True
+        return False
+
+    def _reclaim(self, lease_path):
+        """Remove a stale lease; return True if it was removed."""
+        try:
+            age = time.time() - lease_path.stat().st_mtime
+        except FileNotFoundError:
+            return True
+        if age < self.lease_timeout:
+            return False
+
+        # Move it aside first: only one worker can win the rename
+        stale_path = lease_path.with_name(f"{lease_path.name}.{uuid.uuid4().hex}.stale")
+        try:
+            os.rename(lease_path, stale_path)
+        except FileNotFoundError:
+            return True
+
+        try:
+            if time.time() - stale_path.stat().st_mtime < self.lease_timeout:
+                # Another worker renewed or retook it meanwhile; put it back
+                try:
+                    os.link(stale_path, lease_path)
+                except FileExistsError:
+                    pass
+                return False
+            return True
+        except FileNotFoundError:
+            # The queue was finished and removed meanwhile
+            return False
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(stale_path)
+
+    def release(self, name):
+        """Give up the lease on ``name``."""
+        with self._lock:
+            self._held.discard(name)
+        try:
+            os.unlink(self._lease_path(name))
+        except FileNotFoundError:
+            pass
+
+    # Heartbeat --------------------------------------------------------------
+
+    def _beat(self):
+        while not self._stop.wait(self.heartbeat):
+            with self._lock:
+                held = list(self._held)
+            for name in held:
+                try:
+                    os.utime(self._lease_path(name))
+                except FileNotFoundError:
+                    pass
+
+    def __enter__(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._beat, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        for name in list(self._held):
+            self.release(name)
+
+    # Completion ---------------------------------------------------------
+
+    def all_done(self, names):
+        return all(self.is_done(name) for name in names)
+
+    def remove(self):
+        """Delete the work directory once every job is finished, or to reset it.
+
+        It is renamed first, so that other workers see either every done
+        file or no directory at all.
+        """
+        removed_path = self.directory.with_name(f"{self.directory.name}.{uuid.uuid4().hex}.removed")
+        try:
+            os.rename(self.directory, removed_path)
+        except FileNotFoundError:
+            return
+        shutil.rmtree(removed_path, ignore_errors=True)
@@ -0,0 +1,826 @@
+"""PDF writer that copies pages between documents and deduplicates resources."""
+
+import hashlib
+import io
+import re
+import zlib
+
+from PyPDF2.filters import ASCII85Decode, ASCIIHexDecode, LZWDecode
+from PyPDF2.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    EncodedStreamObject,
+    IndirectObject,
+    NameObject,
+    NullObject,
+    NumberObject,
+    StreamObject,
+    TextStringObject,
+    read_object,
+)
+
+
+# Placeholder for a stream whose copy is still in progress
+_IN_PROGRESS = object()
+
+# Dictionaries that belong to the source document's structure, not a page
+_DOCUMENT_TYPES = ('/Catalog', '/Pages')
+
+# Filters that compress poorly or not at all; a stream encoded only with
+# these (possibly in front of a real codec) is worth re-encoding
+_ASCII_FILTERS = ('/ASCIIHexDecode', '/AHx', '/ASCII85Decode', '/A85')
+_WEAK_FILTERS = _ASCII_FILTERS + ('/LZWDecode', '/LZW', '/RunLengthDecode', '/RL')
+
+# Streams shorter than this are copied as they are: deflate would barely
+# shrink them, if at all
+RECOMPRESS_MIN_SIZE = 256
+
+# Objects packed into one object stream; a reader inflates the whole
+# stream to get at any of them
+OBJECTS_PER_STREAM = 100
+
+
+def _run_length_decode(data):
+    """Decode RunLengthDecode data, which PyPDF2 cannot."""
+    output = bytearray()
+    position = 0
+    while position < len(data):
+        length = data[position]
+        position += 1
+        if length == 128:
+            break
+        if length < 128:
+            output += data[position:position + length + 1]
+            position += length + 1
+        else:
+            output += data[position:position + 1] * (257 - length)
+            position += 1
+    return bytes(output)
+
+
+def _decode_weak(data, name, parms):
+    """Undo one weak filter; return None if that is not possible here."""
+    if name in _ASCII_FILTERS:
+        decoder = ASCIIHexDecode if name in ('/ASCIIHexDecode', '/AHx') else ASCII85Decode
+        decoded = decoder.decode(data)
+    elif parms:
+        # Predictors are not undone by PyPDF2's LZW decoder
+        return None
+    elif name in ('/LZWDecode', '/LZW'):
+        decoded = LZWDecode.decode(data)
+    else:
+        decoded = _run_length_decode(data)
+    return decoded.encode('latin-1') if isinstance(decoded, str) else decoded
+
+
+def tighten_stream(stream):
+    """Re-encode a stream in place if it is unfiltered or weakly filtered.
+
+    Leading ASCII, LZW and RunLength filters are decoded; what is left is
+    kept as it is if a real codec (Flate, DCT, JPX, ...) follows, and
+    deflated otherwise (unless shorter than ``RECOMPRESS_MIN_SIZE``).
+    Streams already using a real codec are not decoded at all. The stream
+    is only changed when the result is smaller.
+
+    Returns:
+        True if the stream was changed
+    """
+    data = stream._data
+    filters = stream.get('/Filter')
+    if filters is None:
+        filters = []
+    elif isinstance(filters, NameObject):
+        filters = [filters]
+    elif isinstance(filters, ArrayObject):
+        filters = list(filters)
+    else:
+        return False
+    if filters and filters[0] not in _WEAK_FILTERS:
+        return False
+
+    parms = stream.get('/DecodeParms')
+    if parms is None:
+        parms = [None] * len(filters)
+    elif isinstance(parms, DictionaryObject) and len(filters) == 1:
+        parms = [parms]
+    elif isinstance(parms, ArrayObject) and len(parms) == len(filters):
+        parms = [None if isinstance(p, NullObject) else p for p in parms]
+    else:
+        return False
+
+    try:
+        while filters and filters[0] in _WEAK_FILTERS:
+            decoded = _decode_weak(data, filters[0], parms[0])
+            if decoded is None:
+                break
+            data = decoded
+            filters.pop(0)
+            parms.pop(0)
+    except Exception:
+        return False
+
+    if not filters:
+        if len(data) >= RECOMPRESS_MIN_SIZE:
+            deflated = zlib.compress(data)
+            if len(deflated) < len(data):
+                data = deflated
+                filters = [NameObject('/FlateDecode')]
+                parms = [None]
+    elif filters[0] in _WEAK_FILTERS:
+        return False
+
+    if len(data) >= len(stream._data):
+        return False
+
+    stream._data = data
+    if not filters:
+        del stream['/Filter']
+    elif len(filters) == 1:
+        stream[NameObject('/Filter')] = filters[0]
+    else:
+        stream[NameObject('/Filter')] = ArrayObject(filters)
+    if any(p is not None for p in parms):
+        if len(parms) == 1:
+            stream[NameObject('/DecodeParms')] = parms[0]
+        else:
+            stream[NameObject('/DecodeParms')] = ArrayObject(
+                NullObject() if p is None else p for p in parms
+            )
+    elif '/DecodeParms' in stream:
+        del stream['/DecodeParms']
+    return True
+
+
+def _name_key(name):
+    """Return the bytes a name tree sorts ``name`` by (its encoded string)."""
+    if isinstance(name, bytes):
+        return bytes(name)
+    try:
+        return name.get_original_bytes()
+    except Exception:
+        pass
+    try:
+        return str(name).encode('latin-1')
+    except UnicodeEncodeError:
+        return b'\xfe\xff' + str(name).encode('utf-16-be')
+
+
+def _name_tree_entries(node):
+    """Yield the (name, raw value) pairs of a name tree, in tree order."""
+    seen = set()
+    pending = [node]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, IndirectObject):
+            if (node.idnum, node.generation) in seen:
+                continue
+            seen.add((node.idnum, node.generation))
+            node = node.get_object()
+        if not isinstance(node, DictionaryObject):
+            continue
+        if '/Kids' in node:
+            kids = node['/Kids']
+            if isinstance(kids, ArrayObject):
+                pending.extend(reversed(kids))
+        elif '/Names' in node:
+            names = node['/Names']
+            if isinstance(names, ArrayObject):
+                for index in range(0, len(names) - 1, 2):
+                    # Array items are not resolved on access
+                    yield names[index], names[index + 1]
+
+
+def _document_dests(catalog):
+    """Return the named destinations of a catalog as two lists of raw pairs.
+
+    Returns:
+        Tuple of (entries of the /Names /Dests name tree, entries of the
+        PDF 1.1 style /Dests dictionary)
+    """
+    tree = []
+    names = catalog['/Names'] if '/Names' in catalog else None
+    if isinstance(names, DictionaryObject) and '/Dests' in names:
+        tree = list(_name_tree_entries(names.raw_get('/Dests')))
+    legacy = []
+    dests = catalog['/Dests'] if '/Dests' in catalog else None
+    if isinstance(dests, DictionaryObject):
+        legacy = list(dests.items())
+    return tree, legacy
+
+
+def _page_reference(page):
+    """Return the indirect reference of a reader page."""
+    reference = getattr(page, 'indirect_reference', None)
+    if reference is None:
+        reference = getattr(page, 'indirect_ref', None)
+    return reference
+
+
+class MergeWriter:
+    """Stream a PDF built from pages of several readers, writing each resource once.
+
+    Pages are copied together with every object they reference. Stream
+    objects (fonts, images, ICC profiles, content) are hashed after their
+    references have been remapped, and a stream identical to one already
+    copied, from this input or an earlier one, reuses the existing object.
+    Objects that are not reachable from a copied page are never copied.
+
+    Named destinations (the /Names /Dests name tree and the older /Dests
+    dictionary of the catalog) are copied as well, so that links and
+    outline items using names still resolve; where two inputs use the same
+    name, the first one keeps it.
+
+    Each ``append`` writes the copied objects to ``stream`` straight away
+    and drops them; only their offsets, the page references, the stream
+    hashes, the outline titles and the named destinations are kept until
+    ``close`` writes the page tree, outline, name tree and cross-reference
+    table. Memory use therefore depends
+    on the largest input, not on how many inputs are merged.
+
+    With ``base``, a reader over the PDF that ``stream`` holds (opened for
+    reading and writing), the pages are added to that document as an
+    incremental update instead: only the new objects, the rewritten page
+    tree root (and outline, if any) and a cross-reference section chained
+    to the previous one with /Prev are written at the end of the file.
+
+    Stream data is copied verbatim, without decoding. With ``recompress``,
+    streams that are stored uncompressed or only weakly encoded are
+    deflated on the way (see ``tighten_stream``); everything else is still
+    copied byte for byte.
+
+    With ``object_streams``, objects that are not streams (page, annotation
+    and resource dictionaries, outline items) are packed into compressed
+    object streams of up to ``OBJECTS_PER_STREAM`` objects, and the
+    cross-reference table becomes a cross-reference stream (PDF 1.5). An
+    incremental update keeps the kind of cross-reference section the base
+    document uses: object streams are only written when it has a
+    cross-reference stream.
+    """
+
+    def __init__(self, stream, dedupe=True, base=None, recompress=False, object_streams=False):
+        self.stream = stream
+        self.dedupe = dedupe
+        self.recompress = recompress
+        self.object_streams = object_streams
+        self.streams_recompressed = 0
+        self._pending = {}
+        self._offsets = {}
+        self._generations = {}
+        self._compressed = {}
+        self._packed = []
+        self._stream_hashes = {}
+        self._page_refs = []
+        self._outline = []
+        self._dests = {}
+        self._legacy_dests = {}
+        self._closed = False
+        self.streams_deduplicated = 0
+        self.bytes_deduplicated = 0
+
+        self._base = base
+        if base is not None:
+            self._open_base(base)
+            return
+
+        self._start = stream.tell()
+        self._next_number = 1
+        self._xref_stream = object_streams
+        self._version = self._initial_version = b'1.5' if object_streams else b'1.4'
+        stream.write(b'%PDF-' + self._version + b'\n%\xe2\xe3\xcf\xd3\n')
+        self._pages_ref = self._reserve()
+
+    def _open_base(self, base):
+        """Prepare an incremental update of the document read by ``base``."""
+        if base.is_encrypted:
+            raise ValueError("Cannot append to an encrypted PDF")
+
+        stream = self.stream
+        end = stream.seek(0, 2)
+        stream.seek(max(0, end - 1024))
+        tail = stream.read()
+        position = tail.rfind(b'startxref')
+        if position < 0:
+            raise ValueError("Cannot append to a PDF without a cross-reference table")
+        self._previous_xref = int(tail[position + len(b'startxref'):].split()[0])
+        stream.seek(self._previous_xref)
+        self._xref_stream = stream.read(4) != b'xref'
+        if self._xref_stream:
+            size = self._read_xref_stream_size(base)
+        else:
+            self.object_streams = False
+
+        trailer = base.trailer
+        self._root_ref = trailer.raw_get('/Root')
+        catalog = self._root_ref.get_object()
+        base_pages_ref = catalog.raw_get('/Pages')
+        base_pages = base_pages_ref.get_object()
+
+        self._start = 0
+        self._next_number = size if self._xref_stream else int(trailer['/Size'])
+        header = getattr(base, 'pdf_header', '') or ''
+        self._version = self._initial_version = header[5:8].encode('ascii', 'ignore') or b'1.4'
+        self._pages_ref = IndirectObject(base_pages_ref.idnum, base_pages_ref.generation, self)
+        self._generations[base_pages_ref.idnum] = base_pages_ref.generation
+        self._base_pages = base_pages
+        self._catalog = catalog
+
+        stream.seek(end)
+        stream.write(b'\n')
+
+    def _read_xref_stream_size(self, base):
+        """Return /Size of the base document's last cross-reference stream.
+
+        PyPDF2 does not copy /Size into the trailer it builds for these.
+        """
+        stream = self.stream
+        stream.seek(self._previous_xref)
+        match = re.match(rb'\s*\d+\s+\d+\s+obj\s*', stream.read(64))
+        if match is None:
+            raise ValueError("Cannot append to a PDF without a cross-reference table")
+        stream.seek(self._previous_xref + match.end())
+        xref_stream = read_object(stream, base)
+        if not isinstance(xref_stream, DictionaryObject) or xref_stream.get('/Type') != '/XRef':
+            raise ValueError("Cannot append to a PDF without a cross-reference table")
+        return int(xref_stream['/Size'])
+
+    # Object table -----------------------------------------------------
+
+    def _reserve(self):
+        number = self._next_number
+        self._next_number += 1
+        self._pending[number] = NullObject()
+        return IndirectObject(number, 0, self)
+
+    def _rewrite(self, reference, obj):
+        """Replace an object of the base document in the update."""
+        self._generations[reference.idnum] = reference.generation
+        self._pending[reference.idnum] = obj
+
+    def _add(self, obj):
+        reference = self._reserve()
+        self._pending[reference.idnum] = obj
+        return reference
+
+    def get_object(self, reference):
+        """Resolve a reference to an object not yet written out."""
+        return self._pending.get(reference.idnum)
+
+    def _flush(self, keep=()):
+        """Write every pending object except those in ``keep``, then drop them.
+
+        With object streams, objects that may go into one are packed
+        instead; full object streams are written as they fill up.
+        """
+        for number in sorted(self._pending):
+            if number in keep:
+                continue
+            obj = self._pending.pop(number)
+            if (self.object_streams and not isinstance(obj, StreamObject)
+                    and not self._generations.get(number, 0)):
+                buffer = io.BytesIO()
+                obj.write_to_stream(buffer, None)
+                self._packed.append((number, buffer.getvalue()))
+                if len(self._packed) >= OBJECTS_PER_STREAM:
+                    self._write_object_stream()
+            else:
+                self._write_object(number, obj)
+
+    def _write_object(self, number, obj):
+        self._offsets[number] = self.stream.tell() - self._start
+        self.stream.write(b'%d %d obj\n' % (number, self._generations.get(number, 0)))
+        obj.write_to_stream(self.stream, None)
+        self.stream.write(b'\nendobj\n')
+
+    def _write_object_stream(self):
+        """Write the packed objects as one compressed object stream."""
+        if not self._packed:
+            return
+        number = self._next_number
+        self._next_number += 1
+
+        offsets = []
+        body = io.BytesIO()
+        for index, (packed_number, data) in enumerate(self._packed):
+            offsets.append(b'%d %d' % (packed_number, body.tell()))
+            body.write(data)
+            body.write(b'\n')
+            self._compressed[packed_number] = (number, index)
+        header = b' '.join(offsets) + b'\n'
+
+        object_stream = DecodedStreamObject()
+        object_stream[NameObject('/Type')] = NameObject('/ObjStm')
+        object_stream[NameObject('/N')] = NumberObject(len(self._packed))
+        object_stream[NameObject('/First')] = NumberObject(len(header))
+        object_stream[NameObject('/Filter')] = NameObject('/FlateDecode')
+        object_stream._data = zlib.compress(header + body.getvalue())
+        self._packed = []
+        self._write_object(number, object_stream)
+
+    @property
+    def page_count(self):
+        return len(self._page_refs)
+
+    # Copying ------------------------------------------------------------
+
+    def append(self, reader, import_outline=True):
+        """Append every page of ``reader``, with its outline, and write them out.
+
+        Nothing refers back to ``reader`` afterwards, so the caller can
+        release it as soon as this returns.
+
+        Args:
+            reader: PyPDF2 PdfReader
+            import_outline: Copy the reader's outline (bookmarks) as well
+        """
+        header = getattr(reader, 'pdf_header', '') or ''
+        version = header[5:8].encode('ascii', 'ignore') if header.startswith('%PDF-') else b''
+        if version > self._version:
+            self._version = version
+
+        # Every page gets its number first, so links and annotations that
+        # point at later pages resolve to the copies instead of pulling in
+        # the source page tree.
+        memo = {}
+        pages = list(reader.pages)
+        for page in pages:
+            reference = _page_reference(page)
+            new_reference = self._reserve()
+            if reference is not None:
+                memo[(reference.idnum, reference.generation)] = new_reference
+            self._page_refs.append(new_reference)
+
+        first_page = len(self._page_refs) - len(pages)
+        for index, page in enumerate(pages):
+            new_page = DictionaryObject()
+            for key, value in page.items():
+                if key != '/Parent':
+                    new_page[NameObject(key)] = self._copy(value, memo)
+            new_page[NameObject('/Parent')] = self._pages_ref
+            self._pending[self._page_refs[first_page + index].idnum] = new_page
+
+        if import_outline:
+            try:
+                outline = reader.outline
+            except Exception:
+                outline = []
+            self._outline.extend(self._copy_outline(outline, memo))
+
+        try:
+            tree, legacy = _document_dests(reader.trailer['/Root'])
+        except Exception:
+            tree, legacy = [], []
+        for name, value in tree:
+            if _name_key(name) not in self._dests:
+                self._dests[_name_key(name)] = (name, self._copy(value, memo))
+        for name, value in legacy:
+            if name not in self._legacy_dests:
+                copied = self._copy(value, memo)
+                self._legacy_dests[NameObject(name)] = copied
+                # Also listed in the name tree, which newer readers consult
+                string = TextStringObject(name[1:])
+                self._dests.setdefault(_name_key(string), (string, copied))
+
+        # The page tree node is only complete once the last input is in
+        self._flush(keep=(self._pages_ref.idnum,))
+
+    def _copy(self, obj, memo):
+        """Copy ``obj`` into this writer, remapping indirect references."""
+        if isinstance(obj, IndirectObject):
+            key = (obj.idnum, obj.generation)
+            known = memo.get(key)
+            if known is _IN_PROGRESS:
+                # A stream that (indirectly) refers to itself: give it a
+                # number now and skip deduplication for it.
+                reference = self._reserve()
+                memo[key] = reference
+                return reference
+            if known is not None:
+                return known
+
+            target = obj.get_object()
+            if isinstance(target, DictionaryObject) and target.get('/Type') in _DOCUMENT_TYPES:
+                return NullObject()
+            if isinstance(target, StreamObject):
+                memo[key] = _IN_PROGRESS
+                reference = self._copy_stream(target, memo, key)
+                memo[key] = reference
+                return reference
+
+            reference = self._reserve()
+            memo[key] = reference
+            self._pending[reference.idnum] = self._copy(target, memo)
+            return reference
+
+        if isinstance(obj, StreamObject):
+            # Direct streams (e.g. freshly compressed page contents) become
+            # indirect objects in the output.
+            return self._copy_stream(obj, memo, None)
+
+        if isinstance(obj, DictionaryObject):
+            copied = DictionaryObject()
+            for key, value in obj.items():
+                copied[NameObject(key)] = self._copy(value, memo)
+            return copied
+
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(self._copy(value, memo) for value in obj)
+
+        return obj
+
+    def _copy_stream(self, stream, memo, key):
+        """Copy a stream verbatim and return the reference it is stored under."""
+        copied = EncodedStreamObject() if isinstance(stream, EncodedStreamObject) else DecodedStreamObject()
+        copied._data = stream._data
+        for name, value in stream.items():
+            if name != '/Length':
+                copied[NameObject(name)] = self._copy(value, memo)
+        if self.recompress and tighten_stream(copied):
+            self.streams_recompressed += 1
+
+        reserved = memo.get(key) if key is not None else None
+        if isinstance(reserved, IndirectObject):
+            self._pending[reserved.idnum] = copied
+            return reserved
+
+        if not self.dedupe:
+            return self._add(copied)
+
+        digest = self._stream_digest(copied)
+        existing = self._stream_hashes.get(digest)
+        if existing is not None:
+            self.streams_deduplicated += 1
+            self.bytes_deduplicated += len(copied._data)
+            return existing
+
+        reference = self._add(copied)
+        self._stream_hashes[digest] = reference
+        return reference
+
+    @staticmethod
+    def _stream_digest(stream):
+        buffer = io.BytesIO()
+        DictionaryObject.write_to_stream(stream, buffer, None)
+        digest = hashlib.sha256(buffer.getvalue())
+        digest.update(b'\0')
+        digest.update(stream._data)
+        return digest.digest()
+
+    def _copy_outline(self, outline, memo):
+        """Turn a reader outline into (title, destination, children) nodes."""
+        nodes = []
+        for item in outline:
+            if isinstance(item, list):
+                # Children of the previous item
+                if nodes:
+                    nodes[-1][2].extend(self._copy_outline(item, memo))
+                continue
+
+            destination = None
+            try:
+                page = item.raw_get('/Page')
+                if isinstance(page, IndirectObject) and (page.idnum, page.generation) in memo:
+                    destination = ArrayObject(
+                        [memo[(page.idnum, page.generation)]]
+                        + [self._copy(value, memo) for value in item.dest_array[1:]]
+                    )
+            except Exception:
+                destination = None
+
+            nodes.append((str(item.title or ''), destination, []))
+        return nodes
+
+    # Output -------------------------------------------------------------
+
+    def _write_outline(self, nodes, parent):
+        """Create outline item objects for ``nodes`` and return (first, last).
+
+        Items with children are written closed.
+        """
+        references = [self._reserve() for _ in nodes]
+        for index, (title, destination, children) in enumerate(nodes):
+            item = DictionaryObject()
+            item[NameObject('/Title')] = TextStringObject(title)
+            item[NameObject('/Parent')] = parent
+            if destination is not None:
+                item[NameObject('/Dest')] = destination
+            if index > 0:
+                item[NameObject('/Prev')] = references[index - 1]
+            if index < len(nodes) - 1:
+                item[NameObject('/Next')] = references[index + 1]
+            if children:
+                first, last = self._write_outline(children, references[index])
+                item[NameObject('/First')] = first
+                item[NameObject('/Last')] = last
+                item[NameObject('/Count')] = NumberObject(-len(children))
+            self._pending[references[index].idnum] = item
+        return references[0], references[-1]
+
+    def _new_outlines(self):
+        """Create an outline root holding the collected outline items."""
+        outlines_ref = self._reserve()
+        first, last = self._write_outline(self._outline, outlines_ref)
+        outlines = DictionaryObject()
+        outlines[NameObject('/Type')] = NameObject('/Outlines')
+        outlines[NameObject('/First')] = first
+        outlines[NameObject('/Last')] = last
+        outlines[NameObject('/Count')] = NumberObject(len(self._outline))
+        self._pending[outlines_ref.idnum] = outlines
+        return outlines_ref
+
+    def _write_dests(self, catalog, tree=(), legacy=()):
+        """Add the collected named destinations to ``catalog``.
+
+        ``tree`` and ``legacy`` are the catalog's own entries (see
+        ``_document_dests``), which come first. The name tree is written as
+        a single node with its names sorted.
+        """
+        dests = {}
+        for name, value in tree:
+            dests.setdefault(_name_key(name), (name, value))
+        for key, entry in self._dests.items():
+            dests.setdefault(key, entry)
+        if dests:
+            node = DictionaryObject()
+            node[NameObject('/Names')] = ArrayObject(item for key in sorted(dests) for item in dests[key])
+            names = catalog['/Names'] if '/Names' in catalog else None
+            names = DictionaryObject(names) if isinstance(names, DictionaryObject) else DictionaryObject()
+            names[NameObject('/Dests')] = self._add(node)
+            catalog[NameObject('/Names')] = names
+
+        legacy = DictionaryObject(legacy)
+        for name, value in self._legacy_dests.items():
+            legacy.setdefault(name, value)
+        if legacy:
+            catalog[NameObject('/Dests')] = self._add(legacy)
+
+    def _base_catalog(self):
+        """Return the base document's catalog as rewritten by this update."""
+        catalog = self._pending.get(self._root_ref.idnum)
+        if catalog is None:
+            catalog = DictionaryObject(self._catalog)
+            self._rewrite(self._root_ref, catalog)
+        return catalog
+
+    def _extend_base_outlines(self):
+        """Link the collected outline items after the base document's."""
+        outlines_ref = self._catalog.raw_get('/Outlines') if '/Outlines' in self._catalog else None
+        if not isinstance(outlines_ref, IndirectObject):
+            self._base_catalog()[NameObject('/Outlines')] = self._new_outlines()
+            return
+
+        outlines = DictionaryObject(outlines_ref.get_object())
+        first, last = self._write_outline(self._outline, outlines_ref)
+        previous_last = outlines.raw_get('/Last') if '/Last' in outlines else None
+        if isinstance(previous_last, IndirectObject):
+            item = DictionaryObject(previous_last.get_object())
+            item[NameObject('/Next')] = first
+            self._rewrite(previous_last, item)
+            self._pending[first.idnum][NameObject('/Prev')] = previous_last
+        else:
+            outlines[NameObject('/First')] = first
+        outlines[NameObject('/Last')] = last
+        count = abs(int(outlines.get('/Count', 0)))
+        outlines[NameObject('/Count')] = NumberObject(count + len(self._outline))
+        self._rewrite(outlines_ref, outlines)
+
+    def _write_xref(self):
+        """Write the cross-reference section for every object written.
+
+        Consecutive object numbers share a subsection; an update only lists
+        the objects it added or replaced. The free entry of object 0 always
+        comes first, since some readers expect every section to start at 0.
+        """
+        entries = [(0, None)] + sorted(self._offsets.items())
+
+        stream = self.stream
+        stream.write(b'xref\n')
+        start = 0
+        while start < len(entries):
+            end = start + 1
+            while end < len(entries) and entries[end][0] == entries[end - 1][0] + 1:
+                end += 1
+            stream.write(b'%d %d\n' % (entries[start][0], end - start))
+            for number, offset in entries[start:end]:
+                if offset is None:
+                    stream.write(b'0000000000 65535 f \n')
+                else:
+                    stream.write(b'%010d %05d n \n' % (offset, self._generations.get(number, 0)))
+            start = end
+
+    def _write_xref_stream(self, trailer):
+        """Write a cross-reference stream carrying the ``trailer`` entries.
+
+        Objects written directly get type 1 entries (offset), objects in
+        object streams type 2 entries (object stream number and index).
+        """
+        number = self._next_number
+        self._next_number += 1
+        offset = self.stream.tell() - self._start
+        self._offsets[number] = offset
+
+        entries = {0: (0, 0, 65535)}
+        for written, position in self._offsets.items():
+            entries[written] = (1, position, self._generations.get(written, 0))
+        for packed, (object_stream, index) in self._compressed.items():
+            entries[packed] = (2, object_stream, index)
+        numbers = sorted(entries)
+
+        width = max(1, (max(e[1] for e in entries.values()).bit_length() + 7) // 8)
+        index = []
+        start = 0
+        while start < len(numbers):
+            end = start + 1
+            while end < len(numbers) and numbers[end] == numbers[end - 1] + 1:
+                end += 1
+            index += [NumberObject(numbers[start]), NumberObject(end - start)]
+            start = end
+        data = b''.join(
+            bytes([entries[n][0]]) + entries[n][1].to_bytes(width, 'big') + entries[n][2].to_bytes(2, 'big')
+            for n in numbers
+        )
+
+        xref = DecodedStreamObject()
+        xref.update(trailer)
+        xref[NameObject('/Type')] = NameObject('/XRef')
+        xref[NameObject('/Size')] = NumberObject(self._next_number)
+        xref[NameObject('/Index')] = ArrayObject(index)
+        xref[NameObject('/W')] = ArrayObject([NumberObject(1), NumberObject(width), NumberObject(2)])
+        xref[NameObject('/Filter')] = NameObject('/FlateDecode')
+        xref._data = zlib.compress(data)
+        self._write_object(number, xref)
+        return offset
+
+    def close(self):
+        """Write the page tree, outline, cross-reference table and trailer.
+
+        The stream itself is left open.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        base = self._base
+
+        if base is None:
+            pages = DictionaryObject()
+            pages[NameObject('/Type')] = NameObject('/Pages')
+            pages[NameObject('/Kids')] = ArrayObject(self._page_refs)
+            pages[NameObject('/Count')] = NumberObject(len(self._page_refs))
+        else:
+            pages = DictionaryObject(self._base_pages)
+            pages[NameObject('/Kids')] = ArrayObject(list(self._base_pages['/Kids']) + self._page_refs)
+            pages[NameObject('/Count')] = NumberObject(
+                int(self._base_pages['/Count']) + len(self._page_refs)
+            )
+        self._pending[self._pages_ref.idnum] = pages
+
+        if base is None:
+            catalog = DictionaryObject()
+            catalog[NameObject('/Type')] = NameObject('/Catalog')
+            catalog[NameObject('/Pages')] = self._pages_ref
+            catalog_ref = self._add(catalog)
+            if self._outline:
+                catalog[NameObject('/Outlines')] = self._new_outlines()
+            self._write_dests(catalog)
+
+            info = DictionaryObject()
+            info[NameObject('/Producer')] = TextStringObject('pdf-manager')
+            info_ref = self._add(info)
+        else:
+            catalog_ref = self._root_ref
+            if self._outline:
+                self._extend_base_outlines()
+            if self._dests:
+                catalog = self._base_catalog()
+                self._write_dests(catalog, *_document_dests(catalog))
+            info_ref = base.trailer.raw_get('/Info') if '/Info' in base.trailer else None
+
+        self._flush()
+        self._write_object_stream()
+
+        trailer = DictionaryObject()
+        trailer[NameObject('/Size')] = NumberObject(self._next_number)
+        trailer[NameObject('/Root')] = catalog_ref
+        if info_ref is not None:
+            trailer[NameObject('/Info')] = info_ref
+        if base is not None:
+            trailer[NameObject('/Prev')] = NumberObject(self._previous_xref)
+            if '/ID' in base.trailer:
+                trailer[NameObject('/ID')] = base.trailer.raw_get('/ID')
+
+        stream = self.stream
+        if self._xref_stream:
+            xref_offset = self._write_xref_stream(trailer)
+        else:
+            xref_offset = stream.tell() - self._start
+            self._write_xref()
+            stream.write(b'trailer\n')
+            trailer.write_to_stream(stream, None)
+        stream.write(b'\nstartxref\n%d\n%%%%EOF\n' % xref_offset)
+
+        if self._version != self._initial_version:
+            # The header went out before any input was read; patch it in place
+            end = stream.tell()
+            stream.seek(self._start + 5)
+            stream.write(self._version)
+            stream.seek(end)
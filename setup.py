@@ -8,6 +8,7 @@ setup(
     install_requires=[
         "PyPDF2>=3.0.0",
         "click>=8.0.0",
+        "Pillow>=9.0.0",
     ],
     extras_require={
         "test": [
@@ -3,9 +3,12 @@
 import pytest
 import tempfile
 import shutil
+import PyPDF2
 from pathlib import Path
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import ImageReader
+from PIL import Image, ImageDraw
 
 
 @pytest.fixture
@@ -109,4 +112,152 @@ def manga_chapter_directory(temp_dir):
         c.showPage()
         c.save()
 
-    return temp_dir
\ No newline at end of file
+    return temp_dir
+
+
+@pytest.fixture
+def image_pdf(temp_dir):
+    """Create a PDF with a noisy scan-like image and a two-colour line art image."""
+    pdf_path = temp_dir / "images.pdf"
+
+    photo = Image.merge("RGB", [Image.effect_noise((400, 400), 40 + 10 * i) for i in range(3)])
+    line_art = Image.new("L", (400, 400), 255)
+    draw = ImageDraw.Draw(line_art)
+    for x in range(0, 400, 20):
+        draw.line([(x, 0), (400 - x, 400)], fill=0, width=3)
+
+    c = canvas.Canvas(str(pdf_path), pagesize=letter)
+    c.drawImage(ImageReader(photo), 50, 400, width=300, height=300)
+    c.showPage()
+    c.drawImage(ImageReader(line_art), 50, 400, width=300, height=300)
+    c.drawImage(ImageReader(photo), 50, 50, width=150, height=150)
+    c.showPage()
+    c.save()
+    return pdf_path
+
+
+@pytest.fixture
+def high_dpi_pdf(temp_dir):
+    """Create a PDF with a 1200x1200 pixel scan drawn 2 inches wide (600 DPI)."""
+    pdf_path = temp_dir / "high_dpi.pdf"
+
+    scan = Image.merge("RGB", [Image.effect_noise((1200, 1200), 30 + 5 * i) for i in range(3)])
+
+    c = canvas.Canvas(str(pdf_path), pagesize=letter)
+    c.drawImage(ImageReader(scan), 72, 72, width=144, height=144)
+    c.showPage()
+    c.save()
+    return pdf_path
+
+
+@pytest.fixture
+def outlined_pdf(temp_dir, sample_pdf_2):
+    """Create a two-page PDF with a nested outline."""
+    pdf_path = temp_dir / "outlined.pdf"
+    writer = PyPDF2.PdfWriter()
+    writer.append(str(sample_pdf_2))
+    writer.add_outline_item("Start", 0)
+    parent = writer.add_outline_item("Second", 1)
+    writer.add_outline_item("Child", 1, parent=parent)
+    with open(pdf_path, 'wb') as f:
+        writer.write(f)
+    return pdf_path
+
+
+@pytest.fixture
+def cluttered_pdf(temp_dir, sample_pdf_2):
+    """Create a two-page PDF carrying data no viewer needs to show it.
+
+    The first page has a thumbnail, XMP metadata, a page-piece dictionary,
+    a JavaScript open action, a JavaScript link and a file attachment. Two
+    objects are referenced from nowhere.
+    """
+    from PyPDF2.generic import (ArrayObject, DecodedStreamObject, DictionaryObject, NameObject,
+                                NumberObject, TextStringObject)
+
+    def stream(data, **entries):
+        obj = DecodedStreamObject()
+        obj.set_data(data)
+        obj.update({NameObject(f'/{k}'): v for k, v in entries.items()})
+        return obj
+
+    def javascript(code):
+        return DictionaryObject({NameObject('/S'): NameObject('/JavaScript'),
+                                 NameObject('/JS'): TextStringObject(code)})
+
+    pdf_path = temp_dir / "cluttered.pdf"
+    writer = PyPDF2.PdfWriter()
+    writer.append(str(sample_pdf_2))
+    page = writer.pages[0]
+
+    page[NameObject('/Thumb')] = writer._add_object(stream(
+        b'\x80' * 48, Width=NumberObject(4), Height=NumberObject(4),
+        ColorSpace=NameObject('/DeviceRGB'), BitsPerComponent=NumberObject(8)))
+    page[NameObject('/Metadata')] = writer._add_object(stream(
+        b'<x:xmpmeta xmlns:x="adobe:ns:meta/"/>', Type=NameObject('/Metadata'),
+        Subtype=NameObject('/XML')))
+    page[NameObject('/PieceInfo')] = DictionaryObject({NameObject('/Editor'): DictionaryObject({
+        NameObject('/Private'): TextStringObject('settings'),
+    })})
+    page[NameObject('/AA')] = DictionaryObject({NameObject('/O'): javascript('app.alert("opened")')})
+
+    embedded = writer._add_object(stream(b'attached data', Type=NameObject('/EmbeddedFile')))
+    link = DictionaryObject({
+        NameObject('/Type'): NameObject('/Annot'), NameObject('/Subtype'): NameObject('/Link'),
+        NameObject('/Rect'): ArrayObject([NumberObject(n) for n in (100, 700, 200, 720)]),
+        NameObject('/A'): javascript('app.alert("clicked")'),
+    })
+    attachment = DictionaryObject({
+        NameObject('/Type'): NameObject('/Annot'), NameObject('/Subtype'): NameObject('/FileAttachment'),
+        NameObject('/Rect'): ArrayObject([NumberObject(n) for n in (100, 650, 120, 670)]),
+        NameObject('/FS'): DictionaryObject({
+            NameObject('/Type'): NameObject('/Filespec'), NameObject('/F'): TextStringObject('notes.txt'),
+            NameObject('/EF'): DictionaryObject({NameObject('/F'): embedded}),
+        }),
+    })
+    page[NameObject('/Annots')] = ArrayObject([writer._add_object(link), writer._add_object(attachment)])
+
+    writer._add_object(stream(b'orphaned stream'))
+    writer._add_object(DictionaryObject({NameObject('/Orphan'): TextStringObject('nobody refers to this')}))
+
+    with open(pdf_path, 'wb') as f:
+        writer.write(f)
+    return pdf_path
+
+
+@pytest.fixture
+def named_dest_pdfs(temp_dir, sample_pdf_2):
+    """Create two two-page PDFs whose first page links to a named destination on the second.
+
+    The first document names its destination in the /Names /Dests name
+    tree, the second in the older catalog /Dests dictionary, which links
+    refer to by name object.
+    """
+    from PyPDF2.generic import (ArrayObject, DictionaryObject, NameObject, NumberObject,
+                                TextStringObject)
+
+    paths = []
+    for name, legacy in (("chapter-a", False), ("chapter-b", True)):
+        pdf_path = temp_dir / f"{name}.pdf"
+        writer = PyPDF2.PdfWriter()
+        writer.append(str(sample_pdf_2))
+        destination = ArrayObject([writer.pages[1].indirect_reference, NameObject('/Fit')])
+        if legacy:
+            writer._root_object[NameObject('/Dests')] = writer._add_object(
+                DictionaryObject({NameObject(f'/{name}'): destination}))
+        else:
+            writer._root_object[NameObject('/Names')] = DictionaryObject({
+                NameObject('/Dests'): writer._add_object(DictionaryObject({
+                    NameObject('/Names'): ArrayObject([TextStringObject(name), destination]),
+                })),
+            })
+        link = DictionaryObject({
+            NameObject('/Type'): NameObject('/Annot'), NameObject('/Subtype'): NameObject('/Link'),
+            NameObject('/Rect'): ArrayObject([NumberObject(n) for n in (100, 700, 200, 720)]),
+            NameObject('/Dest'): NameObject(f'/{name}') if legacy else TextStringObject(name),
+        })
+        writer.pages[0][NameObject('/Annots')] = ArrayObject([writer._add_object(link)])
+        with open(pdf_path, 'wb') as f:
+            writer.write(f)
+        paths.append(pdf_path)
+    return paths
@@ -0,0 +1,82 @@
+"""Tests for the compression cache module."""
+
+import os
+import pytest
+from unittest.mock import patch
+from pdf_manager.cache import CompressionCache, cache_key
+from pdf_manager.compress import COMPRESSION_LEVELS, compress_pdf
+
+
+@pytest.mark.unit
+class TestCompressionCache:
+    """Test the content-addressed cache."""
+
+    def test_put_and_get(self, temp_dir, sample_pdf):
+        """Test storing and retrieving an entry."""
+        cache = CompressionCache(temp_dir / "cache")
+        key = cache_key("abc", {'quality': 65})
+
+        assert cache.get(key) is None
+        cache.put(key, sample_pdf)
+
+        assert cache.get(key).read_bytes() == sample_pdf.read_bytes()
+
+    def test_key_depends_on_settings(self):
+        """Test that different settings produce different keys."""
+        assert cache_key("abc", COMPRESSION_LEVELS['basic']) != cache_key("abc", COMPRESSION_LEVELS['medium'])
+        assert cache_key("abc", {'a': 1, 'b': 2}) == cache_key("abc", {'b': 2, 'a': 1})
+
+    def test_lru_eviction(self, temp_dir):
+        """Test that the least recently used entries are evicted first."""
+        cache = CompressionCache(temp_dir / "cache", max_size=350)
+        for i, name in enumerate(["a", "b", "c"]):
+            source = temp_dir / f"{name}.bin"
+            source.write_bytes(b"x" * 100)
+            path = cache.put(name * 64, source)
+            os.utime(path, (1000 + i, 1000 + i))
+
+        # Reading "a" makes it the most recently used entry
+        assert cache.get("a" * 64) is not None
+
+        source = temp_dir / "d.bin"
+        source.write_bytes(b"x" * 100)
+        cache.put("d" * 64, source)
+
+        assert cache.get("b" * 64) is None
+        assert cache.get("c" * 64) is not None
+        assert cache.get("a" * 64) is not None
+        assert cache.get("d" * 64) is not None
+
+    def test_stats_and_clear(self, temp_dir, sample_pdf):
+        """Test reporting and clearing the cache."""
+        cache = CompressionCache(temp_dir / "cache")
+        cache.put("a" * 64, sample_pdf)
+
+        stats = cache.stats()
+        assert stats['entries'] == 1
+        assert stats['size'] == sample_pdf.stat().st_size
+
+        assert cache.clear() == 1
+        assert cache.stats()['entries'] == 0
+
+    def test_compress_pdf_cache_hit_skips_parsing(self, temp_dir, sample_pdf_2, capsys):
+        """Test that a cache hit returns the stored result without parsing."""
+        cache = CompressionCache(temp_dir / "cache")
+        first = temp_dir / "first.pdf"
+        second = temp_dir / "second.pdf"
+
+        compress_pdf(str(sample_pdf_2), str(first), 'medium', cache=cache)
+        with patch('PyPDF2.PdfReader', side_effect=AssertionError("parsed")):
+            compress_pdf(str(sample_pdf_2), str(second), 'medium', cache=cache)
+
+        assert second.read_bytes() == first.read_bytes()
+        assert "Result served from cache" in capsys.readouterr().out
+
+    def test_compress_pdf_cache_miss_on_other_level(self, temp_dir, sample_pdf_2):
+        """Test that another compression level does not reuse the entry."""
+        cache = CompressionCache(temp_dir / "cache")
+
+        compress_pdf(str(sample_pdf_2), str(temp_dir / "medium.pdf"), 'medium', cache=cache)
+        compress_pdf(str(sample_pdf_2), str(temp_dir / "basic.pdf"), 'basic', cache=cache)
+
+        assert cache.stats()['entries'] == 2
@@ -0,0 +1,96 @@
+"""Tests for unreferenced-object counting and strip rules."""
+
+import pytest
+import PyPDF2
+from pdf_manager.cleanup import (
+    STRIP_RULES,
+    clean_document,
+    cleanup_summary,
+    strip_rules,
+    unreferenced_objects,
+)
+from pdf_manager.linearize import linearize_pdf
+from pdf_manager.merge import merge_pdfs
+
+
+@pytest.mark.unit
+class TestUnreferencedObjects:
+    """Test unreferenced_objects."""
+
+    def test_counts_orphans(self, cluttered_pdf):
+        """Test that objects referenced from nowhere are counted."""
+        assert unreferenced_objects(PyPDF2.PdfReader(str(cluttered_pdf))) == 2
+
+    def test_clean_document(self, sample_pdf_2):
+        """Test that a document without leftovers has none."""
+        assert unreferenced_objects(PyPDF2.PdfReader(str(sample_pdf_2))) == 0
+
+    def test_structure_not_counted(self, cluttered_pdf, temp_dir):
+        """Test that object streams and linearization hints are not orphans."""
+        merged = temp_dir / "merged.pdf"
+        linear = temp_dir / "linear.pdf"
+        merge_pdfs([str(cluttered_pdf), str(cluttered_pdf)], str(merged), object_streams=True)
+        linearize_pdf(str(merged), str(linear))
+
+        assert unreferenced_objects(PyPDF2.PdfReader(str(merged))) == 0
+        assert unreferenced_objects(PyPDF2.PdfReader(str(linear))) == 0
+
+
+@pytest.mark.unit
+class TestCleanDocument:
+    """Test clean_document."""
+
+    def test_no_rules(self, cluttered_pdf):
+        """Test that without rules the pages are left as they are."""
+        reader = PyPDF2.PdfReader(str(cluttered_pdf))
+
+        stats = clean_document(reader, ())
+
+        assert stats == {'unreferenced': 2}
+        assert {'/Thumb', '/Metadata', '/PieceInfo', '/AA'} <= set(reader.pages[0].keys())
+
+    def test_all_rules(self, cluttered_pdf):
+        """Test that every rule removes what it names."""
+        reader = PyPDF2.PdfReader(str(cluttered_pdf))
+
+        stats = clean_document(reader, tuple(STRIP_RULES))
+
+        assert stats == {'unreferenced': 2, 'thumbnails': 1, 'metadata': 1, 'piece_info': 1,
+                         'javascript': 2, 'attachments': 1}
+        page = reader.pages[0]
+        assert not {'/Thumb', '/Metadata', '/PieceInfo', '/AA'} & set(page.keys())
+        annotations = [a.get_object() for a in page['/Annots']]
+        assert [a['/Subtype'] for a in annotations] == ['/Link']
+        assert '/A' not in annotations[0]
+
+    def test_written_output(self, cluttered_pdf, temp_dir):
+        """Test that stripped data does not reach a merged output."""
+        output_file = temp_dir / "merged.pdf"
+
+        merge_pdfs([str(cluttered_pdf), str(cluttered_pdf)], str(output_file), 'basic',
+                   strip=['thumbnails', 'javascript', 'attachments'])
+
+        data = output_file.read_bytes()
+        assert b'/Thumb' not in data
+        assert b'/JavaScript' not in data
+        assert b'/EmbeddedFile' not in data
+        assert b'orphaned stream' not in data
+        assert b'/PieceInfo' in data
+        reader = PyPDF2.PdfReader(str(output_file))
+        assert [p.extract_text() for p in reader.pages] == \
+            [p.extract_text() for p in PyPDF2.PdfReader(str(cluttered_pdf)).pages] * 2
+
+
+@pytest.mark.unit
+class TestStripRules:
+    """Test strip_rules and cleanup_summary."""
+
+    def test_unknown_rule(self):
+        """Test that unknown rule names are rejected."""
+        with pytest.raises(ValueError, match="Unknown strip rule: fonts"):
+            strip_rules(['metadata', 'fonts'])
+
+    def test_summary(self):
+        """Test that only what was removed is reported."""
+        assert cleanup_summary({'unreferenced': 3, 'thumbnails': 2}) == \
+            "  Removed: 3 unreferenced objects, 2 thumbnails"
@@ -67,6 +67,41 @@ class TestCLI:
         assert result.exit_code == 0
         assert output_file.exists()
 
+    def test_merge_max_open_files(self, sample_pdf, sample_pdf_2, sample_pdf_3, temp_dir):
+        """Test merge command with a limit on open input files."""
+        output_file = temp_dir / "merged_streamed_cli.pdf"
+
+        result = self.runner.invoke(main, [
+            'merge',
+            str(sample_pdf),
+            str(sample_pdf_2),
+            str(sample_pdf_3),
+            '--output', str(output_file),
+            '--max-open-files', '1'
+        ])
+
+        assert result.exit_code == 0
+        assert output_file.exists()
+        assert "Successfully merged 3 files" in result.output
+
+    def test_merge_fan_in(self, sample_pdf, sample_pdf_2, sample_pdf_3, temp_dir):
+        """Test merge command in tree merge mode."""
+        output_file = temp_dir / "merged_tree_cli.pdf"
+
+        result = self.runner.invoke(main, [
+            'merge',
+            str(sample_pdf),
+            str(sample_pdf_2),
+            str(sample_pdf_3),
+            '--output', str(output_file),
+            '--fan-in', '2',
+            '--jobs', '1'
+        ])
+
+        assert result.exit_code == 0
+        assert output_file.exists()
+        assert "Successfully merged 3 files" in result.output
+
     def test_merge_insufficient_files(self, sample_pdf, temp_dir):
         """Test merge command with insufficient input files."""
         output_file = temp_dir / "merged_fail.pdf"
@@ -151,6 +186,112 @@ class TestCLI:
 
         assert result.exit_code == 2  # Click path validation error
 
+    def test_walk_recursive_with_filters(self, pdf_directory, temp_dir):
+        """Test walk command collecting PDFs from subfolders with filters."""
+        nested = pdf_directory / "nested"
+        nested.mkdir()
+        (pdf_directory / "document_01.pdf").rename(nested / "document_01.pdf")
+        output_dir = temp_dir / "walk_recursive"
+
+        result = self.runner.invoke(main, [
+            'walk', str(pdf_directory), str(output_dir),
+            '--recursive', '--include', 'document_*', '--exclude', 'document_05.pdf',
+            '--jobs', '1'
+        ])
+
+        assert result.exit_code == 0
+        assert "Processing 4 PDF files" in result.output
+        assert "nested/document_01.pdf" in result.output
+
+    def test_walk_max_volume_bytes(self, pdf_directory, temp_dir):
+        """Test walk command planning volumes by size."""
+        output_dir = temp_dir / "walk_bytes"
+
+        result = self.runner.invoke(main, [
+            'walk', str(pdf_directory), str(output_dir),
+            '--max-volume-bytes', '1MB', '--balanced', '--jobs', '1'
+        ])
+
+        assert result.exit_code == 0
+        assert "Max volume size: 1,048,576 bytes, balanced" in result.output
+        assert "Will create 1 volume(s)" in result.output
+
+    def test_walk_plan_and_execute(self, pdf_directory, temp_dir):
+        """Test writing a plan with walk and building part of it with execute."""
+        output_dir = temp_dir / "walk_planned"
+        plan_file = temp_dir / "plan.json"
+
+        result = self.runner.invoke(main, [
+            'walk', str(pdf_directory), str(output_dir), '--batch-size', '3',
+            '--plan-only', str(plan_file)
+        ])
+        assert result.exit_code == 0
+        assert "Plan written to" in result.output
+
+        result = self.runner.invoke(main, ['execute', str(plan_file), '--volumes', '2-3', '--jobs', '1'])
+        assert result.exit_code == 0
+        assert "Executing 2 of 3 volume(s)" in result.output
+        assert sorted(p.name for p in output_dir.glob("*.pdf")) == ["volume_002.pdf", "volume_003.pdf"]
+
+        result = self.runner.invoke(main, ['execute', str(plan_file), '--volumes', 'x'])
+        assert "Error: Invalid volume range" in result.output
+
+    def test_walk_worker(self, pdf_directory, temp_dir):
+        """Test walk command in worker mode."""
+        output_dir = temp_dir / "walk_worker"
+
+        result = self.runner.invoke(main, [
+            'walk', str(pdf_directory), str(output_dir),
+            '--batch-size', '4', '--worker', '--lease-timeout', '30', '--jobs', '1'
+        ])
+
+        assert result.exit_code == 0
+        assert "Volumes built by this worker: 2" in result.output
+        assert "All 2 volume(s) finished" in result.output
+
+    def test_merge_append(self, sample_pdf, sample_pdf_2, temp_dir):
+        """Test merge command appending a single file to an existing output."""
+        output_file = temp_dir / "merged.pdf"
+        self.runner.invoke(main, ['merge', str(sample_pdf), str(sample_pdf_2), '-o', str(output_file)])
+
+        result = self.runner.invoke(main, ['merge', str(sample_pdf), '-o', str(output_file), '--append'])
+
+        assert result.exit_code == 0
+        assert "Successfully appended 1 files" in result.output
+
+    def test_merge_linearize(self, sample_pdf, sample_pdf_2, temp_dir):
+        """Test merge command writing a linearized PDF."""
+        output_file = temp_dir / "linear.pdf"
+
+        result = self.runner.invoke(main, ['merge', str(sample_pdf), str(sample_pdf_2), '-o', str(output_file),
+                                           '--linearize'])
+
+        assert result.exit_code == 0
+        assert "Linearized for fast web view" in result.output
+        assert b'/Linearized 1' in output_file.read_bytes()[:1024]
+
+    def test_compress_strip(self, cluttered_pdf, temp_dir):
+        """Test compress command with strip rules instead of the level's."""
+        output_file = temp_dir / "stripped.pdf"
+
+        result = self.runner.invoke(main, ['compress', str(cluttered_pdf), str(output_file), '-c', 'basic',
+                                           '--strip', 'javascript', '--strip', 'attachments'])
+
+        assert result.exit_code == 0
+        assert "Removed: 2 unreferenced objects, 2 JavaScript actions, 1 attachments" in result.output
+        assert b'/Thumb' in output_file.read_bytes()
+
+    def test_inspect_command(self, pdf_directory, temp_dir):
+        """Test inspect command with an explicit index path."""
+        index_path = temp_dir / "index.sqlite3"
+
+        result = self.runner.invoke(main, ['inspect', str(pdf_directory), '--index-path', str(index_path)])
+
+        assert result.exit_code == 0
+        assert "Files: 8" in result.output
+        assert "Pages: 9" in result.output
+        assert index_path.exists()
+
     def test_compress_help(self):
         """Test compress command help."""
         result = self.runner.invoke(main, ['compress', '--help'])
@@ -188,6 +329,54 @@ class TestCLI:
         assert output_file.exists()
         assert "aggressive" in result.output
 
+    def test_compress_adaptive(self, sample_pdf, temp_dir):
+        """Test compress command in adaptive mode with a minimum saving."""
+        output_file = temp_dir / "compressed_adaptive_cli.pdf"
+
+        result = self.runner.invoke(main, [
+            'compress',
+            str(sample_pdf),
+            str(output_file),
+            '--adaptive',
+            '--min-saving', '50'
+        ])
+
+        assert result.exit_code == 0
+        assert "original file kept" in result.output
+        assert output_file.read_bytes() == sample_pdf.read_bytes()
+
+    def test_compress_target_size(self, image_pdf, temp_dir):
+        """Test compress command with a target size."""
+        output_file = temp_dir / "compressed_target_cli.pdf"
+
+        result = self.runner.invoke(main, [
+            'compress',
+            str(image_pdf),
+            str(output_file),
+            '--target-size', '100K',
+            '--max-cpu-time', '60'
+        ])
+
+        assert result.exit_code == 0
+        assert "Target size: 102,400 bytes reached" in result.output
+        assert output_file.stat().st_size <= 100 * 1024
+
+    def test_compress_dir_command(self, pdf_directory, temp_dir):
+        """Test compress-dir command execution."""
+        output_dir = temp_dir / "compressed_tree"
+
+        result = self.runner.invoke(main, [
+            'compress-dir',
+            str(pdf_directory),
+            str(output_dir),
+            '--jobs', '2',
+            '--compress', 'basic'
+        ])
+
+        assert result.exit_code == 0
+        assert "Files compressed: 8" in result.output
+        assert len(list(output_dir.glob("*.pdf"))) == 8
+
     def test_compress_info_flag(self):
         """Test compress command info flag."""
         result = self.runner.invoke(main, ['compress', '--info'])
@@ -211,6 +400,45 @@ class TestCLI:
 
         assert result.exit_code == 2  # Click path validation error
 
+    def test_compress_with_cache(self, sample_pdf, temp_dir):
+        """Test compress command storing results in the cache."""
+        cache_dir = temp_dir / "cache"
+
+        for name in ("first.pdf", "second.pdf"):
+            result = self.runner.invoke(main, [
+                'compress',
+                str(sample_pdf),
+                str(temp_dir / name),
+                '--cache',
+                '--cache-dir', str(cache_dir)
+            ])
+            assert result.exit_code == 0
+
+        assert "Result served from cache" in result.output
+
+    def test_cache_stats_and_clear(self, sample_pdf, temp_dir):
+        """Test the cache stats and clear commands."""
+        cache_dir = temp_dir / "cache"
+        self.runner.invoke(main, [
+            'compress', str(sample_pdf), str(temp_dir / "out.pdf"),
+            '--cache', '--cache-dir', str(cache_dir)
+        ])
+
+        result = self.runner.invoke(main, ['cache', 'stats', '--cache-dir', str(cache_dir), '--cache-size', '10MB'])
+        assert result.exit_code == 0
+        assert "Entries: 1" in result.output
+        assert "10,485,760 bytes" in result.output
+
+        result = self.runner.invoke(main, ['cache', 'clear', '--cache-dir', str(cache_dir)])
+        assert result.exit_code == 0
+        assert "Removed 1 cached result(s)" in result.output
+
+    def test_cache_size_invalid(self, temp_dir):
+        """Test that malformed cache sizes are rejected."""
+        result = self.runner.invoke(main, ['cache', 'stats', '--cache-dir', str(temp_dir), '--cache-size', 'lots'])
+
+        assert result.exit_code == 2
+
     def test_invalid_compression_level_merge(self, sample_pdf, sample_pdf_2, temp_dir):
         """Test merge with invalid compression level."""
         output_file = temp_dir / "merged.pdf"
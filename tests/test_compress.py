@@ -2,7 +2,17 @@
 
 import pytest
 from pathlib import Path
-from pdf_manager.compress import compress_pdf, get_compression_info, COMPRESSION_LEVELS
+from unittest.mock import patch
+import os
+import shutil
+import PyPDF2
+from pdf_manager.compress import (
+    COMPRESSION_LEVELS,
+    TARGET_SIZE_STEPS,
+    compress_directory,
+    compress_pdf,
+    get_compression_info,
+)
 
 
 @pytest.mark.unit
@@ -79,6 +89,51 @@ class TestCompression:
         # Compression should reduce size or at least not increase it significantly
         assert compressed_size <= original_size * 1.1  # Allow 10% margin for metadata
 
+    def test_compress_object_streams(self, sample_pdf_2, temp_dir):
+        """Test that medium compression writes object streams unless turned off."""
+        packed = temp_dir / "packed.pdf"
+        plain = temp_dir / "plain.pdf"
+
+        compress_pdf(str(sample_pdf_2), str(packed), 'medium')
+        compress_pdf(str(sample_pdf_2), str(plain), 'medium', object_streams=False)
+
+        assert b'/ObjStm' in packed.read_bytes()
+        assert b'/ObjStm' not in plain.read_bytes()
+
+    def test_compress_linearize(self, image_pdf, temp_dir, capsys):
+        """Test that compression can write a linearized file."""
+        output_file = temp_dir / "linear.pdf"
+
+        compress_pdf(str(image_pdf), str(output_file), 'medium', jobs=1, linearize=True)
+
+        data = output_file.read_bytes()
+        assert b'/Linearized 1' in data[:1024]
+        assert b'/ObjStm' not in data
+        assert len(PyPDF2.PdfReader(str(output_file)).pages) == 2
+        assert "Linearized for fast web view" in capsys.readouterr().out
+
+    def test_compress_strip_rules(self, cluttered_pdf, temp_dir, capsys):
+        """Test that each level strips its rules and an override replaces them."""
+        medium = temp_dir / "medium.pdf"
+        aggressive = temp_dir / "aggressive.pdf"
+        kept = temp_dir / "kept.pdf"
+
+        compress_pdf(str(cluttered_pdf), str(medium), 'medium', jobs=1)
+        compress_pdf(str(cluttered_pdf), str(aggressive), 'aggressive', jobs=1)
+        compress_pdf(str(cluttered_pdf), str(kept), 'aggressive', jobs=1, strip=[])
+
+        output = capsys.readouterr().out
+        assert "Removed: 2 unreferenced objects, 1 thumbnails, 1 metadata streams, " \
+            "1 page-piece dictionaries\n" in output
+        page = PyPDF2.PdfReader(str(medium)).pages[0]
+        assert not {'/Thumb', '/Metadata', '/PieceInfo'} & set(page.keys())
+        assert '/AA' in page
+        page = PyPDF2.PdfReader(str(aggressive)).pages[0]
+        assert '/AA' not in page
+        assert len(page['/Annots']) == 1
+        page = PyPDF2.PdfReader(str(kept)).pages[0]
+        assert {'/Thumb', '/Metadata', '/PieceInfo', '/AA'} <= set(page.keys())
+
     def test_get_compression_info(self):
         """Test getting compression level information."""
         info = get_compression_info()
@@ -110,4 +165,126 @@ class TestCompression:
         medium_quality = COMPRESSION_LEVELS['medium']['quality']
         aggressive_quality = COMPRESSION_LEVELS['aggressive']['quality']
 
-        assert basic_quality > medium_quality > aggressive_quality
\ No newline at end of file
+        assert basic_quality > medium_quality > aggressive_quality
+
+    def test_compress_to_target_size(self, image_pdf, temp_dir, capsys):
+        """Test that a target size picks an image quality whose output fits."""
+        output_file = temp_dir / "target.pdf"
+
+        compress_pdf(str(image_pdf), str(output_file), 'medium', jobs=1, target_size=80_000)
+
+        output = capsys.readouterr().out
+        assert output_file.stat().st_size <= 80_000
+        assert "Target size: 80,000 bytes reached" in output
+        assert "iteration(s)" in output
+
+    def test_compress_to_target_size_keeps_highest_quality(self, image_pdf, temp_dir, capsys):
+        """Test that a generous target size keeps the best quality step."""
+        output_file = temp_dir / "target.pdf"
+
+        compress_pdf(str(image_pdf), str(output_file), 'medium', jobs=1, target_size=10_000_000)
+
+        assert f"image quality {TARGET_SIZE_STEPS[0][0]} after" in capsys.readouterr().out
+
+    def test_compress_to_unreachable_target_size(self, image_pdf, temp_dir, capsys):
+        """Test that an unreachable target size ends at the smallest step."""
+        output_file = temp_dir / "target.pdf"
+
+        compress_pdf(str(image_pdf), str(output_file), 'medium', jobs=1, target_size=1000)
+
+        quality, max_dpi = TARGET_SIZE_STEPS[-1]
+        output = capsys.readouterr().out
+        assert output_file.exists()
+        assert f"not reached with image quality {quality}, max {max_dpi} DPI" in output
+
+    def test_target_size_cpu_time_limit(self, image_pdf, temp_dir, capsys):
+        """Test that the search stops once the CPU time limit is used up."""
+        output_file = temp_dir / "target.pdf"
+
+        with patch('pdf_manager.compress._cpu_time', side_effect=[0.0] + [100.0] * 10):
+            compress_pdf(str(image_pdf), str(output_file), 'medium', jobs=1, target_size=80_000,
+                         max_cpu_time=10)
+
+        output = capsys.readouterr().out
+        assert "CPU time limit of 10s reached" in output
+        assert "after 1 iteration(s)" in output
+        assert output_file.exists()
+
+    def test_target_size_with_adaptive(self, sample_pdf, temp_dir):
+        """Test that a target size cannot be combined with adaptive mode."""
+        with pytest.raises(ValueError, match="cannot be combined"):
+            compress_pdf(str(sample_pdf), str(temp_dir / "out.pdf"), target_size=1000, adaptive=True)
+
+    def test_compress_directory_mirrors_tree(self, sample_pdf, image_pdf, temp_dir, capsys):
+        """Test compressing a directory tree into the same layout."""
+        input_dir = temp_dir / "library"
+        (input_dir / "series" / "vol1").mkdir(parents=True)
+        shutil.copy(image_pdf, input_dir / "cover.pdf")
+        shutil.copy(sample_pdf, input_dir / "series" / "vol1" / "chapter.pdf")
+        output_dir = temp_dir / "compressed"
+
+        summary = compress_directory(input_dir, output_dir, 'medium', jobs=2)
+
+        assert summary['compressed'] == 2
+        assert (output_dir / "cover.pdf").stat().st_size < image_pdf.stat().st_size
+        assert (output_dir / "series" / "vol1" / "chapter.pdf").exists()
+        assert not list(output_dir.rglob('*.tmp'))
+        output = capsys.readouterr().out
+        assert "Total size:" in output
+        assert "files/s" in output
+
+    def test_compress_directory_skips_up_to_date(self, sample_pdf, sample_pdf_2, temp_dir):
+        """Test that outputs newer than their inputs are skipped unless forced."""
+        input_dir = temp_dir / "library"
+        input_dir.mkdir()
+        shutil.copy(sample_pdf, input_dir / "a.pdf")
+        shutil.copy(sample_pdf_2, input_dir / "b.pdf")
+        output_dir = temp_dir / "compressed"
+        compress_directory(input_dir, output_dir, 'basic', jobs=1)
+
+        # Touch one input so that it is newer than its output
+        output_mtime = (output_dir / "b.pdf").stat().st_mtime_ns
+        os.utime(input_dir / "b.pdf", ns=(output_mtime + 10**9, output_mtime + 10**9))
+
+        summary = compress_directory(input_dir, output_dir, 'basic', jobs=1)
+        assert (summary['compressed'], summary['skipped']) == (1, 1)
+
+        summary = compress_directory(input_dir, output_dir, 'basic', jobs=1, force=True)
+        assert (summary['compressed'], summary['skipped']) == (2, 0)
+
+    def test_compress_directory_reports_failures(self, sample_pdf, temp_dir, capsys):
+        """Test that a broken file is reported without stopping the run."""
+        input_dir = temp_dir / "library"
+        input_dir.mkdir()
+        shutil.copy(sample_pdf, input_dir / "good.pdf")
+        (input_dir / "broken.pdf").write_text("not a PDF")
+        output_dir = temp_dir / "compressed"
+
+        summary = compress_directory(input_dir, output_dir, 'basic', jobs=1)
+
+        assert (summary['compressed'], summary['failed']) == (1, 1)
+        assert not (output_dir / "broken.pdf").exists()
+        assert "broken.pdf: failed" in capsys.readouterr().out
+
+    def test_compress_directory_ignores_output_inside_input(self, sample_pdf, temp_dir):
+        """Test that an output tree inside the input tree is not compressed again."""
+        shutil.copy(sample_pdf, temp_dir / "only.pdf")
+        input_dir = sample_pdf.parent
+        output_dir = input_dir / "compressed"
+        compress_directory(input_dir, output_dir, 'basic', jobs=1)
+
+        summary = compress_directory(input_dir, output_dir, 'basic', jobs=1)
+
+        assert summary['compressed'] == 0
+        assert not (output_dir / "compressed").exists()
+
+    def test_compress_directory_rejects_input_as_output(self, sample_pdf, temp_dir):
+        """Test that the input directory cannot be its own output directory."""
+        original = sample_pdf.read_bytes()
+
+        with pytest.raises(ValueError, match="must differ from the input directory"):
+            compress_directory(temp_dir, temp_dir, 'basic', jobs=1)
+        with pytest.raises(ValueError, match="must differ from the input directory"):
+            compress_directory(temp_dir, temp_dir / "sub" / "..", 'basic', jobs=1)
+
+        assert sample_pdf.read_bytes() == original
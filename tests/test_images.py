@@ -0,0 +1,231 @@
+"""Tests for the image recompression module."""
+
+import pytest
+import PyPDF2
+from unittest.mock import patch
+from PyPDF2.generic import DecodedStreamObject, NameObject
+from pdf_manager import images as images_module
+from pdf_manager.cache import CompressionCache
+from pdf_manager.compress import COMPRESSION_LEVELS, compress_pdf
+from pdf_manager.images import (
+    image_job,
+    image_placements,
+    iter_page_images,
+    recompress_image,
+    recompress_images,
+    sample_saving,
+    target_size,
+)
+
+
+def _images(pdf_path):
+    """Return the image XObjects of every page, keyed by page index."""
+    reader = PyPDF2.PdfReader(str(pdf_path))
+    return {i: [image for _, image in iter_page_images(page)] for i, page in enumerate(reader.pages)}
+
+
+@pytest.mark.unit
+class TestImages:
+    """Test image recompression."""
+
+    def test_iter_page_images(self, image_pdf):
+        """Test finding the images drawn by each page."""
+        images = _images(image_pdf)
+
+        assert len(images[0]) == 1
+        assert len(images[1]) == 2
+
+    def test_recompress_photo_as_jpeg(self, image_pdf):
+        """Test that a many-colour image is re-encoded as JPEG."""
+        image = _images(image_pdf)[0][0]
+        job = image_job(image)
+
+        result = recompress_image(job, 35)
+
+        assert result['filter'] == '/DCTDecode'
+        assert len(result['data']) < len(job['data'])
+
+    def test_recompress_line_art_as_flate(self, image_pdf):
+        """Test that a few-colour image stays lossless."""
+        line_art = [i for i in _images(image_pdf)[1] if i['/ColorSpace'] == '/DeviceGray'][0]
+
+        result = recompress_image(image_job(line_art), 35)
+
+        assert result['filter'] == '/FlateDecode'
+
+    def test_unsupported_images_are_skipped(self, image_pdf):
+        """Test that masks and unusual bit depths are left alone."""
+        image = _images(image_pdf)[0][0]
+        image[PyPDF2.generic.NameObject('/BitsPerComponent')] = PyPDF2.generic.NumberObject(1)
+
+        assert image_job(image) is None
+
+    def test_recompress_images_shared_once(self, image_pdf):
+        """Test that an image shared between pages is recompressed once."""
+        reader = PyPDF2.PdfReader(str(image_pdf))
+
+        count, before, after = recompress_images(reader.pages, COMPRESSION_LEVELS['aggressive'], jobs=2)
+
+        assert count >= 1
+        assert after < before
+
+    def test_compress_pdf_shrinks_images(self, image_pdf, temp_dir, capsys):
+        """Test that medium compression shrinks an image-heavy PDF."""
+        output_file = temp_dir / "compressed_images.pdf"
+
+        compress_pdf(str(image_pdf), str(output_file), 'medium', jobs=2)
+
+        assert output_file.stat().st_size < image_pdf.stat().st_size * 0.8
+        assert "Images recompressed" in capsys.readouterr().out
+
+        reader = PyPDF2.PdfReader(str(output_file))
+        assert len(reader.pages) == 2
+        assert _images(output_file)[0][0]['/Filter'] == '/DCTDecode'
+
+    def test_basic_level_keeps_images(self, image_pdf, temp_dir):
+        """Test that the basic level does not touch images."""
+        output_file = temp_dir / "compressed_basic.pdf"
+
+        compress_pdf(str(image_pdf), str(output_file), 'basic')
+
+        assert _images(output_file)[0][0]['/Filter'] != '/DCTDecode'
+
+    def test_image_placements(self, image_pdf):
+        """Test measuring how large each image is drawn on the page."""
+        reader = PyPDF2.PdfReader(str(image_pdf))
+
+        placements = image_placements(reader.pages[1])
+
+        assert sorted(placements.values()) == [(150, 150), (300, 300)]
+
+    def test_unparsable_content_keeps_resolution(self, high_dpi_pdf):
+        """Test that images of a page whose content cannot be parsed are not downsampled."""
+        reader = PyPDF2.PdfReader(str(high_dpi_pdf))
+        page = reader.pages[0]
+        contents = DecodedStreamObject()
+        contents.set_data(page.get_contents().get_data() + b' (unterminated')
+        page[NameObject('/Contents')] = contents
+
+        assert image_placements(page) == {}
+        recompress_images(reader.pages, COMPRESSION_LEVELS['aggressive'], jobs=1)
+
+        image = [image for _, image in iter_page_images(page)][0]
+        assert (image['/Width'], image['/Height']) == (1200, 1200)
+
+    def test_target_size(self):
+        """Test computing the downsampled pixel size for a DPI limit."""
+        # 1200 pixels across 2 inches is 600 DPI
+        assert target_size(1200, 1200, (144, 144), 150) == (300, 300)
+        assert target_size(1200, 600, (144, 72), 300) == (600, 300)
+        assert target_size(300, 300, (144, 144), 150) is None
+        assert target_size(1200, 1200, (144, 144), None) is None
+
+    def test_downsample_high_dpi_image(self, high_dpi_pdf, temp_dir):
+        """Test that aggressive compression resamples a 600 DPI scan to 150 DPI."""
+        output_file = temp_dir / "downsampled.pdf"
+
+        compress_pdf(str(high_dpi_pdf), str(output_file), 'aggressive', jobs=1)
+
+        image = _images(output_file)[0][0]
+        assert (image['/Width'], image['/Height']) == (300, 300)
+
+    def test_shared_image_uses_largest_placement(self, image_pdf):
+        """Test that an image drawn at several sizes keeps the resolution of the largest."""
+        reader = PyPDF2.PdfReader(str(image_pdf))
+        settings = dict(COMPRESSION_LEVELS['aggressive'], max_dpi=72)
+
+        recompress_images(reader.pages, settings, jobs=1)
+
+        # 400 pixels drawn 300 points wide is 96 DPI; 72 DPI needs 300 pixels
+        photo = [image for _, image in iter_page_images(reader.pages[0])][0]
+        assert photo['/Width'] == 300
+
+    def test_image_cache_skips_decoding(self, image_pdf, temp_dir):
+        """Test that a cached image result is reused without decoding."""
+        cache = CompressionCache(temp_dir / "cache", namespace='images')
+        settings = COMPRESSION_LEVELS['medium']
+
+        first = PyPDF2.PdfReader(str(image_pdf))
+        expected = recompress_images(first.pages, settings, jobs=1, cache=cache)
+
+        second = PyPDF2.PdfReader(str(image_pdf))
+        with patch('pdf_manager.images._decode', side_effect=AssertionError("decoded")):
+            assert recompress_images(second.pages, settings, jobs=1, cache=cache) == expected
+
+        photo = [image for _, image in iter_page_images(second.pages[0])][0]
+        assert photo['/Filter'] == '/DCTDecode'
+
+    def test_image_cache_depends_on_quality(self, image_pdf, temp_dir):
+        """Test that another quality setting does not reuse cached images."""
+        cache = CompressionCache(temp_dir / "cache", namespace='images')
+
+        recompress_images(PyPDF2.PdfReader(str(image_pdf)).pages, COMPRESSION_LEVELS['medium'], jobs=1, cache=cache)
+        recompress_images(PyPDF2.PdfReader(str(image_pdf)).pages, COMPRESSION_LEVELS['aggressive'], jobs=1, cache=cache)
+
+        assert cache.stats()['namespaces']['images'] == 4
+
+    def test_identical_images_processed_once(self, image_pdf):
+        """Test that identical image streams in different objects are decoded once."""
+        reader = PyPDF2.PdfReader(str(image_pdf))
+        pages = list(reader.pages) + list(PyPDF2.PdfReader(str(image_pdf)).pages)
+
+        with patch('pdf_manager.images._decode', wraps=images_module._decode) as decode:
+            count, _, _ = recompress_images(pages, COMPRESSION_LEVELS['medium'], jobs=1)
+
+        assert decode.call_count == 2
+        assert count == 4
+
+    def test_recompress_image_min_saving(self, image_pdf):
+        """Test that an image is kept when re-encoding does not save enough."""
+        job = image_job(_images(image_pdf)[0][0])
+
+        assert recompress_image(job, 35, min_saving=0.05) is not None
+        assert recompress_image(job, 35, min_saving=0.999) is None
+
+    def test_sample_saving(self, image_pdf):
+        """Test projecting the image saving from a sample, and reusing its results."""
+        reader = PyPDF2.PdfReader(str(image_pdf))
+        settings = COMPRESSION_LEVELS['medium']
+
+        projected, known = sample_saving(reader.pages, settings, jobs=1, sample_size=1)
+
+        assert 0 < projected < 1
+        assert len(known) == 1
+        with patch('pdf_manager.images._decode', wraps=images_module._decode) as decode:
+            recompress_images(reader.pages, settings, jobs=1, known=known)
+        assert decode.call_count == 1
+
+    def test_sample_saving_without_images(self, sample_pdf):
+        """Test that there is nothing to project for a PDF without images."""
+        reader = PyPDF2.PdfReader(str(sample_pdf))
+
+        assert sample_saving(reader.pages, COMPRESSION_LEVELS['medium']) == (None, {})
+
+    def test_adaptive_compress_shrinks_images(self, image_pdf, temp_dir, capsys):
+        """Test that adaptive compression still recompresses profitable images."""
+        output_file = temp_dir / "adaptive.pdf"
+
+        compress_pdf(str(image_pdf), str(output_file), 'medium', jobs=1, adaptive=True)
+
+        output = capsys.readouterr().out
+        assert "Projected image saving from a sample" in output
+        assert "Images recompressed" in output
+        assert output_file.stat().st_size < image_pdf.stat().st_size * 0.8
+
+    def test_adaptive_compress_keeps_compressed_pdf(self, image_pdf, temp_dir, capsys):
+        """Test that adaptive compression of an already compressed PDF keeps it as it is."""
+        compressed = temp_dir / "compressed.pdf"
+        compress_pdf(str(image_pdf), str(compressed), 'aggressive', jobs=1)
+        capsys.readouterr()
+        output_file = temp_dir / "again.pdf"
+
+        with patch('pdf_manager.images._decode', wraps=images_module._decode) as decode:
+            compress_pdf(str(compressed), str(output_file), 'medium', jobs=1, adaptive=True,
+                         min_saving=0.05)
+
+        output = capsys.readouterr().out
+        assert "images left as they are" in output
+        assert "original file kept" in output
+        assert output_file.read_bytes() == compressed.read_bytes()
+        # Only the sample was decoded
+        assert decode.call_count <= 2
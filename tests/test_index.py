@@ -0,0 +1,101 @@
+"""Tests for the index module."""
+
+import os
+import pytest
+from unittest.mock import patch
+from pdf_manager import index as index_module
+from pdf_manager.index import PdfIndex, inspect_pdfs
+from pdf_manager.manifest import file_digest
+from pdf_manager.scan import scan_pdfs
+
+
+@pytest.mark.unit
+class TestPdfIndex:
+    """Test the PDF metadata index."""
+
+    def test_entries_record_metadata(self, sample_pdf, sample_pdf_2, temp_dir):
+        """Test that entries carry page count, size and hash."""
+        with PdfIndex(temp_dir / "index.sqlite3") as index:
+            first, second = index.entries([sample_pdf, sample_pdf_2])
+
+        assert first.pages == 1
+        assert second.pages == 2
+        assert first.valid and second.valid
+        assert first.size == sample_pdf.stat().st_size
+        assert first.sha256 == file_digest(sample_pdf)
+        assert first.path == os.path.abspath(sample_pdf)
+
+    def test_unchanged_files_are_not_parsed_again(self, sample_pdf, temp_dir):
+        """Test that a second lookup is served from the index."""
+        index_path = temp_dir / "index.sqlite3"
+        with PdfIndex(index_path) as index:
+            index.entries([sample_pdf])
+
+        with patch.object(index_module, 'describe_pdf') as describe:
+            with PdfIndex(index_path) as index:
+                entry, = index.entries(scan_pdfs(temp_dir))
+                assert index.refreshed == 0
+
+        describe.assert_not_called()
+        assert entry.pages == 1
+
+    def test_changed_file_is_refreshed(self, sample_pdf, sample_pdf_2, temp_dir):
+        """Test that a file whose stat changed is parsed again."""
+        index_path = temp_dir / "index.sqlite3"
+        with PdfIndex(index_path) as index:
+            index.entries([sample_pdf])
+
+        sample_pdf.write_bytes(sample_pdf_2.read_bytes())
+
+        with PdfIndex(index_path) as index:
+            entry, = index.entries([sample_pdf])
+            assert index.refreshed == 1
+
+        assert entry.pages == 2
+
+    def test_invalid_pdf(self, temp_dir):
+        """Test that unreadable files are flagged invalid."""
+        broken = temp_dir / "broken.pdf"
+        broken.write_bytes(b"not a pdf")
+
+        with PdfIndex(temp_dir / "index.sqlite3") as index:
+            entry, = index.entries([broken])
+            assert index.get(broken) == entry
+
+        assert not entry.valid
+        assert entry.pages is None
+
+
+@pytest.mark.unit
+class TestInspect:
+    """Test inspect_pdfs."""
+
+    def test_inspect_directory(self, pdf_directory, temp_dir, capsys):
+        """Test inspecting a directory, then again from the index."""
+        index_path = temp_dir / "index" / "index.sqlite3"
+
+        entries = inspect_pdfs([str(pdf_directory)], index_path=index_path)
+        output = capsys.readouterr().out
+
+        assert len(entries) == 8
+        assert "Files: 8 (8 indexed now, 0 from index)" in output
+        assert "Pages: 9" in output
+
+        inspect_pdfs([str(pdf_directory)], index_path=index_path)
+        assert "Files: 8 (0 indexed now, 8 from index)" in capsys.readouterr().out
+
+    def test_inspect_reports_invalid(self, sample_pdf, temp_dir, capsys):
+        """Test that invalid files are counted."""
+        broken = temp_dir / "broken.pdf"
+        broken.write_bytes(b"not a pdf")
+
+        inspect_pdfs([str(sample_pdf), str(broken)], index_path=temp_dir / "index.sqlite3")
+
+        output = capsys.readouterr().out
+        assert "invalid" in output
+        assert "Invalid: 1" in output
+
+    def test_inspect_missing_input(self, temp_dir):
+        """Test inspecting a path that does not exist."""
+        with pytest.raises(FileNotFoundError, match="Input not found"):
+            inspect_pdfs([str(temp_dir / "missing.pdf")], index_path=temp_dir / "index.sqlite3")
@@ -0,0 +1,126 @@
+"""Tests for linearized output."""
+
+import re
+import zlib
+import pytest
+import PyPDF2
+from pdf_manager.linearize import linearize_pdf
+from pdf_manager.merge import merge_pdfs
+
+
+def _linearization(data):
+    """Return the linearization dictionary at the start of ``data`` as a dict."""
+    match = re.search(rb'<< /Linearized 1 /L (\d+) /H \[ (\d+) (\d+) \] /O (\d+) /E (\d+) /N (\d+) /T (\d+) >>',
+                      data[:1024])
+    assert match is not None
+    return dict(zip(('L', 'H_offset', 'H_length', 'O', 'E', 'N', 'T'), map(int, match.groups())))
+
+
+def _read_bits(data, position, count):
+    """Read ``count`` bits at bit ``position``; return (value, next position)."""
+    value = 0
+    for bit in range(position, position + count):
+        value = (value << 1) | ((data[bit // 8] >> (7 - bit % 8)) & 1)
+    return value, position + count
+
+
+def _page_offsets(data, lin):
+    """Return each page's offset according to the page offset hint table."""
+    hint = data[lin['H_offset']:lin['H_offset'] + lin['H_length']]
+    start = hint.index(b'stream\n') + len(b'stream\n')
+    table = zlib.decompress(hint[start:hint.rindex(b'\nendstream')])
+
+    position = 0
+    header = []
+    for width in (32, 32, 16, 32, 16):
+        value, position = _read_bits(table, position, width)
+        header.append(value)
+    _, first_offset, count_bits, min_length, length_bits = header
+    # Skip the rest of the 36-byte header and the object count deltas,
+    # which are padded to a whole byte
+    position = (36 + -(-lin['N'] * count_bits // 8)) * 8
+
+    offsets = []
+    offset = first_offset
+    for _ in range(lin['N']):
+        # Offsets behind the hint stream leave it out
+        offsets.append(offset + lin['H_length'] if offset >= lin['H_offset'] else offset)
+        delta, position = _read_bits(table, position, length_bits)
+        offset += min_length + delta
+    return offsets
+
+
+@pytest.mark.unit
+class TestLinearizePdf:
+    """Test linearize_pdf."""
+
+    def test_first_page_at_front(self, outlined_pdf, temp_dir):
+        """Test that the linearization dictionary and first page come first."""
+        output_file = temp_dir / "linear.pdf"
+
+        first_page_end = linearize_pdf(str(outlined_pdf), str(output_file))
+
+        data = output_file.read_bytes()
+        lin = _linearization(data)
+        reader = PyPDF2.PdfReader(str(output_file))
+        assert lin['L'] == len(data)
+        assert lin['N'] == len(reader.pages) == 2
+        assert lin['E'] == first_page_end
+        assert reader.pages[0].indirect_reference.idnum == lin['O']
+        assert data.index(b'\n%d 0 obj' % lin['O']) < first_page_end
+        assert data[lin['T']:lin['T'] + 21] == b'\n0000000000 65535 f \n'
+
+    def test_hint_table_locates_pages(self, sample_pdf, sample_pdf_2, image_pdf, temp_dir):
+        """Test that the page offset hint table points at every page."""
+        merged = temp_dir / "merged.pdf"
+        output_file = temp_dir / "linear.pdf"
+        merge_pdfs([str(image_pdf), str(sample_pdf_2), str(sample_pdf), str(image_pdf)], str(merged))
+
+        linearize_pdf(str(merged), str(output_file))
+
+        data = output_file.read_bytes()
+        reader = PyPDF2.PdfReader(str(output_file))
+        offsets = _page_offsets(data, _linearization(data))
+        assert len(offsets) == len(reader.pages) == 7
+        for page, offset in zip(reader.pages, offsets):
+            assert data[offset:].startswith(b'%d 0 obj' % page.indirect_reference.idnum)
+
+    def test_content_preserved(self, outlined_pdf, image_pdf, temp_dir):
+        """Test that pages, shared images and the outline survive."""
+        merged = temp_dir / "merged.pdf"
+        output_file = temp_dir / "linear.pdf"
+        merge_pdfs([str(outlined_pdf), str(image_pdf)], str(merged))
+
+        linearize_pdf(str(merged), str(output_file))
+
+        original = PyPDF2.PdfReader(str(merged))
+        reader = PyPDF2.PdfReader(str(output_file))
+        assert [p.extract_text() for p in reader.pages] == [p.extract_text() for p in original.pages]
+        assert [item.title for item in reader.outline if not isinstance(item, list)] == \
+            [item.title for item in original.outline if not isinstance(item, list)]
+        data = output_file.read_bytes()
+        assert data.count(b'/Subtype /Image') == merged.read_bytes().count(b'/Subtype /Image')
+
+    def test_in_place(self, sample_pdf_2, temp_dir):
+        """Test that a file can be linearized onto itself."""
+        pdf_path = temp_dir / "document.pdf"
+        pdf_path.write_bytes(sample_pdf_2.read_bytes())
+
+        linearize_pdf(str(pdf_path), str(pdf_path))
+
+        data = pdf_path.read_bytes()
+        assert _linearization(data)['L'] == len(data)
+        assert len(PyPDF2.PdfReader(str(pdf_path)).pages) == 2
+        assert [p.name for p in temp_dir.iterdir() if p.name.endswith('.tmp')] == []
+
+    def test_rejects_encrypted_pdf(self, sample_pdf, temp_dir):
+        """Test that encrypted documents are refused."""
+        encrypted = temp_dir / "encrypted.pdf"
+        writer = PyPDF2.PdfWriter()
+        writer.append(str(sample_pdf))
+        writer.encrypt("secret")
+        with open(encrypted, 'wb') as f:
+            writer.write(f)
+
+        with pytest.raises(ValueError, match="encrypted"):
+            linearize_pdf(str(encrypted), str(temp_dir / "linear.pdf"))
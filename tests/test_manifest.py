@@ -0,0 +1,63 @@
+"""Tests for the build manifest module."""
+
+import os
+import pytest
+from pdf_manager.manifest import (
+    MANIFEST_FILENAME,
+    file_digest,
+    fingerprint_file,
+    fingerprint_inputs,
+    is_volume_current,
+    load_manifest,
+    save_manifest,
+    volume_entry,
+)
+
+
+@pytest.mark.unit
+class TestManifest:
+    """Test manifest helpers."""
+
+    def test_fingerprint_file(self, sample_pdf):
+        """Test that a fingerprint carries size, mtime and content hash."""
+        fingerprint = fingerprint_file(sample_pdf)
+
+        assert fingerprint['path'] == str(sample_pdf)
+        assert fingerprint['size'] == sample_pdf.stat().st_size
+        assert fingerprint['mtime_ns'] == sample_pdf.stat().st_mtime_ns
+        assert fingerprint['sha256'] == file_digest(sample_pdf)
+
+    def test_fingerprint_reuses_hash_when_stat_unchanged(self, sample_pdf):
+        """Test that an unchanged file is not hashed again."""
+        previous = dict(fingerprint_file(sample_pdf), sha256='cached')
+
+        assert fingerprint_file(sample_pdf, previous)['sha256'] == 'cached'
+
+        # A different mtime forces a fresh hash
+        stat = sample_pdf.stat()
+        os.utime(sample_pdf, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert fingerprint_file(sample_pdf, previous)['sha256'] == file_digest(sample_pdf)
+
+    def test_load_missing_manifest(self, temp_dir):
+        """Test that a missing manifest loads as empty."""
+        assert load_manifest(temp_dir)['volumes'] == {}
+
+    def test_load_corrupt_manifest(self, temp_dir):
+        """Test that a corrupt manifest loads as empty."""
+        (temp_dir / MANIFEST_FILENAME).write_text("{not json")
+
+        assert load_manifest(temp_dir)['volumes'] == {}
+
+    def test_save_and_load_roundtrip(self, temp_dir, sample_pdf):
+        """Test saving and loading a manifest."""
+        volume = temp_dir / "volume_001.pdf"
+        volume.write_bytes(sample_pdf.read_bytes())
+        inputs = fingerprint_inputs([sample_pdf])
+        options = {'prefix': '', 'suffix': '', 'compression_level': None}
+
+        save_manifest(temp_dir, {'version': 1, 'volumes': {volume.name: volume_entry(volume, inputs, options)}})
+        entry = load_manifest(temp_dir)['volumes'][volume.name]
+
+        assert is_volume_current(entry, volume, inputs, options)
+        assert not is_volume_current(entry, volume, inputs, dict(options, compression_level='basic'))
+        assert not is_volume_current(entry, temp_dir / "missing.pdf", inputs, options)
@@ -3,9 +3,32 @@
 import pytest
 import PyPDF2
 from pathlib import Path
+from PyPDF2.generic import NameObject
+from unittest.mock import patch
+from pdf_manager import merge as merge_module
+from pdf_manager.index import PdfIndex
 from pdf_manager.merge import merge_pdfs
 
 
+def _link_target(reader, page_number):
+    """Resolve the named destination of the first link on a page to a page number.
+
+    Names are looked up in the catalog /Dests dictionary, strings in the
+    /Names /Dests name tree.
+    """
+    name = reader.pages[page_number]['/Annots'][0].get_object()['/Dest']
+    catalog = reader.trailer['/Root']
+    if isinstance(name, NameObject):
+        destination = catalog['/Dests'][name]
+    else:
+        names = catalog['/Names']['/Dests']['/Names']
+        keys = list(names[::2])
+        assert keys == sorted(keys)
+        destination = names[2 * keys.index(name) + 1].get_object()
+    page = destination[0]
+    return [p.indirect_reference.idnum for p in reader.pages].index(page.idnum)
+
+
 @pytest.mark.unit
 class TestMerge:
     """Test merge functionality."""
@@ -69,6 +92,70 @@ class TestMerge:
 
         assert output_file.exists()
 
+    def test_merge_with_compression_single_pass(self, sample_pdf, sample_pdf_2, temp_dir):
+        """Test that compressed merges write only the output file, with compressed pages."""
+        output_dir = temp_dir / "single_pass"
+        output_file = output_dir / "merged.pdf"
+        input_files = [str(sample_pdf), str(sample_pdf_2)]
+
+        merge_pdfs(input_files, str(output_file), compression_level='medium')
+
+        assert [p.name for p in output_dir.iterdir()] == ["merged.pdf"]
+
+        with open(output_file, 'rb') as f:
+            reader = PyPDF2.PdfReader(f)
+            assert len(reader.pages) == 3
+            for page in reader.pages:
+                assert page['/Contents'].get_object()['/Filter'] == '/FlateDecode'
+
+    def test_merge_object_streams_follow_level(self, sample_pdf, sample_pdf_2, temp_dir):
+        """Test that medium and aggressive write object streams and basic does not."""
+        input_files = [str(sample_pdf), str(sample_pdf_2)]
+
+        for level, expected in (('basic', False), ('medium', True), ('aggressive', True)):
+            output_file = temp_dir / f"merged_{level}.pdf"
+            merge_pdfs(input_files, str(output_file), compression_level=level)
+
+            data = output_file.read_bytes()
+            assert (b'/ObjStm' in data) is expected
+            assert len(PyPDF2.PdfReader(str(output_file)).pages) == 3
+
+    def test_merge_object_streams_override(self, sample_pdf, sample_pdf_2, temp_dir):
+        """Test turning object streams on without a level, and off for a level."""
+        input_files = [str(sample_pdf), str(sample_pdf_2)]
+        with_streams = temp_dir / "with_streams.pdf"
+        without_streams = temp_dir / "without_streams.pdf"
+
+        merge_pdfs(input_files, str(with_streams), object_streams=True)
+        merge_pdfs(input_files, str(without_streams), compression_level='medium', object_streams=False)
+
+        assert b'/ObjStm' in with_streams.read_bytes()
+        assert b'/ObjStm' not in without_streams.read_bytes()
+
+    def test_merge_linearize(self, sample_pdf, sample_pdf_2, temp_dir, capsys):
+        """Test that a linearized merge starts with the linearization dictionary."""
+        output_file = temp_dir / "linear.pdf"
+
+        merge_pdfs([str(sample_pdf), str(sample_pdf_2)], str(output_file), compression_level='medium',
+                   linearize=True)
+
+        data = output_file.read_bytes()
+        assert b'/Linearized 1' in data[:1024]
+        assert b'/ObjStm' not in data
+        assert len(PyPDF2.PdfReader(str(output_file)).pages) == 3
+        assert "Linearized for fast web view: first page in" in capsys.readouterr().out
+
+    def test_merge_linearize_rejects_append(self, sample_pdf, sample_pdf_2, temp_dir):
+        """Test that linearized output cannot be appended to or use object streams."""
+        output_file = temp_dir / "linear.pdf"
+
+        with pytest.raises(ValueError, match="Linearize cannot be combined"):
+            merge_pdfs([str(sample_pdf)], str(output_file), append=True, linearize=True)
+        with pytest.raises(ValueError, match="Linearize cannot be combined"):
+            merge_pdfs([str(sample_pdf), str(sample_pdf_2)], str(output_file), object_streams=True,
+                       linearize=True)
+        assert not output_file.exists()
+
     def test_merge_creates_output_directory(self, sample_pdf, sample_pdf_2, temp_dir):
         """Test that merge creates output directory if it doesn't exist."""
         output_dir = temp_dir / "new_output_dir"
@@ -140,6 +227,28 @@ class TestMerge:
             second_page_text = reader.pages[1].extract_text()
             assert "second test PDF" in second_page_text
 
+    def test_merge_keeps_named_destinations(self, named_dest_pdfs, temp_dir):
+        """Test that links to named destinations still resolve after a merge."""
+        for options in ({}, {'compression_level': 'medium'}, {'linearize': True}):
+            output_file = temp_dir / "merged.pdf"
+
+            merge_pdfs([str(p) for p in named_dest_pdfs], str(output_file), **options)
+
+            reader = PyPDF2.PdfReader(str(output_file))
+            assert _link_target(reader, 0) == 1
+            assert _link_target(reader, 2) == 3
+
+    def test_merge_append_keeps_named_destinations(self, named_dest_pdfs, temp_dir):
+        """Test that an incremental update adds to the output's named destinations."""
+        output_file = temp_dir / "merged.pdf"
+        merge_pdfs([str(named_dest_pdfs[0])], str(output_file), append=True)
+
+        merge_pdfs([str(named_dest_pdfs[1])], str(output_file), append=True)
+
+        reader = PyPDF2.PdfReader(str(output_file))
+        assert _link_target(reader, 0) == 1
+        assert _link_target(reader, 2) == 3
+
     def test_merge_invalid_compression_level(self, sample_pdf, sample_pdf_2, temp_dir):
         """Test merge with invalid compression level."""
         output_file = temp_dir / "merged.pdf"
@@ -164,4 +273,183 @@ class TestMerge:
 
             # Second page should be from sample_pdf
             second_page_text = reader.pages[1].extract_text()
-            assert "This is a test PDF" in second_page_text
\ No newline at end of file
+            assert "This is a test PDF" in second_page_text
+
+    def test_merge_limits_open_files(self, sample_pdf, sample_pdf_2, sample_pdf_3, temp_dir):
+        """Test that no more than max_open_files inputs are held at once."""
+        output_file = temp_dir / "merged.pdf"
+        input_files = [str(sample_pdf), str(sample_pdf_2), str(sample_pdf_3)] * 3
+        events = []
+        real_reader = PyPDF2.PdfReader
+        real_append = merge_module.MergeWriter.append
+
+        def open_reader(path):
+            events.append('open')
+            return real_reader(path)
+
+        def append(writer, reader):
+            events.append('append')
+            return real_append(writer, reader)
+
+        with patch.object(merge_module.PyPDF2, 'PdfReader', side_effect=open_reader), \
+                patch.object(merge_module.MergeWriter, 'append', append):
+            merge_pdfs(input_files, str(output_file), max_open_files=2)
+
+        held = peak = 0
+        for event in events:
+            held += 1 if event == 'open' else -1
+            peak = max(peak, held)
+        assert peak == 2
+        assert events.count('append') == 9
+
+        with open(output_file, 'rb') as f:
+            reader = PyPDF2.PdfReader(f)
+            assert len(reader.pages) == 12
+            assert "third test PDF" in reader.pages[11].extract_text()
+
+    def test_merge_invalid_max_open_files(self, sample_pdf, sample_pdf_2, temp_dir):
+        """Test merge with a max_open_files below one."""
+        output_file = temp_dir / "merged.pdf"
+
+        with pytest.raises(ValueError, match="Max open files must be at least 1"):
+            merge_pdfs([str(sample_pdf), str(sample_pdf_2)], str(output_file), max_open_files=0)
+
+    def test_merge_failure_removes_partial_output(self, sample_pdf, temp_dir):
+        """Test that a merge failing halfway does not leave a truncated file."""
+        broken = temp_dir / "broken.pdf"
+        broken.write_bytes(b"not really a pdf")
+        output_file = temp_dir / "merged.pdf"
+
+        with pytest.raises(Exception):
+            merge_pdfs([str(sample_pdf), str(broken)], str(output_file), max_open_files=1)
+
+        assert not output_file.exists()
+
+    def test_merge_failure_keeps_existing_output(self, sample_pdf, temp_dir):
+        """Test that a failed merge leaves an earlier output and no temporary file."""
+        broken = temp_dir / "broken.pdf"
+        broken.write_bytes(b"not really a pdf")
+        output_file = temp_dir / "merged.pdf"
+        merge_pdfs([str(sample_pdf)], str(output_file))
+        before = output_file.read_bytes()
+
+        with pytest.raises(Exception):
+            merge_pdfs([str(sample_pdf), str(broken)], str(output_file), max_open_files=1)
+
+        assert output_file.read_bytes() == before
+        assert list(temp_dir.glob(".*.tmp")) == []
+
+    def test_merge_append(self, sample_pdf, sample_pdf_2, sample_pdf_3, temp_dir, capsys):
+        """Test that append adds pages without rewriting the existing output."""
+        output_file = temp_dir / "merged.pdf"
+        merge_pdfs([str(sample_pdf), str(sample_pdf_2)], str(output_file))
+        before = output_file.read_bytes()
+
+        merge_pdfs([str(sample_pdf_3)], str(output_file), append=True)
+
+        assert "Successfully appended 1 files" in capsys.readouterr().out
+        assert output_file.read_bytes().startswith(before)
+        reader = PyPDF2.PdfReader(str(output_file))
+        assert len(reader.pages) == 4
+        assert "third test PDF" in reader.pages[3].extract_text()
+
+    def test_merge_append_creates_missing_output(self, sample_pdf, temp_dir):
+        """Test that append to a missing output is a plain merge."""
+        output_file = temp_dir / "new.pdf"
+
+        merge_pdfs([str(sample_pdf)], str(output_file), append=True)
+
+        assert len(PyPDF2.PdfReader(str(output_file)).pages) == 1
+
+    def test_merge_append_to_object_stream_output(self, sample_pdf, sample_pdf_2, temp_dir):
+        """Test appending to an output written with object streams."""
+        output_file = temp_dir / "merged.pdf"
+        merge_pdfs([str(sample_pdf), str(sample_pdf_2)], str(output_file), compression_level='medium')
+        original = output_file.read_bytes()
+
+        merge_pdfs([str(sample_pdf)], str(output_file), compression_level='medium', append=True)
+
+        data = output_file.read_bytes()
+        assert data.startswith(original)
+        reader = PyPDF2.PdfReader(str(output_file))
+        assert len(reader.pages) == 4
+        assert "This is a test PDF" in reader.pages[3].extract_text()
+
+    def test_merge_append_failure_restores_output(self, sample_pdf, temp_dir):
+        """Test that a failed append leaves the original document."""
+        output_file = temp_dir / "merged.pdf"
+        merge_pdfs([str(sample_pdf)], str(output_file))
+        before = output_file.read_bytes()
+        broken = temp_dir / "broken.pdf"
+        broken.write_bytes(b"not really a pdf")
+
+        with pytest.raises(Exception):
+            merge_pdfs([str(sample_pdf), str(broken)], str(output_file), append=True,
+                       max_open_files=1)
+
+        assert output_file.read_bytes() == before
+
+    def test_tree_merge_preserves_order_and_outlines(self, sample_pdf, sample_pdf_2, sample_pdf_3,
+                                                      outlined_pdf, temp_dir):
+        """Test that a tree merge keeps page order and outlines."""
+        output_file = temp_dir / "tree_merged.pdf"
+        input_files = [str(sample_pdf), str(sample_pdf_3), str(outlined_pdf)] * 3 + [str(sample_pdf_2)]
+
+        merge_pdfs(input_files, str(output_file), jobs=2, fan_in=2)
+
+        with open(output_file, 'rb') as f:
+            reader = PyPDF2.PdfReader(f)
+            assert len(reader.pages) == 14
+            assert "This is a test PDF" in reader.pages[0].extract_text()
+            assert "third test PDF" in reader.pages[1].extract_text()
+            assert "second test PDF" in reader.pages[12].extract_text()
+
+            titles = [item['/Title'] for item in reader.outline if not isinstance(item, list)]
+            assert titles == ["Start", "Second"] * 3
+            pages = [reader.get_destination_page_number(item)
+                     for item in reader.outline if not isinstance(item, list)]
+            assert pages == [2, 3, 6, 7, 10, 11]
+
+        # Intermediate documents are cleaned up
+        assert sorted(p.name for p in temp_dir.iterdir() if p.name.startswith('.merge-')) == []
+
+    def test_tree_merge_with_compression(self, image_pdf, sample_pdf, temp_dir, capsys):
+        """Test that a tree merge compresses the original pages."""
+        output_file = temp_dir / "tree_compressed.pdf"
+        input_files = [str(image_pdf), str(sample_pdf), str(sample_pdf)]
+
+        merge_pdfs(input_files, str(output_file), compression_level='medium', jobs=1, fan_in=2)
+
+        output = capsys.readouterr().out
+        assert "Images recompressed" in output
+        assert output_file.stat().st_size < image_pdf.stat().st_size
+        # Only the final output uses object streams
+        assert b'/ObjStm' in output_file.read_bytes()
+
+    def test_merge_invalid_fan_in(self, sample_pdf, sample_pdf_2, temp_dir):
+        """Test merge with a fan-in below two."""
+        output_file = temp_dir / "merged.pdf"
+
+        with pytest.raises(ValueError, match="Fan-in must be at least 2"):
+            merge_pdfs([str(sample_pdf), str(sample_pdf_2)], str(output_file), fan_in=1)
+
+    def test_merge_with_index(self, sample_pdf, sample_pdf_2, temp_dir, capsys):
+        """Test that the index reports the total page count."""
+        output_file = temp_dir / "merged.pdf"
+
+        with PdfIndex(temp_dir / "index.sqlite3") as index:
+            merge_pdfs([str(sample_pdf), str(sample_pdf_2)], str(output_file), index=index)
+
+        assert "Total pages: 3" in capsys.readouterr().out
+
+    def test_merge_with_index_rejects_invalid_input(self, sample_pdf, temp_dir):
+        """Test that unreadable inputs are rejected before writing."""
+        broken = temp_dir / "broken.pdf"
+        broken.write_bytes(b"not a pdf")
+        output_file = temp_dir / "merged.pdf"
+
+        with PdfIndex(temp_dir / "index.sqlite3") as index:
+            with pytest.raises(ValueError, match="File is not a valid PDF"):
+                merge_pdfs([str(sample_pdf), str(broken)], str(output_file), index=index)
+
+        assert not output_file.exists()
@@ -0,0 +1,133 @@
+"""Tests for the plan module."""
+
+import pytest
+from pdf_manager.plan import (
+    Volume,
+    balance,
+    count_pages,
+    load_plan,
+    make_plan,
+    parse_volume_ranges,
+    plan_batches,
+    save_plan,
+    split_by_limits,
+)
+from pdf_manager.scan import PdfFile
+
+
+def _files(sizes):
+    """Build PdfFile records with the given sizes."""
+    return [PdfFile(f"/in/{i:03d}.pdf", f"{i:03d}.pdf", size, 0) for i, size in enumerate(sizes)]
+
+
+def _sizes(batches):
+    return [[f.size for f in batch] for batch in batches]
+
+
+@pytest.mark.unit
+class TestPlan:
+    """Test batch planning."""
+
+    def test_plan_by_file_count(self):
+        """Test the default plan of batch_size files per volume."""
+        batches = plan_batches(_files([1] * 7), batch_size=3)
+
+        assert [len(b) for b in batches] == [3, 3, 1]
+
+    def test_plan_by_bytes(self):
+        """Test that volumes are closed before exceeding the byte limit."""
+        batches = plan_batches(_files([5, 4, 2, 9, 1, 20, 3]), max_volume_bytes=10)
+
+        assert _sizes(batches) == [[5, 4], [2], [9, 1], [20], [3]]
+
+    def test_plan_by_pages(self):
+        """Test planning by page count."""
+        files = _files([1] * 5)
+
+        batches = plan_batches(files, pages=[10, 30, 20, 5, 40], pages_per_volume=50)
+
+        assert [len(b) for b in batches] == [2, 2, 1]
+
+    def test_plan_by_pages_requires_counts(self):
+        """Test that page planning needs page counts."""
+        with pytest.raises(ValueError, match="Page counts are required"):
+            plan_batches(_files([1]), pages_per_volume=10)
+
+    def test_plan_invalid_limits(self):
+        """Test that limits below one are rejected."""
+        with pytest.raises(ValueError, match="Pages per volume must be at least 1"):
+            plan_batches(_files([1]), pages=[1], pages_per_volume=0)
+        with pytest.raises(ValueError, match="Max volume bytes must be at least 1"):
+            plan_batches(_files([1]), max_volume_bytes=0)
+
+    def test_balanced_keeps_count_and_order(self):
+        """Test that balancing evens out volumes without reordering files."""
+        files = _files([100, 1, 1, 1, 1, 1, 1, 1, 1, 100, 1, 1])
+
+        batches = plan_batches(files, batch_size=4, balanced=True)
+
+        assert len(batches) == 3
+        assert [f for batch in batches for f in batch] == files
+        assert max(sum(_sizes([b])[0]) for b in batches) == 102
+
+    def test_balance_minimises_largest_group(self):
+        """Test the linear partition directly."""
+        files = _files([9, 1, 1, 1, 1, 1, 1, 1, 1, 1])
+
+        batches = balance(files, [f.size for f in files], 2)
+
+        assert _sizes(batches) == [[9], [1] * 9]
+
+    def test_split_by_limits_oversized_file(self):
+        """Test that a file over the limit gets its own volume."""
+        files = _files([1, 50, 1])
+
+        batches = split_by_limits(files, [([f.size for f in files], 10)])
+
+        assert _sizes(batches) == [[1], [50], [1]]
+
+    def test_count_pages(self, sample_pdf, sample_pdf_2, non_pdf_file):
+        """Test counting pages, with unreadable files as zero."""
+        assert count_pages([sample_pdf, sample_pdf_2, non_pdf_file]) == [1, 2, 0]
+
+
+@pytest.mark.unit
+class TestPlanFile:
+    """Test reading and writing plan files."""
+
+    def test_plan_round_trip(self, temp_dir):
+        """Test that a saved plan loads back unchanged."""
+        files = _files([1, 2, 3])
+        volumes = [Volume(1, "volume_001.pdf", 1, files[:2]), Volume(2, "volume_002.pdf", 3, files[2:])]
+        plan = make_plan(temp_dir / "in", temp_dir / "out", volumes, {'prefix': ''}, 8)
+        plan_file = temp_dir / "plans" / "plan.json"
+
+        save_plan(plan_file, plan)
+
+        loaded = load_plan(plan_file)
+        assert loaded == plan
+        assert loaded['volumes'][0]['inputs'] == ["000.pdf", "001.pdf"]
+        assert loaded['input_dir'] == str(temp_dir / "in")
+
+    def test_load_plan_invalid(self, temp_dir):
+        """Test loading files that are not plans."""
+        broken = temp_dir / "broken.json"
+        broken.write_text("{not json")
+        other = temp_dir / "other.json"
+        other.write_text('{"version": 99}')
+
+        with pytest.raises(ValueError, match="Invalid plan file"):
+            load_plan(broken)
+        with pytest.raises(ValueError, match="Unsupported plan file"):
+            load_plan(other)
+        with pytest.raises(FileNotFoundError, match="Plan file not found"):
+            load_plan(temp_dir / "missing.json")
+
+    def test_parse_volume_ranges(self):
+        """Test volume selections."""
+        assert parse_volume_ranges("3-5") == {3, 4, 5}
+        assert parse_volume_ranges("1, 4,10-11") == {1, 4, 10, 11}
+
+        for text in ["", "a-3", "5-3", "0"]:
+            with pytest.raises(ValueError, match="Invalid volume range"):
+                parse_volume_ranges(text)
@@ -0,0 +1,64 @@
+"""Tests for the scan module."""
+
+import os
+import pytest
+from pdf_manager.scan import PdfFile, scan_pdfs
+
+
+@pytest.fixture
+def series_directory(temp_dir):
+    """Create a directory tree with PDFs split into subfolders."""
+    for relpath in ["intro.pdf", "notes.txt", "vol1/ch1.pdf", "vol1/ch2.PDF",
+                    "vol2/ch3.pdf", "vol2/extras/bonus.pdf", "drafts/ch4.pdf"]:
+        path = temp_dir / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"%PDF-1.4\n" + relpath.encode())
+    return temp_dir
+
+
+@pytest.mark.unit
+class TestScan:
+    """Test directory scanning."""
+
+    def test_scan_top_level_only(self, series_directory):
+        """Test that only top-level PDFs are found by default."""
+        records = list(scan_pdfs(series_directory))
+
+        assert [r.relpath for r in records] == ["intro.pdf"]
+
+    def test_scan_recursive(self, series_directory):
+        """Test recursive scanning with relative paths."""
+        relpaths = sorted(r.relpath for r in scan_pdfs(series_directory, recursive=True))
+
+        assert relpaths == ["drafts/ch4.pdf", "intro.pdf", "vol1/ch1.pdf", "vol1/ch2.PDF",
+                            "vol2/ch3.pdf", "vol2/extras/bonus.pdf"]
+
+    def test_scan_records_carry_stat(self, series_directory):
+        """Test that records carry the size and mtime of the file."""
+        record = next(scan_pdfs(series_directory))
+        stat = os.stat(record.path)
+
+        assert isinstance(record, PdfFile)
+        assert record.size == stat.st_size
+        assert record.mtime_ns == stat.st_mtime_ns
+
+    def test_scan_include(self, series_directory):
+        """Test include patterns on names and relative paths."""
+        by_name = sorted(r.relpath for r in scan_pdfs(series_directory, recursive=True,
+                                                      include=["ch*"]))
+        by_path = sorted(r.relpath for r in scan_pdfs(series_directory, recursive=True,
+                                                      include=["vol1/*"]))
+
+        assert by_name == ["drafts/ch4.pdf", "vol1/ch1.pdf", "vol1/ch2.PDF", "vol2/ch3.pdf"]
+        assert by_path == ["vol1/ch1.pdf", "vol1/ch2.PDF"]
+
+    def test_scan_exclude_prunes_directories(self, series_directory):
+        """Test that excluded directories are not descended into."""
+        relpaths = sorted(r.relpath for r in scan_pdfs(series_directory, recursive=True,
+                                                       exclude=["drafts", "extras", "intro.pdf"]))
+
+        assert relpaths == ["vol1/ch1.pdf", "vol1/ch2.PDF", "vol2/ch3.pdf"]
+
+    def test_scan_missing_directory(self, temp_dir):
+        """Test that a missing directory yields nothing."""
+        assert list(scan_pdfs(temp_dir / "missing")) == []
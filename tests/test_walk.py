@@ -1,9 +1,20 @@
 """Tests for the walk module."""
 
+import json
 import pytest
+import PyPDF2
+import os
+import shutil
+import subprocess
+import sys
 from pathlib import Path
 from unittest.mock import patch
-from pdf_manager.walk import walk_pdfs, natural_sort_key
+from pdf_manager.index import PdfIndex
+from pdf_manager.manifest import JOURNAL_FILENAME, MANIFEST_FILENAME
+from pdf_manager.merge import merge_pdfs
+from pdf_manager.plan import load_plan
+from pdf_manager.walk import execute_plan, walk_pdfs, natural_sort_key
+from pdf_manager.workqueue import WORK_DIRNAME, WorkQueue
 
 
 @pytest.mark.unit
@@ -434,6 +445,521 @@ class TestWalk:
             chap_1_idx = chapter_lines.index(chap_1_line)
             assert chap_100_idx < chap_1_idx, "Descending order not working correctly"
 
+    def test_walk_parallel_jobs(self, pdf_directory, temp_dir, capsys):
+        """Test that parallel volume building keeps volume order and output order."""
+        output_dir = temp_dir / "output_parallel"
+
+        result = walk_pdfs(str(pdf_directory), str(output_dir), batch_size=2, jobs=3)
+
+        captured = capsys.readouterr()
+        output = captured.out
+
+        assert [v.name for v in result] == [f"volume_{i:03d}.pdf" for i in range(1, 5)]
+        assert all(v.exists() for v in result)
+
+        # Each volume's merge message is printed after its own header
+        headers = [output.index(f"Creating Volume {i:3d}") for i in range(1, 5)]
+        merged = [output.index(f"into {v}") for v in result]
+        assert headers == sorted(headers)
+        for i in range(3):
+            assert headers[i] < merged[i] < headers[i + 1]
+
+    def test_walk_parallel_failure_isolated(self, pdf_directory, temp_dir, capsys):
+        """Test that a failing volume does not stop the other volumes."""
+        output_dir = temp_dir / "output_failure"
+        (pdf_directory / "document_03.pdf").write_bytes(b"not really a pdf")
+
+        result = walk_pdfs(str(pdf_directory), str(output_dir), batch_size=2, jobs=2)
+
+        captured = capsys.readouterr()
+
+        assert "Error creating volume" in captured.out
+        assert len(result) == 3
+        assert all(v.exists() for v in result)
+
+    def test_walk_invalid_jobs(self, pdf_directory, temp_dir):
+        """Test walking with invalid number of jobs."""
+        output_dir = temp_dir / "output"
+
+        with pytest.raises(ValueError, match="Jobs must be at least 1"):
+            walk_pdfs(str(pdf_directory), str(output_dir), jobs=0)
+
+    def test_walk_invalid_max_open_files(self, pdf_directory, temp_dir):
+        """Test walking with an invalid open file limit."""
+        output_dir = temp_dir / "output"
+
+        with pytest.raises(ValueError, match="Max open files must be at least 1"):
+            walk_pdfs(str(pdf_directory), str(output_dir), max_open_files=0)
+
+    def test_walk_max_open_files(self, pdf_directory, temp_dir):
+        """Test that volumes built one open input at a time keep every page."""
+        output_dir = temp_dir / "output_streamed"
+
+        result = walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=1,
+                           max_open_files=1)
+
+        assert len(result) == 3
+        with open(result[0], 'rb') as f:
+            assert len(PyPDF2.PdfReader(f).pages) == 3
+
+    def test_walk_rerun_skips_unchanged_volumes(self, pdf_directory, temp_dir, capsys):
+        """Test that a rerun skips volumes whose inputs did not change."""
+        output_dir = temp_dir / "output_incremental"
+        walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=1)
+        capsys.readouterr()
+
+        result = walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=1)
+
+        captured = capsys.readouterr()
+        assert captured.out.count("Volume up to date") == 3
+        assert "Successfully merged" not in captured.out
+        assert len(result) == 3
+
+    def test_walk_rerun_rebuilds_changed_volume(self, pdf_directory, temp_dir, capsys):
+        """Test that only the volume with a new input is rebuilt."""
+        output_dir = temp_dir / "output_incremental"
+        walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=1)
+        capsys.readouterr()
+
+        # "zz" sorts last, so only the trailing volume changes
+        (pdf_directory / "zz_extra.pdf").write_bytes((pdf_directory / "sample.pdf").read_bytes())
+        result = walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=1)
+
+        captured = capsys.readouterr()
+        assert captured.out.count("Volume up to date") == 2
+        assert captured.out.count("Successfully merged") == 1
+        assert len(result) == 3
+
+    def test_walk_force_rebuilds_all_volumes(self, pdf_directory, temp_dir, capsys):
+        """Test that force rebuilds volumes the manifest considers current."""
+        output_dir = temp_dir / "output_incremental"
+        walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=1)
+        capsys.readouterr()
+
+        walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=1, force=True)
+
+        captured = capsys.readouterr()
+        assert "Volume up to date" not in captured.out
+        assert captured.out.count("Successfully merged") == 3
+
+    def test_walk_recursive(self, sample_pdf, sample_pdf_3, temp_dir, capsys):
+        """Test walking subfolders in natural order of their relative paths."""
+        input_dir = temp_dir / "series"
+        for relpath, source in [("Vol 10/ch1.pdf", sample_pdf_3), ("Vol 2/ch1.pdf", sample_pdf),
+                                ("Vol 2/ch2.pdf", sample_pdf), ("Vol 2/skip.pdf", sample_pdf)]:
+            target = input_dir / relpath
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy(source, target)
+        output_dir = input_dir / "volumes"
+
+        result = walk_pdfs(str(input_dir), str(output_dir), batch_size=10, jobs=1,
+                           recursive=True, exclude=["skip*"])
+
+        output = capsys.readouterr().out
+        assert "1. Vol 2/ch1.pdf" in output
+        assert "3. Vol 10/ch1.pdf" in output
+        assert "skip.pdf" not in output
+        with open(result[0], 'rb') as f:
+            reader = PyPDF2.PdfReader(f)
+            assert len(reader.pages) == 3
+            assert "third test PDF" in reader.pages[2].extract_text()
+
+        # Volumes written inside the input tree are not picked up as inputs
+        walk_pdfs(str(input_dir), str(output_dir), batch_size=10, jobs=1, recursive=True,
+                  exclude=["skip*"])
+        assert "Volume up to date" in capsys.readouterr().out
+
+    def test_walk_include(self, pdf_directory, temp_dir, capsys):
+        """Test that include patterns select the files to walk."""
+        output_dir = temp_dir / "output_include"
+
+        walk_pdfs(str(pdf_directory), str(output_dir), batch_size=10, jobs=1,
+                  include=["document_0[12].pdf"])
+
+        assert "Processing 2 PDF files" in capsys.readouterr().out
+
+    def test_walk_with_index(self, pdf_directory, temp_dir, capsys):
+        """Test that the index supplies page counts to the listing and summary."""
+        output_dir = temp_dir / "output_indexed"
+
+        with PdfIndex(temp_dir / "index.sqlite3") as index:
+            walk_pdfs(str(pdf_directory), str(output_dir), batch_size=10, jobs=1, index=index)
+
+        output = capsys.readouterr().out
+        assert "sample2.pdf (2 pages," in output
+        assert "Total pages: 9" in output
+
+    def test_walk_pages_per_volume(self, pdf_directory, temp_dir, capsys):
+        """Test that volumes are cut by page count."""
+        output_dir = temp_dir / "output_pages"
+
+        result = walk_pdfs(str(pdf_directory), str(output_dir), jobs=1, pages_per_volume=4)
+
+        output = capsys.readouterr().out
+        assert "Pages per volume: 4" in output
+        page_counts = []
+        for volume in result:
+            with open(volume, 'rb') as f:
+                page_counts.append(len(PyPDF2.PdfReader(f).pages))
+        assert sum(page_counts) == 9
+        assert max(page_counts) <= 4
+
+    def test_walk_max_volume_bytes_balanced(self, pdf_directory, temp_dir, capsys):
+        """Test byte-limited, balanced volumes keep file order."""
+        output_dir = temp_dir / "output_bytes"
+        sizes = sorted(f.stat().st_size for f in pdf_directory.glob("*.pdf"))
+
+        result = walk_pdfs(str(pdf_directory), str(output_dir), jobs=1,
+                           max_volume_bytes=sum(sizes[-3:]), balanced=True)
+
+        output = capsys.readouterr().out
+        assert "balanced" in output
+        assert len(result) == 3
+        assert output.index("document_01.pdf") < output.index("document_05.pdf") < output.index("sample.pdf")
+
+    def test_walk_plan_only(self, pdf_directory, temp_dir):
+        """Test that a plan is written without building volumes."""
+        output_dir = temp_dir / "output_plan"
+        plan_file = temp_dir / "plan.json"
+
+        plan = walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, prefix="p_",
+                         plan_file=str(plan_file))
+
+        assert load_plan(plan_file) == plan
+        assert [v['name'] for v in plan['volumes']] == ["p_volume_001.pdf", "p_volume_002.pdf",
+                                                        "p_volume_003.pdf"]
+        assert plan['volumes'][0]['inputs'] == ["document_01.pdf", "document_02.pdf", "document_03.pdf"]
+        assert plan['options']['prefix'] == "p_"
+        assert list(output_dir.glob("*.pdf")) == []
+
+    def test_walk_plan_only_interactive(self, pdf_directory, temp_dir):
+        """Test that a plan cannot be written interactively."""
+        with pytest.raises(ValueError, match="Interactive mode cannot be used to write a plan"):
+            walk_pdfs(str(pdf_directory), str(temp_dir / "out"), interactive=True,
+                      plan_file=str(temp_dir / "plan.json"))
+
+    def test_execute_plan_subset(self, pdf_directory, temp_dir, capsys):
+        """Test building part of a plan, then the rest."""
+        output_dir = temp_dir / "output_execute"
+        plan_file = temp_dir / "plan.json"
+        walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, plan_file=str(plan_file))
+        capsys.readouterr()
+
+        result = execute_plan(str(plan_file), volumes={2, 3}, jobs=1)
+
+        output = capsys.readouterr().out
+        assert [v.name for v in result] == ["volume_002.pdf", "volume_003.pdf"]
+        assert not (output_dir / "volume_001.pdf").exists()
+        assert "Files   4-  6" in output
+
+        execute_plan(str(plan_file), jobs=1)
+
+        output = capsys.readouterr().out
+        assert output.count("Volume up to date") == 2
+        assert (output_dir / "volume_001.pdf").exists()
+
+    def test_execute_plan_relocated_input(self, pdf_directory, temp_dir):
+        """Test executing a plan against inputs in another directory."""
+        plan_file = temp_dir / "plan.json"
+        walk_pdfs(str(pdf_directory), str(temp_dir / "unused"), batch_size=3, plan_file=str(plan_file))
+        moved = temp_dir / "moved"
+        moved.mkdir()
+        for pdf in pdf_directory.glob("*.pdf"):
+            shutil.copy(pdf, moved / pdf.name)
+        output_dir = temp_dir / "elsewhere"
+
+        result = execute_plan(str(plan_file), volumes={1}, jobs=1, input_dir=str(moved),
+                              output_dir=str(output_dir))
+
+        assert result == [output_dir / "volume_001.pdf"]
+        assert result[0].exists()
+
+    def test_execute_plan_missing_input(self, pdf_directory, temp_dir):
+        """Test that a planned input that disappeared is reported."""
+        plan_file = temp_dir / "plan.json"
+        walk_pdfs(str(pdf_directory), str(temp_dir / "out"), batch_size=3, plan_file=str(plan_file))
+        (pdf_directory / "document_02.pdf").unlink()
+
+        with pytest.raises(FileNotFoundError, match="Input file not found"):
+            execute_plan(str(plan_file), jobs=1)
+
+    def test_walk_resume_after_interruption(self, pdf_directory, temp_dir, capsys):
+        """Test that an interrupted walk continues where it stopped, with its plan."""
+        output_dir = temp_dir / "output_resume"
+        real_merge = merge_pdfs
+        calls = []
+
+        def merge_then_die(*args, **kwargs):
+            calls.append(args[1])
+            if len(calls) == 3:
+                raise KeyboardInterrupt
+            return real_merge(*args, **kwargs)
+
+        with patch('pdf_manager.walk.merge_pdfs', side_effect=merge_then_die):
+            with pytest.raises(KeyboardInterrupt):
+                walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=1)
+
+        assert (output_dir / JOURNAL_FILENAME).exists()
+        assert not (output_dir / "volume_003.pdf").exists()
+        # A new file would change the plan of a fresh run
+        shutil.copy(pdf_directory / "document_01.pdf", pdf_directory / "document_00.pdf")
+        capsys.readouterr()
+
+        result = walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=1, resume=True)
+
+        output = capsys.readouterr().out
+        assert "2 of 3 volume(s) already finished" in output
+        assert output.count("Volume up to date, skipped") == 2
+        assert "document_00.pdf" not in output
+        assert len(result) == 3
+        assert not (output_dir / JOURNAL_FILENAME).exists()
+        assert list(output_dir.glob(".*.tmp")) == []
+
+    def test_walk_resume_removes_partial_volumes(self, pdf_directory, temp_dir, capsys):
+        """Test that resuming deletes what a killed build left behind."""
+        output_dir = temp_dir / "output_resume"
+        real_merge = merge_pdfs
+        calls = []
+
+        def merge_then_die(*args, **kwargs):
+            calls.append(args[1])
+            if len(calls) == 2:
+                # As far as a SIGKILL gets: the temporary file is written,
+                # nothing cleans it up
+                (output_dir / ".volume_002.pdf.k1ll3d.tmp").write_bytes(b"%PDF-1.3 partial")
+                raise SystemExit(-9)
+            return real_merge(*args, **kwargs)
+
+        with patch('pdf_manager.walk.merge_pdfs', side_effect=merge_then_die):
+            with pytest.raises(SystemExit):
+                walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=1)
+        # Another volume's leftovers of an earlier crash
+        (output_dir / ".volume_003.pdf.0ld3r.tmp").write_bytes(b"%PDF-1.3 partial")
+        (output_dir / ".unrelated.pdf.keep.tmp").write_bytes(b"not a volume")
+        capsys.readouterr()
+
+        result = walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=1, resume=True)
+
+        output = capsys.readouterr().out
+        assert "Removed 2 partial volume file(s)" in output
+        assert len(result) == 3
+        assert [p.name for p in output_dir.glob(".*.tmp")] == [".unrelated.pdf.keep.tmp"]
+
+    def test_walk_resume_without_journal(self, pdf_directory, temp_dir, capsys):
+        """Test that resuming with nothing to resume starts a new walk."""
+        result = walk_pdfs(str(pdf_directory), str(temp_dir / "out"), batch_size=3, jobs=1,
+                           resume=True)
+
+        assert "No interrupted walk to resume" in capsys.readouterr().out
+        assert len(result) == 3
+
+    def test_walk_rerun_uses_journal(self, pdf_directory, temp_dir, capsys):
+        """Test that volumes journaled before a crash are not rebuilt by a plain rerun."""
+        output_dir = temp_dir / "output_journal"
+        real_merge = merge_pdfs
+
+        def die_on_second(*args, **kwargs):
+            if args[1].endswith("volume_002.pdf"):
+                raise KeyboardInterrupt
+            return real_merge(*args, **kwargs)
+
+        with patch('pdf_manager.walk.merge_pdfs', side_effect=die_on_second):
+            with pytest.raises(KeyboardInterrupt):
+                walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=1)
+        capsys.readouterr()
+
+        walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=1)
+
+        output = capsys.readouterr().out
+        assert "Volumes created: 2" in output
+        assert "Volumes up to date (skipped): 1" in output
+
+    def test_walk_append_extends_last_volume(self, pdf_directory, sample_pdf, temp_dir, capsys):
+        """Test that a new trailing file is appended to the last volume in place."""
+        output_dir = temp_dir / "output_append"
+        walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=1)
+        last = output_dir / "volume_003.pdf"
+        before = last.read_bytes()
+        pages_before = len(PyPDF2.PdfReader(str(last)).pages)
+        shutil.copy(sample_pdf, pdf_directory / "zz_chapter.pdf")
+        capsys.readouterr()
+
+        walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=1, append=True)
+
+        output = capsys.readouterr().out
+        assert "Appending 1 new file(s) to the existing volume" in output
+        assert "Volumes up to date (skipped): 2" in output
+        assert last.read_bytes().startswith(before)
+        assert len(PyPDF2.PdfReader(str(last)).pages) == pages_before + 1
+
+        # The manifest now describes the extended volume
+        walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=2, append=True)
+        assert "Volumes up to date (skipped): 3" in capsys.readouterr().out
+
+    def test_walk_linearize(self, pdf_directory, temp_dir, capsys):
+        """Test that linearized volumes are rebuilt when the option changes."""
+        output_dir = temp_dir / "output_linear"
+        walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=1)
+        capsys.readouterr()
+
+        volumes = walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=2, linearize=True)
+
+        assert "Volumes up to date (skipped)" not in capsys.readouterr().out
+        for volume in volumes:
+            assert b'/Linearized 1' in volume.read_bytes()[:1024]
+
+        walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=1, linearize=True)
+        assert "Volumes up to date (skipped): 3" in capsys.readouterr().out
+
+        with pytest.raises(ValueError, match="Linearize cannot be combined with append"):
+            walk_pdfs(str(pdf_directory), str(output_dir), linearize=True, append=True)
+
+    def test_walk_workers_share_volumes(self, pdf_directory, temp_dir, capsys):
+        """Test that a second worker only builds what the first one left."""
+        output_dir = temp_dir / "output_worker"
+        queue = WorkQueue(output_dir)
+        # Another worker is busy with volume 2
+        assert queue.claim("volume_002.pdf")
+
+        first = walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=1,
+                          worker=True, lease_timeout=1)
+
+        output = capsys.readouterr().out
+        assert sorted(p.name for p in first) == ["volume_001.pdf", "volume_002.pdf", "volume_003.pdf"]
+        # The abandoned lease went stale and was taken over
+        assert "Volumes built by this worker: 3" in output
+        assert "All 3 volume(s) finished" in output
+        assert not (output_dir / WORK_DIRNAME).exists()
+
+        second = walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=1, worker=True)
+
+        output = capsys.readouterr().out
+        assert len(second) == 3
+        assert "Volumes built by this worker: 0" in output
+        assert "Volumes up to date (skipped): 3" in output
+
+    def test_walk_worker_adopts_shared_plan(self, pdf_directory, temp_dir, capsys):
+        """Test that a joining worker follows the plan already published."""
+        output_dir = temp_dir / "output_worker"
+        walk_pdfs(str(pdf_directory), str(temp_dir / "unused"), batch_size=4,
+                  plan_file=str(temp_dir / "plan.json"))
+        queue = WorkQueue(output_dir)
+        queue.publish_plan(load_plan(temp_dir / "plan.json"))
+        capsys.readouterr()
+
+        result = walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=1, worker=True)
+
+        output = capsys.readouterr().out
+        assert "Joining the shared plan" in output
+        assert sorted(p.name for p in result) == ["volume_001.pdf", "volume_002.pdf"]
+
+    def test_walk_worker_rerun_after_failure(self, sample_pdf, temp_dir, capsys):
+        """Test that a rerun with other inputs replaces the plan a failed run left."""
+        input_dir = temp_dir / "series"
+        output_dir = temp_dir / "output_worker"
+        input_dir.mkdir()
+        for number in range(1, 4):
+            shutil.copy(sample_pdf, input_dir / f"chap {number}.pdf")
+        (input_dir / "chap 4.pdf").write_bytes(b"%PDF-1.4 not really")
+
+        walk_pdfs(str(input_dir), str(output_dir), batch_size=1, jobs=1, worker=True)
+
+        assert "Volumes failed: 1" in capsys.readouterr().out
+        assert (output_dir / WORK_DIRNAME).exists()
+
+        (input_dir / "chap 4.pdf").unlink()
+        shutil.copy(sample_pdf, input_dir / "chap 5.pdf")
+        result = walk_pdfs(str(input_dir), str(output_dir), batch_size=1, jobs=1, worker=True)
+
+        output = capsys.readouterr().out
+        assert "Discarding the shared plan" in output
+        assert "Joining" not in output
+        assert sorted(p.name for p in result) == [f"volume_00{n}.pdf" for n in range(1, 5)]
+        assert "All 4 volume(s) finished" in output
+        assert not (output_dir / WORK_DIRNAME).exists()
+
+    def test_walk_worker_retries_failed_volume(self, sample_pdf, temp_dir, capsys):
+        """Test that a rerun of the same plan builds the volume that failed."""
+        input_dir = temp_dir / "series"
+        output_dir = temp_dir / "output_worker"
+        input_dir.mkdir()
+        shutil.copy(sample_pdf, input_dir / "chap 1.pdf")
+        (input_dir / "chap 2.pdf").write_bytes(b"%PDF-1.4 not really")
+        walk_pdfs(str(input_dir), str(output_dir), batch_size=1, jobs=1, worker=True)
+        capsys.readouterr()
+
+        shutil.copy(sample_pdf, input_dir / "chap 2.pdf")
+        result = walk_pdfs(str(input_dir), str(output_dir), batch_size=1, jobs=1, worker=True)
+
+        output = capsys.readouterr().out
+        assert "Joining the shared plan" in output
+        assert "Volumes built by this worker: 1" in output
+        assert [p.name for p in result] == ["volume_002.pdf"]
+        assert (output_dir / "volume_001.pdf").exists()
+        assert not (output_dir / WORK_DIRNAME).exists()
+
+    def test_walk_worker_keeps_running_plan(self, pdf_directory, temp_dir, capsys):
+        """Test that a plan other workers are building is joined even if inputs changed."""
+        output_dir = temp_dir / "output_worker"
+        walk_pdfs(str(pdf_directory), str(temp_dir / "unused"), batch_size=4,
+                  plan_file=str(temp_dir / "plan.json"))
+        queue = WorkQueue(output_dir)
+        queue.publish_plan(load_plan(temp_dir / "plan.json"))
+        # A running worker is busy with volume 1
+        assert queue.claim("volume_001.pdf")
+        shutil.copy(pdf_directory / "document_01.pdf", pdf_directory / "document_00.pdf")
+        capsys.readouterr()
+
+        result = walk_pdfs(str(pdf_directory), str(output_dir), batch_size=4, jobs=1, worker=True,
+                           lease_timeout=1)
+
+        output = capsys.readouterr().out
+        assert "Joining the shared plan" in output
+        assert "document_00.pdf" not in output
+        assert sorted(p.name for p in result) == ["volume_001.pdf", "volume_002.pdf"]
+
+    def test_walk_worker_reset_queue(self, pdf_directory, temp_dir, capsys):
+        """Test that --reset-queue discards a shared plan even while it has leases."""
+        output_dir = temp_dir / "output_worker"
+        walk_pdfs(str(pdf_directory), str(temp_dir / "unused"), batch_size=4,
+                  plan_file=str(temp_dir / "plan.json"))
+        queue = WorkQueue(output_dir)
+        queue.publish_plan(load_plan(temp_dir / "plan.json"))
+        assert queue.claim("volume_001.pdf")
+        capsys.readouterr()
+
+        result = walk_pdfs(str(pdf_directory), str(output_dir), batch_size=3, jobs=1, worker=True,
+                           reset_queue=True)
+
+        assert "Joining" not in capsys.readouterr().out
+        assert sorted(p.name for p in result) == ["volume_001.pdf", "volume_002.pdf", "volume_003.pdf"]
+        with pytest.raises(ValueError, match="Reset queue only applies to worker mode"):
+            walk_pdfs(str(pdf_directory), str(output_dir), reset_queue=True)
+
+    def test_walk_worker_interactive(self, pdf_directory, temp_dir):
+        """Test that worker mode rejects interactive mode."""
+        with pytest.raises(ValueError, match="Worker mode cannot be combined"):
+            walk_pdfs(str(pdf_directory), str(temp_dir / "out"), interactive=True, worker=True)
+
+    def test_walk_concurrent_workers(self, pdf_directory, temp_dir):
+        """Test that workers running at the same time all finish cleanly."""
+        output_dir = temp_dir / "output_worker"
+        env = dict(os.environ, PYTHONPATH=str(Path(__file__).resolve().parents[1]))
+        command = [sys.executable, '-m', 'pdf_manager.cli', 'walk', str(pdf_directory), str(output_dir),
+                   '--batch-size', '1', '--jobs', '1', '--worker', '--lease-timeout', '5']
+
+        for _ in range(3):
+            workers = [subprocess.Popen(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+                       for _ in range(3)]
+            outputs = [worker.communicate(timeout=120)[0].decode() for worker in workers]
+
+            assert [worker.returncode for worker in workers] == [0, 0, 0], outputs
+            assert not any("Traceback" in output or "Error" in output for output in outputs), outputs
+            assert not (output_dir / WORK_DIRNAME).exists()
+            assert len(list(output_dir.glob("volume_*.pdf"))) == 8
+            assert len(json.loads((output_dir / MANIFEST_FILENAME).read_text())['volumes']) == 8
+            shutil.rmtree(output_dir)
+
 
 @pytest.mark.unit
 class TestWalkInteractive:
@@ -0,0 +1,101 @@
+"""Tests for the watch module."""
+
+import shutil
+import threading
+import pytest
+from pdf_manager.watch import InotifyWatcher, PollingWatcher, make_watcher, watch_walk
+
+
+def _inotify_available(directory):
+    try:
+        InotifyWatcher(directory).close()
+    except OSError:
+        return False
+    return True
+
+
+@pytest.mark.unit
+class TestWatchers:
+    """Test change detection in the input directory."""
+
+    def test_polling_detects_new_pdf(self, pdf_directory, sample_pdf):
+        """Test that polling notices an added PDF and nothing else."""
+        watcher = PollingWatcher(pdf_directory, interval=0.05)
+
+        assert not watcher.wait(0.2)
+
+        (pdf_directory / "notes.txt").write_text("not a pdf")
+        assert not watcher.wait(0.2)
+
+        shutil.copy(sample_pdf, pdf_directory / "document_09.pdf")
+        assert watcher.wait(1)
+
+    def test_inotify_detects_new_pdf(self, pdf_directory, sample_pdf):
+        """Test that inotify notices an added PDF and ignores other files."""
+        if not _inotify_available(pdf_directory):
+            pytest.skip("inotify not available")
+        watcher = InotifyWatcher(pdf_directory)
+        try:
+            (pdf_directory / "notes.txt").write_text("not a pdf")
+            assert not watcher.wait(0.2)
+
+            shutil.copy(sample_pdf, pdf_directory / "document_09.pdf")
+            assert watcher.wait(1)
+        finally:
+            watcher.close()
+
+    def test_inotify_recursive_ignores_output(self, pdf_directory, sample_pdf):
+        """Test that new subdirectories are watched and the output directory is not."""
+        if not _inotify_available(pdf_directory):
+            pytest.skip("inotify not available")
+        output_dir = pdf_directory / "volumes"
+        output_dir.mkdir()
+        watcher = InotifyWatcher(pdf_directory, recursive=True, ignore=output_dir)
+        try:
+            shutil.copy(sample_pdf, output_dir / "volume_001.pdf")
+            assert not watcher.wait(0.2)
+
+            (pdf_directory / "arc2").mkdir()
+            assert watcher.wait(1)
+            shutil.copy(sample_pdf, pdf_directory / "arc2" / "chapter_01.pdf")
+            assert watcher.wait(1)
+        finally:
+            watcher.close()
+
+    def test_make_watcher_polling(self, pdf_directory):
+        """Test that polling can be forced."""
+        assert isinstance(make_watcher(pdf_directory, polling=True), PollingWatcher)
+
+
+@pytest.mark.unit
+class TestWatchWalk:
+    """Test keeping volumes up to date while watching."""
+
+    def test_new_chapter_updates_last_volume(self, pdf_directory, sample_pdf, temp_dir, capsys):
+        """Test that a burst of arrivals rebuilds only the affected volume, once."""
+        output_dir = temp_dir / "output_watch"
+
+        def arrive():
+            # Sorted after every existing file, like a new chapter
+            shutil.copy(sample_pdf, pdf_directory / "zz_chapter_01.pdf")
+            shutil.copy(sample_pdf, pdf_directory / "zz_chapter_02.pdf")
+
+        timer = threading.Timer(0.5, arrive)
+        timer.start()
+        try:
+            watch_walk(str(pdf_directory), str(output_dir), debounce=0.3, poll_interval=0.05,
+                       polling=True, max_updates=1, batch_size=3, jobs=1)
+        finally:
+            timer.cancel()
+
+        output = capsys.readouterr().out
+        update = output.split("Changes detected")[1]
+        assert output.count("Changes detected") == 1
+        assert "Volumes created: 2" in update
+        assert "Volumes up to date (skipped): 2" in update
+        assert (output_dir / "volume_004.pdf").exists()
+
+    def test_watch_rejects_plan_only(self, pdf_directory, temp_dir):
+        """Test that watch mode cannot write a plan."""
+        with pytest.raises(ValueError, match="Watch mode cannot be combined"):
+            watch_walk(str(pdf_directory), str(temp_dir / "out"), plan_file=str(temp_dir / "plan.json"))
@@ -0,0 +1,87 @@
+"""Tests for the workqueue module."""
+
+import os
+import time
+import pytest
+from pdf_manager.workqueue import WORK_DIRNAME, WorkQueue
+
+
+@pytest.mark.unit
+class TestWorkQueue:
+    """Test lease-based claiming of volumes."""
+
+    def test_claim_is_exclusive(self, temp_dir):
+        """Test that only one worker gets a lease."""
+        first = WorkQueue(temp_dir)
+        second = WorkQueue(temp_dir)
+
+        assert first.claim("volume_001.pdf")
+        assert not second.claim("volume_001.pdf")
+        assert second.claim("volume_002.pdf")
+
+    def test_release_allows_new_claim(self, temp_dir):
+        """Test that a released lease can be claimed again."""
+        first = WorkQueue(temp_dir)
+        second = WorkQueue(temp_dir)
+        first.claim("volume_001.pdf")
+
+        first.release("volume_001.pdf")
+
+        assert second.claim("volume_001.pdf")
+
+    def test_stale_lease_is_reclaimed(self, temp_dir):
+        """Test that a lease nobody renewed is taken over."""
+        first = WorkQueue(temp_dir, lease_timeout=60)
+        second = WorkQueue(temp_dir, lease_timeout=60)
+        first.claim("volume_001.pdf")
+        lease = temp_dir / WORK_DIRNAME / "volume_001.pdf.lease"
+        past = time.time() - 120
+        os.utime(lease, (past, past))
+
+        assert second.claim("volume_001.pdf")
+        assert lease.stat().st_mtime > past
+        assert list((temp_dir / WORK_DIRNAME).glob("*.stale")) == []
+
+    def test_heartbeat_keeps_lease_fresh(self, temp_dir):
+        """Test that a held lease is touched while the queue is active."""
+        queue = WorkQueue(temp_dir, lease_timeout=60, heartbeat=0.05)
+        queue.claim("volume_001.pdf")
+        lease = temp_dir / WORK_DIRNAME / "volume_001.pdf.lease"
+        past = time.time() - 120
+        os.utime(lease, (past, past))
+
+        with queue:
+            time.sleep(0.3)
+            assert lease.stat().st_mtime > past
+
+        # Leaving the queue releases what it still holds
+        assert not lease.exists()
+
+    def test_done_volumes_are_not_claimed(self, temp_dir):
+        """Test that finished volumes are recorded and skipped."""
+        queue = WorkQueue(temp_dir)
+        queue.claim("volume_001.pdf")
+        queue.mark_done("volume_001.pdf", {'output': {'size': 1}})
+        queue.release("volume_001.pdf")
+
+        assert not WorkQueue(temp_dir).claim("volume_001.pdf")
+        assert queue.done_entries() == {"volume_001.pdf": {'output': {'size': 1}}}
+        assert queue.all_done(["volume_001.pdf"])
+        assert not queue.all_done(["volume_001.pdf", "volume_002.pdf"])
+
+    def test_first_plan_wins(self, temp_dir):
+        """Test that later workers adopt the first published plan."""
+        first, published = WorkQueue(temp_dir).publish_plan({'volumes': [1]})
+        second, second_published = WorkQueue(temp_dir).publish_plan({'volumes': [2]})
+
+        assert published and not second_published
+        assert first == second == {'volumes': [1]}
+
+    def test_remove(self, temp_dir):
+        """Test that the work directory is deleted."""
+        queue = WorkQueue(temp_dir)
+        queue.claim("volume_001.pdf")
+
+        queue.remove()
+
+        assert not (temp_dir / WORK_DIRNAME).exists()
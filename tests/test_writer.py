@@ -0,0 +1,244 @@
+"""Tests for the low-level merge writer."""
+
+import io
+import zlib
+import pytest
+import PyPDF2
+from PyPDF2.generic import DecodedStreamObject, NameObject
+from reportlab.pdfgen import canvas
+from pdf_manager.writer import MergeWriter, tighten_stream
+
+
+def _merge(paths, **kwargs):
+    """Merge ``paths`` into memory and return (writer, reader, bytes)."""
+    buffer = io.BytesIO()
+    writer = MergeWriter(buffer, **kwargs)
+    for path in paths:
+        writer.append(PyPDF2.PdfReader(str(path)))
+    writer.close()
+    buffer.seek(0)
+    return writer, PyPDF2.PdfReader(buffer), buffer.getvalue()
+
+
+@pytest.mark.unit
+class TestMergeWriter:
+    """Test MergeWriter."""
+
+    def test_copies_pages_in_order(self, sample_pdf, sample_pdf_2):
+        """Test that pages from several readers are appended in order."""
+        _, reader, _ = _merge([sample_pdf_2, sample_pdf])
+
+        assert len(reader.pages) == 3
+        assert "second test PDF" in reader.pages[0].extract_text()
+        assert "This is a test PDF" in reader.pages[2].extract_text()
+
+    def test_identical_streams_written_once(self, image_pdf):
+        """Test that the same image from two inputs is stored once."""
+        writer, reader, data = _merge([image_pdf, image_pdf])
+
+        assert len(reader.pages) == 4
+        assert writer.streams_deduplicated >= 2
+        assert len(data) < image_pdf.stat().st_size * 1.2
+
+        first = reader.pages[0]['/Resources']['/XObject']
+        third = reader.pages[2]['/Resources']['/XObject']
+        assert list(first.values())[0].idnum == list(third.values())[0].idnum
+
+    def test_dedupe_disabled(self, image_pdf):
+        """Test that deduplication can be turned off."""
+        writer, _, data = _merge([image_pdf, image_pdf], dedupe=False)
+
+        assert writer.streams_deduplicated == 0
+        assert len(data) > image_pdf.stat().st_size * 1.8
+
+    def test_outline_preserved(self, outlined_pdf, sample_pdf):
+        """Test that outlines are copied and point at the right pages."""
+        _, reader, _ = _merge([sample_pdf, outlined_pdf])
+        outline = reader.outline
+
+        assert [item['/Title'] for item in outline if not isinstance(item, list)] == ["Start", "Second"]
+        assert reader.get_destination_page_number(outline[0]) == 1
+        assert reader.get_destination_page_number(outline[1]) == 2
+        assert outline[2][0]['/Title'] == "Child"
+
+    def test_empty_document(self):
+        """Test writing a document without pages."""
+        _, reader, _ = _merge([])
+
+        assert len(reader.pages) == 0
+
+    def test_objects_written_after_each_append(self, image_pdf, sample_pdf):
+        """Test that an input's objects are written out and released on append."""
+        buffer = io.BytesIO()
+        writer = MergeWriter(buffer)
+
+        writer.append(PyPDF2.PdfReader(str(image_pdf)))
+        written = buffer.tell()
+        writer.append(PyPDF2.PdfReader(str(sample_pdf)))
+
+        assert written > image_pdf.stat().st_size * 0.9
+        assert buffer.tell() > written
+        # Only the page tree node waits for close()
+        assert len(writer._pending) == 1
+
+    def test_header_uses_highest_input_version(self, sample_pdf, temp_dir):
+        """Test that the header is patched to the newest input version."""
+        data = sample_pdf.read_bytes()
+        newer = temp_dir / "newer.pdf"
+        newer.write_bytes(b'%PDF-1.7' + data[8:])
+
+        _, reader, output = _merge([sample_pdf, newer])
+
+        assert output.startswith(b'%PDF-1.7')
+        assert len(reader.pages) == 2
+
+    def test_incremental_update(self, sample_pdf, sample_pdf_2, outlined_pdf):
+        """Test appending pages to an existing document as an incremental update."""
+        _, _, original = _merge([outlined_pdf])
+        buffer = io.BytesIO(original)
+
+        writer = MergeWriter(buffer, base=PyPDF2.PdfReader(io.BytesIO(original)))
+        writer.append(PyPDF2.PdfReader(str(sample_pdf)))
+        writer.append(PyPDF2.PdfReader(str(outlined_pdf)))
+        writer.close()
+
+        data = buffer.getvalue()
+        reader = PyPDF2.PdfReader(io.BytesIO(data))
+        titles = [item['/Title'] for item in reader.outline if not isinstance(item, list)]
+        # The original bytes are untouched; everything new comes after them
+        assert data.startswith(original)
+        assert data.count(b'startxref') == 2
+        assert b'/Prev' in data[len(original):]
+        assert len(reader.pages) == 5
+        assert "This is a test PDF" in reader.pages[2].extract_text()
+        assert titles == ["Start", "Second", "Start", "Second"]
+        assert reader.get_destination_page_number(reader.outline[3]) == 3
+
+    def test_incremental_update_without_outline(self, sample_pdf, outlined_pdf):
+        """Test that an outline is added to a document that had none."""
+        _, _, original = _merge([sample_pdf])
+        buffer = io.BytesIO(original)
+
+        writer = MergeWriter(buffer, base=PyPDF2.PdfReader(io.BytesIO(original)))
+        writer.append(PyPDF2.PdfReader(str(outlined_pdf)))
+        writer.close()
+
+        buffer.seek(0)
+        reader = PyPDF2.PdfReader(buffer)
+        assert len(reader.pages) == 3
+        assert reader.get_destination_page_number(reader.outline[0]) == 1
+
+    def test_object_streams(self, outlined_pdf, sample_pdf):
+        """Test packing dictionaries into object streams with a cross-reference stream."""
+        _, classic, classic_data = _merge([outlined_pdf, sample_pdf] * 5)
+        _, reader, data = _merge([outlined_pdf, sample_pdf] * 5, object_streams=True)
+
+        assert data.startswith(b'%PDF-1.5')
+        assert b'/ObjStm' in data and b'/XRef' in data
+        assert b'\nxref\n' not in data
+        assert len(data) < len(classic_data)
+        assert len(reader.pages) == len(classic.pages) == 15
+        assert "This is a test PDF" in reader.pages[2].extract_text()
+        assert reader.get_destination_page_number(reader.outline[1]) == 1
+
+    def test_object_streams_are_split(self, sample_pdf):
+        """Test that no object stream holds more than OBJECTS_PER_STREAM objects."""
+        _, reader, data = _merge([sample_pdf] * 60, object_streams=True)
+
+        assert data.count(b'/ObjStm') >= 2
+        assert len(reader.pages) == 60
+        assert all(reader.pages[i].extract_text() for i in (0, 59))
+
+    def test_incremental_update_of_xref_stream(self, sample_pdf, outlined_pdf):
+        """Test appending to a document that has a cross-reference stream."""
+        _, _, original = _merge([outlined_pdf], object_streams=True)
+        buffer = io.BytesIO(original)
+
+        writer = MergeWriter(buffer, base=PyPDF2.PdfReader(io.BytesIO(original)))
+        writer.append(PyPDF2.PdfReader(str(sample_pdf)))
+        writer.close()
+
+        data = buffer.getvalue()
+        reader = PyPDF2.PdfReader(io.BytesIO(data), strict=True)
+        # The update keeps using a cross-reference stream
+        assert data.startswith(original)
+        assert b'/XRef' in data[len(original):]
+        assert b'/Prev' in data[len(original):]
+        assert len(reader.pages) == 3
+        assert "This is a test PDF" in reader.pages[2].extract_text()
+        assert reader.get_destination_page_number(reader.outline[1]) == 1
+
+    def test_incremental_update_of_xref_table_keeps_table(self, sample_pdf):
+        """Test that object streams are not used to update a document with an xref table."""
+        _, _, original = _merge([sample_pdf])
+        buffer = io.BytesIO(original)
+
+        writer = MergeWriter(buffer, base=PyPDF2.PdfReader(io.BytesIO(original)), object_streams=True)
+        writer.append(PyPDF2.PdfReader(str(sample_pdf)))
+        writer.close()
+
+        update = buffer.getvalue()[len(original):]
+        assert b'\nxref\n' in update
+        assert b'/ObjStm' not in update
+        assert len(PyPDF2.PdfReader(buffer).pages) == 2
+
+    def test_passthrough_keeps_stream_bytes(self, sample_pdf):
+        """Test that streams are copied verbatim without recompress."""
+        source = PyPDF2.PdfReader(str(sample_pdf)).pages[0]['/Contents'].get_object()
+
+        writer, reader, _ = _merge([sample_pdf])
+
+        copied = reader.pages[0]['/Contents'].get_object()
+        assert copied._data == source._data
+        assert copied['/Filter'] == source['/Filter']
+        assert writer.streams_recompressed == 0
+
+    def test_recompress_deflates_unfiltered_streams(self, temp_dir):
+        """Test that uncompressed content is deflated and still reads the same."""
+        path = temp_dir / "plain.pdf"
+        c = canvas.Canvas(str(path), pageCompression=0)
+        for line in range(40):
+            c.drawString(100, 750 - line * 15, f"Uncompressed line {line}")
+        c.showPage()
+        c.save()
+
+        writer, reader, data = _merge([path], recompress=True)
+
+        content = reader.pages[0]['/Contents'].get_object()
+        assert content['/Filter'] == '/FlateDecode'
+        assert "Uncompressed line 39" in reader.pages[0].extract_text()
+        assert writer.streams_recompressed >= 1
+        assert len(data) < path.stat().st_size
+
+    def test_recompress_strips_ascii_layer(self, sample_pdf):
+        """Test that an ASCII85 wrapper around deflated data is removed."""
+        source = PyPDF2.PdfReader(str(sample_pdf)).pages[0]['/Contents'].get_object()
+        assert source['/Filter'] == ['/ASCII85Decode', '/FlateDecode']
+
+        _, reader, _ = _merge([sample_pdf], recompress=True)
+
+        content = reader.pages[0]['/Contents'].get_object()
+        assert content['/Filter'] == '/FlateDecode'
+        assert content.get_data() == source.get_data()
+        assert len(content._data) < len(source._data)
+
+    def test_tighten_stream_run_length(self):
+        """Test that RunLength data is decoded before deflating."""
+        text = b"hello world " * 100
+        encoded = b"".join(bytes([len(text[i:i + 128]) - 1]) + text[i:i + 128]
+                           for i in range(0, len(text), 128)) + b"\x80"
+        stream = DecodedStreamObject()
+        stream._data = encoded
+        stream[NameObject('/Filter')] = NameObject('/RunLengthDecode')
+
+        assert tighten_stream(stream)
+        assert stream['/Filter'] == '/FlateDecode'
+        assert zlib.decompress(stream._data) == text
+
+    def test_tighten_stream_leaves_small_streams(self):
+        """Test that short unfiltered streams are not deflated."""
+        stream = DecodedStreamObject()
+        stream._data = b"q 1 0 0 1 0 0 cm Q"
+
+        assert not tighten_stream(stream)
+        assert '/Filter' not in stream